@@ -1,6 +1,7 @@
+from collections.abc import Iterable
 from importlib import metadata
 from pathlib import Path
-from typing import Type
+from typing import TextIO
 
 import yaml
 
@@ -12,7 +13,7 @@ from mau.message import BaseMessageHandler, MauException
 from mau.nodes.node import Node
 from mau.parsers.document_parser import DocumentParser
 from mau.text_buffer import TextBuffer
-from mau.token import Token
+from mau.token import Token, TokenArray
 from mau.visitors.base_visitor import BaseVisitor
 from mau.visitors.jinja_visitor import JinjaVisitor
 from mau.visitors.yaml_visitor import YamlVisitor
@@ -177,17 +178,28 @@ class Mau:  # pragma: no cover
         # The text buffer that manages the input file.
         return TextBuffer(text, source_filename=source_filename)
 
+    def init_lexer(self, text_buffer: TextBuffer) -> DocumentLexer:
+        # The lexer that extracts tokens from the text buffer.
+        return DocumentLexer(text_buffer, self.message_handler, self.environment)
+
     def run_lexer(self, text_buffer: TextBuffer) -> DocumentLexer:
         try:
-            lexer = DocumentLexer(text_buffer, self.message_handler, self.environment)
-            lexer.process()
+            lexer = self.init_lexer(text_buffer)
+
+            # All tokens are kept, so they are stored
+            # in a TokenArray instead of a list.
+            lexer.tokens = TokenArray(text_buffer, lexer.tokenize())
         except MauException as exc:
             self.message_handler.process(exc.message)
             raise
 
         return lexer
 
-    def run_parser(self, tokens: list[Token]) -> DocumentParser:
+    def run_parser(self, tokens: Iterable[Token]) -> DocumentParser:
+        # The tokens can be a list or an iterator like
+        # the one returned by the lexer's tokenize method.
+        # In the latter case lexing and parsing are
+        # interleaved, and lexer errors are raised here.
         try:
             parser = DocumentParser(tokens, self.message_handler, self.environment)
             parser.parse()
@@ -197,7 +209,7 @@ class Mau:  # pragma: no cover
 
         return parser
 
-    def run_visitor(self, visitor_class: Type, node: Node | None) -> dict:
+    def run_visitor(self, visitor_class: type, node: Node | None) -> dict:
         # Initialise the visitor with the
         # current environment.
         try:
@@ -209,20 +221,33 @@ class Mau:  # pragma: no cover
             self.message_handler.process(exc.message)
             raise
 
+    def stream_visitor(self, visitor_class: type, node: Node | None, output: TextIO):
+        # Initialise the visitor with the
+        # current environment.
+        try:
+            visitor = visitor_class(self.message_handler, self.environment)
+
+            # Visit the given node and all its
+            # children, writing the result.
+            visitor.stream(node, output)
+        except MauException as exc:
+            self.message_handler.process(exc.message)
+            raise
+
     def process(
         self,
-        visitor_class: Type[BaseVisitor],
+        visitor_class: type[BaseVisitor],
         text: str,
         source_filename: str,
     ):
         # The text buffer that manages the input file.
         text_buffer = self.init_text_buffer(text, source_filename)
 
-        # Run the lexer on the text buffer.
-        lexer = self.run_lexer(text_buffer)
+        # Initialise the lexer on the text buffer.
+        lexer = self.init_lexer(text_buffer)
 
-        # Parse the lexer tokens.
-        parser = self.run_parser(lexer.tokens)
+        # Parse the tokens while the lexer extracts them.
+        parser = self.run_parser(lexer.tokenize())
 
         # Get the main node from the parser.
         document = parser.output.document
@@ -1,7 +1,9 @@
 import argparse
 import logging
+import os
 import sys
-from typing import Type
+from collections.abc import Iterable
+from contextlib import contextmanager
 
 import yaml
 from rich.traceback import install
@@ -17,6 +19,10 @@ from mau import (
 from mau.environment.environment import Environment
 from mau.lexers.base_lexer import print_tokens
 from mau.message import LogMessageHandler, MauException
+from mau.parsers.document_parser import DocumentParserOutput
+from mau.parsers.parse_cache import ParseCache
+from mau.text_buffer import TextBuffer
+from mau.token import Token
 from mau.visitors.base_visitor import BaseVisitor
 
 install(show_locals=True)
@@ -24,21 +30,32 @@ install(show_locals=True)
 logger = logging.getLogger(__name__)
 
 
-def write_output(output, output_file, postprocess=None):
-    if postprocess:
-        output = postprocess(output)
-
+@contextmanager
+def open_output(output_file):
     # The output file can be "-" which means
     # the standard output
     if output_file == "-":
-        print(output)
+        yield sys.stdout
 
         return
 
-    # We need to write on an actual file
-    with open(output_file, "w", encoding="utf-8") as out:
-        out.write(output)
-        out.write("\n")
+    # We need to write on an actual file.
+    # The output is written in a temporary
+    # file and moved when it is complete,
+    # so that an error never leaves an
+    # empty or partial output file.
+    temp_file = f"{output_file}.{os.getpid()}.tmp"
+
+    try:
+        with open(temp_file, "w", encoding="utf-8") as out:
+            yield out
+
+        os.replace(temp_file, output_file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+        raise
 
 
 def create_parser(visitors):
@@ -133,6 +150,17 @@ def create_parser(visitors):
         help="Output format",
     )
 
+    parser.add_argument(
+        "--cache-dir",
+        action="store",
+        required=False,
+        help=(
+            "Optional directory where parsed documents are stored "
+            "and reused if the input, the included files, and the "
+            "environment didn't change"
+        ),
+    )
+
     parser.add_argument(
         "--lexer-print-output",
         dest="lexer_print_output",
@@ -161,6 +189,75 @@ def setup_logging(loglevel):
     )
 
 
+def parse(
+    mau: Mau,
+    text_buffer: TextBuffer,
+    args: argparse.Namespace,
+    parse_cache: ParseCache | None,
+    cache_key: str | None,
+) -> DocumentParserOutput:
+    # Run the lexer and the parser on the text,
+    # storing the output in the cache if needed.
+
+    ###############################################
+    # LEXER
+    ###############################################
+
+    # The tokens extracted by the lexer.
+    tokens: Iterable[Token]
+
+    if args.lexer_print_output or args.lexer_only:
+        # Run the lexer.
+        try:
+            lexer = mau.run_lexer(text_buffer)
+        except MauException:
+            sys.exit(1)
+
+        # The user wants us print the resulting tokens.
+        if args.lexer_print_output:
+            # Print the tokens collected by the lexer.
+            print_tokens(lexer.tokens)
+
+        # The user wants us to run the lexer only.
+        if args.lexer_only:
+            print("Mau stopped after the lexing step as requested")
+            sys.exit(0)
+
+        tokens = lexer.tokens
+    else:
+        # The lexer runs while the parser consumes
+        # tokens, so lexer errors are raised
+        # by the parser.
+        tokens = mau.init_lexer(text_buffer).tokenize()
+
+    # The variables of the environment before
+    # parsing, used to find the ones that
+    # the parser adds.
+    initial_variables = dict(mau.environment.asflatdict())
+
+    ###############################################
+    # PARSER
+    ###############################################
+
+    # Run the parser.
+    try:
+        parser = mau.run_parser(tokens)
+    except MauException:
+        sys.exit(1)
+
+    # Store the output of the parser.
+    if parse_cache is not None and cache_key is not None:
+        parse_cache.store(
+            cache_key,
+            text_buffer.text,
+            parser.output,
+            initial_variables,
+            mau.environment,
+        )
+
+    return parser.output
+
+
 def main():
     ###############################################
     # INITIAL SETUP
@@ -168,7 +265,7 @@ def main():
 
     # Load a dictionary of all visitors,
     # indexed by the output format.
-    visitors: dict[str, Type[BaseVisitor]] = load_visitors()
+    visitors: dict[str, type[BaseVisitor]] = load_visitors()
 
     # Create the parser.
     argparser = create_parser(visitors)
@@ -230,34 +327,25 @@ def main():
     text_buffer = mau.init_text_buffer(text, args.input_file)
 
     ###############################################
-    # LEXER
+    # PARSE CACHE
     ###############################################
 
-    # Run the lexer.
-    try:
-        lexer = mau.run_lexer(text_buffer)
-    except MauException:
-        sys.exit(1)
+    # The cache is not used if the user
+    # wants to see the output of the lexer.
+    parse_cache: ParseCache | None = None
+    cache_key: str | None = None
+    if args.cache_dir and not (args.lexer_print_output or args.lexer_only):
+        parse_cache = ParseCache(args.cache_dir, key=__version__)
+        cache_key = parse_cache.entry_key(args.input_file, environment)
 
-    # The user wants us print the resulting tokens.
-    if args.lexer_print_output:
-        # Print the tokens collected by the lexer.
-        print_tokens(lexer.tokens)
+    # The output of the parser, if
+    # it has been found in the cache.
+    output: DocumentParserOutput | None = None
+    if parse_cache is not None and cache_key is not None:
+        output = parse_cache.load(cache_key, text, environment)
 
-    # The user wants us to run the lexer only.
-    if args.lexer_only:
-        print("Mau stopped after the lexing step as requested")
-        sys.exit(0)
-
-    ###############################################
-    # PARSER
-    ###############################################
-
-    # Run the parser.
-    try:
-        parser = mau.run_parser(lexer.tokens)
-    except MauException:
-        sys.exit(1)
+    if output is None:
+        output = parse(mau, text_buffer, args, parse_cache, cache_key)
 
     ###############################################
     # VISITOR
@@ -275,22 +363,22 @@ def main():
 
     # Get the main output node
     # from the parser.
-    document = parser.output.document
-
-    try:
-        # Process the node.
-        rendered = mau.run_visitor(visitor_class, document)
-    except MauException:
-        sys.exit(1)
+    document = output.document
 
     # Find out the name of the output file
     output_file = args.output_file or args.input_file.replace(
         ".mau", f".{visitor_class.extension}"
     )
 
-    # Write the rendered text to
-    # the selected output file.
-    write_output(rendered, output_file)
+    # Process the node and write the
+    # rendered text to the selected
+    # output file while it is created.
+    try:
+        with open_output(output_file) as out:
+            mau.stream_visitor(visitor_class, document, out)
+            out.write("\n")
+    except MauException:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
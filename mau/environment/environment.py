@@ -1,7 +1,72 @@
 from __future__ import annotations
 
+from bisect import bisect_left, insort
+from collections import ChainMap
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+
 from .helpers import flatten_nested_dict, nest_flattened_dict
 
+# The maximum number of layers an environment
+# can share with others. Beyond this limit the
+# layers are merged into a single one.
+MAX_SHARED_LAYERS = 16
+
+
+class _KeyIndex:
+    """
+    A sorted list of flat keys, used to find
+    the keys that start with a prefix with a
+    binary search.
+
+    The index remembers the order in which keys
+    have been added, so that keys are returned
+    in the same order as the environment.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        # The position of each key
+        # in the environment.
+        self._order: dict[str, int] = {key: i for i, key in enumerate(keys)}
+
+        self._sorted: list[str] = sorted(self._order)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._order
+
+    def copy(self) -> _KeyIndex:
+        index = _KeyIndex()
+        index._order = dict(self._order)
+        index._sorted = list(self._sorted)
+
+        return index
+
+    def add(self, keys: list[str]):
+        # Add keys that are not in the index.
+        for key in keys:
+            self._order[key] = len(self._order)
+
+        if len(keys) == 1:
+            insort(self._sorted, keys[0])
+            return
+
+        # Sorting is fast when the list
+        # is already mostly sorted.
+        self._sorted.extend(keys)
+        self._sorted.sort()
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        # The keys that start with the prefix are
+        # between the prefix itself and the prefix
+        # with the last character replaced by the
+        # next one, e.g. "a.b." <= key < "a.b/".
+        start = bisect_left(self._sorted, prefix)
+        end = bisect_left(self._sorted, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+
+        keys = self._sorted[start:end]
+        keys.sort(key=self._order.__getitem__)
+
+        return keys
+
 
 class Environment:
     """
@@ -10,22 +75,108 @@ class Environment:
     An Environment contains a dictionary of
     configuration variables that can be queried using flat
     variable names like `a.b.c`.
+
+    Variables are stored in layers of flat dictionaries.
+    Only the first layer is ever changed, while the
+    others are shared with the environments created
+    with from_environment and never change.
+    This way a copy of an environment stores only
+    its own variables.
     """
 
     def __init__(self):
         # This is the internal dictionary, which
         # is always kept in its flattened version.
-        self._variables: dict = {}
+        self._variables: ChainMap = ChainMap()
+
+        # The index of the keys, used to find
+        # namespaces. It is created only when
+        # it is needed and is shared with the
+        # environments created with from_environment,
+        # so it is copied before being changed.
+        self._index: _KeyIndex | None = None
+        self._index_shared = False
+
+        # The number of changes of the variables.
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """
+        A counter that changes every time
+        variables are stored, so that values
+        computed from the environment can
+        be cached.
+        """
+        return self._version
 
     @classmethod
-    def from_dict(cls, other: dict, namespace: str | None = None):
+    def from_dict(cls, other: MutableMapping, namespace: str | None = None):
         env = cls()
         env.dupdate(other, namespace)
         return env
 
     @classmethod
     def from_environment(cls, other: Environment, namespace: str | None = None):
-        return cls().from_dict(other.asdict(), namespace)
+        # Under a namespace all
+        # variables have to be copied.
+        if namespace:
+            return cls().from_dict(other.asdict(), namespace)
+
+        env = cls()
+        env._variables = ChainMap({}, *other._share_layers())
+
+        if other._index is not None:
+            env._index = other._index
+            env._index_shared = other._index_shared = True
+
+        return env
+
+    def _share_layers(self) -> list[MutableMapping]:
+        # Return the layers of this environment
+        # so that another one can use them.
+        # The shared layers cannot change any more,
+        # so this environment moves to a new one.
+        layers = self._variables.maps
+
+        # An empty layer doesn't need to be shared.
+        if not layers[0]:
+            layers = layers[1:]
+
+        # Merge the layers if there are too many,
+        # so that looking up variables stays fast.
+        if len(layers) > MAX_SHARED_LAYERS:
+            layers = [dict(ChainMap(*layers))]
+
+        self._variables = ChainMap({}, *layers)
+
+        return layers
+
+    def _store(self, variables: Mapping):
+        # Store flat variables in the first layer,
+        # adding new keys to the index.
+        if self._index is not None:
+            new_keys = [k for k in variables if k not in self._index]
+
+            if new_keys:
+                if self._index_shared:
+                    self._index = self._index.copy()
+                    self._index_shared = False
+
+                self._index.add(new_keys)
+
+        self._variables.update(variables)
+        self._version += 1
+
+    def _keys_with_prefix(self, prefix: str) -> list[str]:
+        # Return the keys that start with the
+        # given prefix, creating the index
+        # if it doesn't exist yet.
+        if self._index is None:
+            self._index = _KeyIndex(self._variables)
+            self._index_shared = False
+
+        return self._index.with_prefix(prefix)
 
     def update(self, other: Environment, namespace: str | None = None, overwrite=True):
         # Create an environment, to get all
@@ -34,25 +185,36 @@ class Environment:
         new_env = Environment.from_dict(other._variables, namespace)
 
         if overwrite:
-            self._variables.update(new_env._variables)
+            self._store(new_env._variables)
             return
 
-        new_env._variables.update(self._variables)
-        self._variables = new_env._variables
+        # Add only the variables that
+        # are not already defined.
+        self._store(
+            {k: v for k, v in new_env._variables.items() if k not in self._variables}
+        )
 
-    def dupdate(self, other: dict, namespace: str | None = None):
+    def dupdate(self, other: MutableMapping, namespace: str | None = None):
         # If there is a namespace store the
         # new dictionary under it.
         if namespace:
             other = {namespace: other}
 
-        self._variables.update(flatten_nested_dict(other))
+        self._store(flatten_nested_dict(other))
 
     def asdict(self) -> dict[str, str | dict]:
         return nest_flattened_dict(self._variables)
 
     def asflatdict(self) -> dict[str, str]:
-        return self._variables
+        # If there are shared layers, merge them
+        # into a new one owned by this environment.
+        if len(self._variables.maps) > 1:
+            self._variables = ChainMap(dict(self._variables))
+
+        # The first layer is always a dictionary.
+        layer = self._variables.maps[0]
+
+        return layer if isinstance(layer, dict) else dict(layer)
 
     def __setitem__(self, key, value):
         # If the value is a dictionary, we need to include
@@ -77,27 +239,76 @@ class Environment:
             # key into a namespace prefix.
             prefix = f"{key}."
 
-            # Find all the flat keys that
-            # start with that prefix.
-            keys = [k for k in self._variables if k.startswith(prefix)]
-
-            # If we found matching keys,
-            # we need to return the corresponding
-            # items as an Environment.
-            #
-            # For each matching key, we create
-            # the key without prefix and store
-            # the value under it. Then, we
-            # promote to an Environment.
-            if len(keys) != 0:
-                return self.__class__.from_dict(
-                    {
-                        k.removeprefix(prefix): v
-                        for k, v in self._variables.items()
-                        if k.startswith(prefix)
-                    }
-                )
+            # If there are keys that start with
+            # that prefix return a view on them.
+            if self._keys_with_prefix(prefix):
+                return EnvironmentView(self, prefix)
 
             # If we can't find matching keys
             # we should return the default value.
             return default
+
+
+class _NamespaceVariables(Mapping):
+    # The variables of an environment under
+    # a namespace, without the prefix.
+
+    def __init__(self, environment: Environment, prefix: str):
+        self._environment = environment
+        self._prefix = prefix
+
+    def __getitem__(self, key: str):
+        return self._environment._variables[f"{self._prefix}{key}"]
+
+    def __iter__(self) -> Iterator[str]:
+        length = len(self._prefix)
+
+        return (
+            key[length:] for key in self._environment._keys_with_prefix(self._prefix)
+        )
+
+    def __len__(self) -> int:
+        return len(self._environment._keys_with_prefix(self._prefix))
+
+
+class EnvironmentView(Environment):
+    """
+    A read-only view on the variables of an
+    environment under a namespace, returned
+    by Environment.get.
+
+    The view doesn't copy the variables, so
+    it reflects later changes of the environment.
+    Any attempt to change it raises TypeError.
+    """
+
+    def __init__(self, environment: Environment, prefix: str):
+        # The view has no layers, it reads
+        # the variables of the environment.
+        self._variables = _NamespaceVariables(environment, prefix)  # type: ignore[assignment]
+        self._index = None
+        self._index_shared = False
+
+        self._environment = environment
+        self._prefix = prefix
+
+    @property
+    def version(self) -> int:
+        return self._environment.version
+
+    def _share_layers(self) -> list[MutableMapping]:
+        return [dict(self._variables)]
+
+    def _store(self, variables: Mapping):
+        raise TypeError("An EnvironmentView cannot be changed")
+
+    def _keys_with_prefix(self, prefix: str) -> list[str]:
+        length = len(self._prefix)
+
+        return [
+            key[length:]
+            for key in self._environment._keys_with_prefix(f"{self._prefix}{prefix}")
+        ]
+
+    def asflatdict(self) -> dict[str, str]:
+        return dict(self._variables)
@@ -1,4 +1,4 @@
-from collections.abc import MutableMapping
+from collections.abc import Mapping, MutableMapping
 
 
 def flatten_nested_dict(
@@ -35,7 +35,7 @@ def flatten_nested_dict(
     return flat
 
 
-def nest_flattened_dict(flat: dict, separator: str = ".") -> dict:
+def nest_flattened_dict(flat: Mapping, separator: str = ".") -> dict:
     """
     Nest a flat dictionary.
 
@@ -1,8 +1,14 @@
+import re
 from typing import Callable
 
-from mau.lexers.base_lexer import BaseLexer, rematch
+from mau.lexers.base_lexer import BaseLexer
 from mau.token import Token, TokenType
 
+# Any amount of whitespace.
+WHITESPACE_PATTERN = re.compile(r" +")
+# Anything that is not a special character or a space.
+TEXT_PATTERN = re.compile(r'[^\\=," ]+')
+
 
 class ArgumentsLexer(BaseLexer):
     """This lexer processes a string of text
@@ -37,7 +43,7 @@ class ArgumentsLexer(BaseLexer):
 
     def _process_whitespace(self) -> list[Token] | None:
         # Find any amount of whitespace.
-        match = rematch(r" +", self._tail)
+        match = self._match_tail(WHITESPACE_PATTERN)
 
         if not match:
             return None
@@ -56,7 +62,7 @@ class ArgumentsLexer(BaseLexer):
     def _process_text(self) -> list[Token] | None:
         # Anything that is not a special character
         # or a space can become a text token.
-        match = rematch(r'[^\\=," ]+', self._tail)
+        match = self._match_tail(TEXT_PATTERN)
 
         if not match:  # pragma: no cover
             return None
@@ -1,14 +1,21 @@
 import logging
 import re
+from collections.abc import Iterable, Iterator
 from typing import Callable
 
 from mau.environment.environment import Environment
 from mau.message import BaseMessageHandler, MauException, MauLexerErrorMessage
 from mau.text_buffer import Context, Position, TextBuffer, adjust_context
-from mau.token import Token, TokenType
+from mau.token import Token, TokenArray, TokenType
 
 logger = logging.getLogger(__name__)
 
+# These regular expressions are used by
+# all lexers for every token they process,
+# so they are compiled only once.
+EMPTY_LINE_PATTERN = re.compile(r"^\ *$")
+TRAILING_SPACES_PATTERN = re.compile(r"\ *$")
+
 
 def rematch(regexp, text):
     # Match the regexp on the current line.
@@ -21,7 +28,7 @@ def create_lexer_exception(text: str, source: str, position: Position | None = N
     return MauException(message)
 
 
-def print_tokens(tokens: list[Token]):
+def print_tokens(tokens: Iterable[Token]):
     for token in tokens:
         print(f"{token.type} {repr(token.value)} {adjust_context(token.context)}")
 
@@ -47,8 +54,9 @@ class BaseLexer:
         self.text_buffer: TextBuffer = text_buffer
 
         # This is the list of the tokens that
-        # the lexer extracts.
-        self.tokens: list[Token] = []
+        # the lexer extracts. Mau.run_lexer
+        # stores them in a TokenArray.
+        self.tokens: list[Token] | TokenArray = []
 
         # The last visited position. Used to detect loops.
         self._last_position: Position | None = None
@@ -79,6 +87,18 @@ class BaseLexer:
         # A wrapper to return the rest of the line.
         return self.text_buffer.tail
 
+    def _match_tail(self, pattern: re.Pattern) -> re.Match | None:
+        # Match the pattern on the rest of the line.
+        # The pattern is matched directly on the
+        # buffer text between the current offset and
+        # the end of the line, so no new string
+        # is created for the tail.
+        return pattern.match(
+            self.text_buffer.text,
+            self.text_buffer.offset,
+            self.text_buffer.line_end,
+        )
+
     def _nextline(self):
         # Skip the whole line including the EOL.
         self.text_buffer.nextline()
@@ -139,12 +159,35 @@ class BaseLexer:
             # There are other tokens to find.
             self._process()
 
+    def tokenize(self) -> Iterator[Token]:
+        """Process the text and yield tokens as
+        soon as they are extracted.
+
+        This works like process, but the tokens
+        are not stored in the lexer, so they can
+        be consumed (and freed) while lexing.
+        """
+
+        while True:
+            tokens = self._next_tokens()
+
+            yield from tokens
+
+            # Check if the last thing we processed is an EOF.
+            # In that case the process is over.
+            if tokens and tokens[-1].type is TokenType.EOF:
+                return
+
     def _process(self):
+        # Store the next tokens found in the text.
+        self.tokens.extend(self._next_tokens())
+
+    def _next_tokens(self) -> list[Token]:
         # This is the core of the lexer.
         # It should not be overridden by child classes.
         #
         # The function tries each function in the list
-        # returned by _process_functions and stores
+        # returned by _process_functions and returns
         # all the resulting tokens.
         #
         # All lexers process first EOF, empty line, and
@@ -192,9 +235,11 @@ class BaseLexer:
             if result is None:
                 continue
 
-            self.tokens.extend(result)
+            return result
 
-            return
+        # The error function always raises,
+        # so this should never be reached.
+        return []  # pragma: no cover
 
     def _process_functions(self) -> list[Callable[[], list[Token] | None]]:
         return [
@@ -224,7 +269,7 @@ class BaseLexer:
         # that we want to preserve.
 
         # Match a line of pure spaces.
-        match = rematch(r"^\ *$", self._current_line)
+        match = EMPTY_LINE_PATTERN.match(self._current_line)
 
         # If there is no match just return.
         if not match:
@@ -244,14 +289,14 @@ class BaseLexer:
 
         # Match only spaces from here
         # to the end of the line.
-        match = rematch(r"\ *$", self._tail)
+        match = self._match_tail(TRAILING_SPACES_PATTERN)
 
         # If there is no match just return.
         if not match:
             return None
 
         # Skip the spaces we found.
-        self._skip(self._tail)
+        self.text_buffer.skip(match.end() - match.start())
 
         # Move to the next line.
         self._nextline()
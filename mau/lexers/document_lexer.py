@@ -1,30 +1,102 @@
 import logging
+import re
 from typing import Callable
 
-from mau.lexers.base_lexer import BaseLexer, create_lexer_exception, rematch
-from mau.text_buffer import Context
-from mau.token import Token, TokenType
+from mau.environment.environment import Environment
+from mau.lexers.base_lexer import BaseLexer, create_lexer_exception
+from mau.message import BaseMessageHandler
+from mau.text_buffer import Context, TextBuffer
+from mau.token import TextViewToken, Token, TokenType
 
 logger = logging.getLogger(__name__)
 
+# The regular expressions used to recognise
+# document-level constructs. They are compiled
+# once as they run on every line of the input.
+COMMENT_PATTERN = re.compile(r"^//.*")
+HORIZONTAL_RULE_PATTERN = re.compile(r"^---$")
+BLOCK_PATTERN = re.compile(r"^(.)\1{3}$")
+CONTROL_PATTERN = re.compile(
+    r"^(?P<prefix>@)(?P<operator>[a-z]+)(?P<whitespace> *)(?P<condition>.*)$"
+)
+INCLUDE_PATTERN = re.compile(
+    r"^(?P<prefix><<)(?P<whitespace> *)(?P<type>[a-z0-9_#\.]+)(?P<separator>:)?(?P<arguments>.*)?"
+)
+VARIABLE_PATTERN = re.compile(
+    r"^(?P<prefix>:)(?P<name>[a-zA-Z0-9_\.\+\-]+)(?P<separator>:)?(?P<value>.*)?"
+)
+ARGUMENTS_PATTERN = re.compile(r"^(?P<prefix>\[)(?P<arguments>.*)(?P<suffix>\])$")
+LABEL_PATTERN = re.compile(r"^(?P<prefix>\.[a-z0-9-_]*)(?P<whitespace> *)(?P<label>.*)")
+LIST_PATTERN = re.compile(
+    r"^(?P<whitespace1> *)(?P<prefix>[\*#]+)(?P<whitespace2> +)(?P<item>.*)"
+)
+HEADER_PATTERN = re.compile(r"^(?P<prefix>=+)(?P<whitespace> *)(?P<header>.+)")
+
+# This is the line classifier. Each processing
+# function can match only lines that begin with
+# specific characters, so the first character of
+# a line is enough to select the candidates.
+#
+# Block delimiters can be made of any character,
+# so the function that processes them is added
+# to all candidates (it rejects lines that are
+# not 4 characters long before running any regexp).
+# The only exceptions are the slash, as `////`
+# opens a multiline comment, and the dash,
+# as `---` is an horizontal rule.
+#
+# The order of the candidates follows the
+# precedence of the rules, and lines with a
+# first character not listed here can only
+# be blocks or text.
+LINE_CLASSIFIER = {
+    "/": ["_process_multiline_comment", "_process_comment"],
+    "-": ["_process_horizontal_rule", "_process_block"],
+    "@": ["_process_block", "_process_control"],
+    "<": ["_process_block", "_process_include"],
+    ":": ["_process_block", "_process_variable"],
+    "[": ["_process_block", "_process_arguments"],
+    ".": ["_process_block", "_process_label"],
+    " ": ["_process_block", "_process_list"],
+    "*": ["_process_block", "_process_list"],
+    "#": ["_process_block", "_process_list"],
+    "=": ["_process_block", "_process_header"],
+}
+
+DEFAULT_LINE_CANDIDATES = ["_process_block"]
+
 
 class DocumentLexer(BaseLexer):
+    def __init__(
+        self,
+        text_buffer: TextBuffer,
+        message_handler: BaseMessageHandler,
+        environment: Environment | None = None,
+    ):
+        super().__init__(text_buffer, message_handler, environment)
+
+        # Bind the candidates of the line classifier
+        # once, so that each line can jump straight
+        # to the functions that might process it.
+        # All lists end with the function that
+        # processes text, as any line that doesn't
+        # match a specific syntax is just text.
+        self._line_candidates: dict[str, list[Callable[[], list[Token] | None]]] = {
+            first_char: [getattr(self, name) for name in names] + [self._process_text]
+            for first_char, names in LINE_CLASSIFIER.items()
+        }
+
+        self._default_line_candidates = [
+            getattr(self, name) for name in DEFAULT_LINE_CANDIDATES
+        ] + [self._process_text]
+
     def _process_functions(self) -> list[Callable[[], list[Token] | None]]:
-        return [
-            self._process_multiline_comment,
-            self._process_comment,
-            self._process_horizontal_rule,
-            self._process_block,
-            self._process_control,
-            self._process_include,
-            self._process_variable,
-            self._process_arguments,
-            self._process_label,
-            self._process_list,
-            self._process_header,
-            # This is provided by BaseLexer
-            self._process_text,
-        ]
+        # Select the candidate functions
+        # using the first character of
+        # the current line.
+        return self._line_candidates.get(
+            self._current_line[:1], self._default_line_candidates
+        )
 
     def _process_multiline_comment(self) -> list[Token] | None:
         # Detect the beginning of a multiline comment
@@ -76,7 +148,7 @@ class DocumentLexer(BaseLexer):
         # starts with two slashes //.
 
         # Check if the line starts with two slashes.
-        match = rematch(r"^//.*", self._current_line)
+        match = COMMENT_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
@@ -93,7 +165,7 @@ class DocumentLexer(BaseLexer):
 
         # Check if the three dashes are the
         # only content of the line.
-        match = rematch(r"^---$", self._current_line)
+        match = HORIZONTAL_RULE_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if match is None:
@@ -121,7 +193,7 @@ class DocumentLexer(BaseLexer):
         # Try to match the block delimiter
         # finding four repetitions of the
         # same character.
-        match = rematch(r"^(.)\1{3}$", self._current_line)
+        match = BLOCK_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if match is None:
@@ -140,39 +212,39 @@ class DocumentLexer(BaseLexer):
         # Get the initial position of the block content.
         initial_position = self._position
 
-        # We need to collect all text lines
-        # contained between two delimiters.
-        text_lines = []
-
-        while True:
-            # Check if we reached the EOF.
-            if self.text_buffer.eof:
-                raise create_lexer_exception(
-                    text="Unclosed block.",
-                    source=self.text_buffer.source_filename,
-                    position=delimiter.context.start_position,
-                )
-
-            # If the current line contains only the
-            # closing delimiter we can stop the loop.
-            if self._current_line == delimiter.value:
-                break
-
-            # If we reach this point we are looking
-            # at a line inside the block.
-            # Store it and move on.
-            text_lines.append(self._current_line)
+        # The content of the block is everything
+        # between the two delimiters. Instead of
+        # collecting the lines one by one, the
+        # closing delimiter is searched directly
+        # in the text, and the content is a view
+        # on the text, so that nested parsers
+        # can read it without copying it.
+        text = self.text_buffer.text
+        content_start = self.text_buffer.line_start
+        closing_start = self._find_closing_delimiter(delimiter.value, content_start)
+
+        if closing_start is None:
+            raise create_lexer_exception(
+                text="Unclosed block.",
+                source=self.text_buffer.source_filename,
+                position=delimiter.context.start_position,
+            )
 
-            # Move to the next line.
-            self._nextline()
+        # If there is content create a
+        # text token that contains it.
+        if closing_start > content_start:
+            # The content doesn't include the
+            # newline before the closing delimiter.
+            content_end = closing_start - 1
 
-        # If we collected text lines create a
-        # text token that contains them.
-        if text_lines:
             # Find the final position after
             # the end of the block content.
-            end_line = initial_position[0] + len(text_lines) - 1
-            end_column = initial_position[1] + len(text_lines[-1])
+            newline = text.rfind("\n", content_start, content_end)
+            last_line_start = content_start if newline == -1 else newline + 1
+            end_line = initial_position[0] + text.count(
+                "\n", content_start, content_end
+            )
+            end_column = initial_position[1] + content_end - last_line_start
 
             # Create the context of the
             # block content.
@@ -183,12 +255,11 @@ class DocumentLexer(BaseLexer):
                 self.text_buffer.source_filename,
             )
 
-            # Create the token value joining
-            # all the block content lines.
-            content = "\n".join(text_lines)
-
             # Create the content token.
-            tokens.append(Token(TokenType.TEXT, content, context))
+            tokens.append(TextViewToken(text, content_start, content_end, context))
+
+        # Move to the line of the closing delimiter.
+        self.text_buffer.nextline_at(closing_start)
 
         # Create the token for the closing delimiter.
         closing_delimiter = self._create_token_and_skip(
@@ -204,6 +275,33 @@ class DocumentLexer(BaseLexer):
 
         return tokens
 
+    def _find_closing_delimiter(self, delimiter: str, start: int) -> int | None:
+        # Find the offset of the first line after
+        # the given offset that contains only the
+        # given delimiter. Return None if there
+        # is no such line.
+        text = self.text_buffer.text
+        text_end = self.text_buffer.end_offset
+        end = start + len(delimiter)
+
+        if text.startswith(delimiter, start, text_end) and (
+            end == text_end or text[end] == "\n"
+        ):
+            return start
+
+        newline = text.find("\n" + delimiter, start, text_end)
+
+        while newline != -1:
+            line_start = newline + 1
+            end = line_start + len(delimiter)
+
+            if end == text_end or text[end] == "\n":
+                return line_start
+
+            newline = text.find("\n" + delimiter, line_start, text_end)
+
+        return None
+
     def _process_control(self) -> list[Token] | None:
         # Detect control logic in the form
         #
@@ -211,13 +309,7 @@ class DocumentLexer(BaseLexer):
         #
 
         # Try to match the syntax shown above.
-        match = rematch(
-            (
-                r"^(?P<prefix>@)(?P<operator>[a-z]+)(?P<whitespace> *)"
-                r"(?P<condition>.*)$"
-            ),
-            self._current_line,
-        )
+        match = CONTROL_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
@@ -258,10 +350,7 @@ class DocumentLexer(BaseLexer):
         # _ # .
 
         # Try to match the syntax shown above.
-        match = rematch(
-            r"^(?P<prefix><<)(?P<whitespace> *)(?P<type>[a-z0-9_#\.]+)(?P<separator>:)?(?P<arguments>.*)?",
-            self._current_line,
-        )
+        match = INCLUDE_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
@@ -306,10 +395,7 @@ class DocumentLexer(BaseLexer):
         # _ . + -
 
         # Try to match the syntax shown above.
-        match = rematch(
-            r"^(?P<prefix>:)(?P<name>[a-zA-Z0-9_\.\+\-]+)(?P<separator>:)?(?P<value>.*)?",
-            self._current_line,
-        )
+        match = VARIABLE_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
@@ -348,10 +434,7 @@ class DocumentLexer(BaseLexer):
         # [ARGUMENTS]
 
         # Try to match the syntax shown above.
-        match = rematch(
-            r"^(?P<prefix>\[)(?P<arguments>.*)(?P<suffix>\])$",
-            self._current_line,
-        )
+        match = ARGUMENTS_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
@@ -386,10 +469,7 @@ class DocumentLexer(BaseLexer):
         # .role LABEL
 
         # Try to match the syntax shown above.
-        match = rematch(
-            r"^(?P<prefix>\.[a-z0-9-_]*)(?P<whitespace> *)(?P<label>.*)",
-            self._current_line,
-        )
+        match = LABEL_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
@@ -429,10 +509,7 @@ class DocumentLexer(BaseLexer):
         # Space between the prefix symbol and text is ignored as well.
 
         # Try to match the syntax shown above.
-        match = rematch(
-            r"^(?P<whitespace1> *)(?P<prefix>[\*#]+)(?P<whitespace2> +)(?P<item>.*)",
-            self._current_line,
-        )
+        match = LIST_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
@@ -470,9 +547,7 @@ class DocumentLexer(BaseLexer):
         # Multiple prefix symbols can be specified.
 
         # Try to match the syntax shown above.
-        match = rematch(
-            "^(?P<prefix>=+)(?P<whitespace> *)(?P<header>.+)", self._current_line
-        )
+        match = HEADER_PATTERN.match(self._current_line)
 
         # If the current line does not match just move on.
         if not match:
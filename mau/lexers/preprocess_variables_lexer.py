@@ -1,8 +1,12 @@
+import re
 from typing import Callable
 
-from mau.lexers.base_lexer import BaseLexer, rematch
+from mau.lexers.base_lexer import BaseLexer
 from mau.token import Token, TokenType
 
+# Anything that is not a special character.
+TEXT_PATTERN = re.compile(r"[^\\`{}]+")
+
 
 class PreprocessVariablesLexer(BaseLexer):
     r"""This lexer has been designed to work on
@@ -28,7 +32,7 @@ class PreprocessVariablesLexer(BaseLexer):
         # Anything that is not a special character
         # can be collected under the generic name
         # of "text".
-        match = rematch(r"[^\\`{}]+", self._tail)
+        match = self._match_tail(TEXT_PATTERN)
 
         if not match:  # pragma: no cover
             return None
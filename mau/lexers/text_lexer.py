@@ -1,8 +1,35 @@
+import re
 from typing import Callable
 
-from mau.lexers.base_lexer import BaseLexer, rematch
+from mau.lexers.base_lexer import BaseLexer
+from mau.text_buffer import Context
 from mau.token import Token, TokenType
 
+# This regular expression recognises all the tokens
+# of a line of text in a single pass.
+#
+# * A space is a whitespace token. Multiple spaces
+#   are deliberately matched one at a time, so
+#   each one of them becomes a token.
+# * The special characters are literals. They are
+#   ~ ^ _ * ` ( ) [ ] \ " $ %
+#   (the characters ^ $ \ ] are escaped).
+# * Anything else is text.
+#
+# The three alternatives cover every possible
+# character, so the matches are contiguous.
+TOKEN_PATTERN = re.compile(
+    r'(?P<whitespace> )|(?P<literal>[~\^_*`()[\]\\"\$%])|(?P<text>[^~\^_*`()[\]"\\\$% ]+)'
+)
+
+# The type of the token created by each
+# group of the regular expression.
+TOKEN_TYPES = {
+    "whitespace": TokenType.TEXT,
+    "literal": TokenType.LITERAL,
+    "text": TokenType.TEXT,
+}
+
 
 class TextLexer(BaseLexer):
     r"""This lexer operates on text blocks
@@ -15,51 +42,49 @@ class TextLexer(BaseLexer):
     The double quotes can be used to include
     parentheses inside macro arguments, so they
     need to be isolated.
+
+    The lexer scans each line with a single regular
+    expression and emits all its tokens at once.
     """
 
-    def _process_whitespace(self) -> list[Token] | None:
-        # Find any amount of whitespace.
-        match = rematch(r" +", self._tail)
+    def _process_line(self) -> list[Token] | None:
+        # Scan the rest of the current line and
+        # create all the tokens it contains.
+        line = self._current_line
 
-        if not match:
-            return None
+        # The scan starts at the current column
+        # and stops before trailing spaces, that
+        # are skipped by BaseLexer.
+        scan_start = self.text_buffer.column
+        scan_end = len(line.rstrip(" "))
 
-        return [self._create_token_and_skip(TokenType.TEXT, " ")]
-
-    def _process_literal(self) -> list[Token] | None:
-        # Find special characters.
-        # Please note that the backslash
-        # must be escaped, so it's
-        # represented as \\.
-        #
-        # The characters without escapes are
-        # ~ ^ _ * ` ( ) [ ] \ " $ %
-        if self._current_char not in '~^_*`()[]\\"$%':
+        if scan_start >= scan_end:  # pragma: no cover
             return None
 
-        return [self._create_token_and_skip(TokenType.LITERAL, self._current_char)]
-
-    def _process_text(self) -> list[Token] | None:
-        # Find text characters, excluding
-        # special characters.
-        # Please note that since this is a
-        # regular expression, the characters
-        # ^ $ \ ] have to be escaped.
-        #
-        # So, the regexp below is
-        # [^CHARACTERS]+
-        # where CHARACTERS is
-        # ~ ^ _ * ` ( ) [ ] " \ $ % SPACE
-        match = rematch(r'[^~\^_*`()[\]"\\\$% ]+', self._tail)
-
-        if not match:  # pragma: no cover
-            return None
+        # The contexts of the tokens are created
+        # from their offsets in the text, and
+        # lines and columns are computed only
+        # if they are needed.
+        line_index = self.text_buffer.line_index
+        offset = self.text_buffer.line_start
+
+        tokens = [
+            Token(
+                TOKEN_TYPES[match.lastgroup],  # type: ignore[index]
+                match.group(),
+                Context.from_offsets(
+                    line_index, match.start() + offset, match.end() + offset
+                ),
+            )
+            for match in TOKEN_PATTERN.finditer(line, scan_start, scan_end)
+        ]
+
+        # Move past the scanned characters.
+        self.text_buffer.skip(scan_end - scan_start)
 
-        return [self._create_token_and_skip(TokenType.TEXT, match.group())]
+        return tokens
 
     def _process_functions(self) -> list[Callable[[], list[Token] | None]]:
         return [
-            self._process_whitespace,
-            self._process_literal,
-            self._process_text,
+            self._process_line,
         ]
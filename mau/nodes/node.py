@@ -85,9 +85,18 @@ class Node:
         # calls one of the visitor's methods according
         # to the node content type.
 
-        # Some node types contain a dot to allow templates
-        # to be created in a hierarchy of directories
-        # but dots are not allowed in function names
+        # The visitor finds the function that visits
+        # this type of node, or a default one.
+        visit_function = getattr(visitor, "visit_function", None)
+
+        if visit_function is not None:
+            return visit_function(self.type)(visitor, self, *args, **kwargs)
+
+        # Visitors that are not subclasses of
+        # BaseVisitor just need to provide the
+        # visit methods. Some node types contain
+        # a dash, which is not allowed in
+        # function names.
         method_name = f"_visit_{self.type.replace('-', '_')}"
 
         # Try to call the computed method. If not
@@ -8,11 +8,17 @@ from mau.message import BaseMessageHandler
 from mau.nodes.node import NodeInfo, ValueNode
 from mau.nodes.node_arguments import NodeArguments, set_names
 from mau.parsers.base_parser import BaseParser, create_parser_exception
+from mau.parsers.managers.tokens_manager import stop_set
 from mau.parsers.preprocess_variables_parser import PreprocessVariablesParser
 from mau.token import Token, TokenType
 
 INTERNAL_TAG_PREFIX = "mau:"
 
+# Quoted values stop at the closing quotes,
+# other values at the comma (or EOF).
+QUOTED_VALUE_STOP = stop_set(Token.generate(TokenType.LITERAL, '"'))
+VALUE_STOP = stop_set(Token.generate(TokenType.LITERAL, ","))
+
 
 class ArgumentsParser(BaseParser):
     lexer_class = ArgumentsLexer
@@ -77,13 +83,13 @@ class ArgumentsParser(BaseParser):
             self.tm.get_token(TokenType.LITERAL, '"')
 
             # Get everything before the next double quotes.
-            token = self.tm.collect_join([Token.generate(TokenType.LITERAL, '"')])
+            token = self.tm.collect_join(QUOTED_VALUE_STOP)
 
             # Read and discard the closing quotes
             self.tm.get_token(TokenType.LITERAL, '"')
         else:
             # Get everything before the comma or EOF.
-            token = self.tm.collect_join([Token.generate(TokenType.LITERAL, ",")])
+            token = self.tm.collect_join(VALUE_STOP)
 
         # The comma is not there after the last argument,
         # so this is in a context manager as it might fail.
@@ -128,13 +134,13 @@ class ArgumentsParser(BaseParser):
             self.tm.get_token(TokenType.LITERAL, '"')
 
             # Get everything before the next double quotes.
-            token = self.tm.collect_join([Token.generate(TokenType.LITERAL, '"')])
+            token = self.tm.collect_join(QUOTED_VALUE_STOP)
 
             # Read and discard the closing quotes
             self.tm.get_token(TokenType.LITERAL, '"')
         else:
             # Get everything before the comma or EOF.
-            token = self.tm.collect_join([Token.generate(TokenType.LITERAL, ",")])
+            token = self.tm.collect_join(VALUE_STOP)
 
         # The comma is not there after the last argument,
         # so this is in a context manager as it might fail.
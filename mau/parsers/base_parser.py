@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+
 from mau.environment.environment import Environment
 from mau.lexers.base_lexer import BaseLexer
 from mau.message import BaseMessageHandler, MauException, MauParserErrorMessage
@@ -24,7 +26,7 @@ class BaseParser:
 
     def __init__(
         self,
-        tokens: list[Token],
+        tokens: Iterable[Token],
         message_handler: BaseMessageHandler,
         environment: Environment | None = None,
         parent_node=None,
@@ -57,11 +59,51 @@ class BaseParser:
         # The parse functions available in this parser
         return []
 
+    def _dispatch_table(self, process_functions) -> dict[TokenType, list]:
+        # A dictionary that maps the type of the
+        # next token to the processing functions
+        # that can parse it, in the same order
+        # they have in process_functions.
+        # An empty dictionary means that all
+        # functions are tried for each token.
+        return {}
+
+    def _run_process_functions(self, process_functions, result=False):
+        # Here we run the given parsing functions
+        # until one returns a sensible result.
+        # The function returns the result of the
+        # last function that didn't fail, or the
+        # given initial one.
+        for process_function in process_functions:
+            # The context manager wraps the function so that
+            # any exception leaves the parsed tokens as they
+            # were at the beginning of the function execution.
+            #
+            # If the parse function is successful it returns
+            # True. If the function raises an exception the
+            # variable result is not set and keeps its value.
+            # Any other result returned by the function
+            # is ignored.
+            with self.tm:
+                result = process_function()
+
+            if result is True:
+                # True means the function was successful
+                # and we can stop the loop.
+                return True
+
+        return result
+
     def parse(self):
         """
         Run the parser on the lexed tokens.
         """
 
+        # The processing functions and the dispatch
+        # table are built only once.
+        process_functions = self._process_functions()
+        dispatch_table = self._dispatch_table(process_functions)
+
         # Loop on all lexed tokens until we reach EOF.
 
         while not self.tm.peek_token_is(TokenType.EOF):
@@ -82,26 +124,17 @@ class BaseParser:
             else:
                 self.last_processed_token = next_token
 
-            # Here we run all parsing functions provided by
-            # the parser until one returns a sensible result.
-            result = False
-            for process_function in self._process_functions():
-                # The context manager wraps the function so that
-                # any exception leaves the parsed tokens as they
-                # were at the beginning of the function execution.
-                #
-                # If the parse function is successful it returns
-                # True. If the function raises an exception the
-                # variable result is not set and the value is False.
-                # Any other result returned by the function
-                # is ignored.
-                with self.tm:
-                    result = process_function()
-
-                if result is True:
-                    # True means the function was successful
-                    # and we can stop the loop.
-                    break
+            # Run first the functions that can
+            # parse the type of the next token.
+            candidates = dispatch_table.get(next_token.type, process_functions)
+            result = self._run_process_functions(candidates)
+
+            # If none of them succeeded, try all the
+            # others as the full list would do.
+            if result is False and candidates is not process_functions:
+                result = self._run_process_functions(
+                    [i for i in process_functions if i not in candidates], result
+                )
 
             # If we get here and result is still False
             # we didn't find any function to parse the
@@ -124,6 +157,8 @@ class BaseParser:
         start_line: int = 0,
         start_column: int = 0,
         source_filename: str | None = None,
+        start_offset: int = 0,
+        end_offset: int | None = None,
         **kwds,
     ):  # pragma: no cover
         # This classmethod lexes and parses the
@@ -131,6 +166,8 @@ class BaseParser:
         # parser and the associated classes (
         # class attributes) as text buffer and
         # lexer.
+        # The offsets allow to lex and parse
+        # only a part of the text in place.
 
         # Initialise the text buffer.
         text_buffer = cls.text_buffer_class(
@@ -138,6 +175,8 @@ class BaseParser:
             start_line,
             start_column,
             source_filename,
+            start_offset,
+            end_offset,
         )
 
         # Initialise the lexer.
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from functools import partial
+from itertools import pairwise
 
 from mau.environment.environment import Environment
 from mau.lexers.document_lexer import DocumentLexer
-from mau.message import BaseMessageHandler
+from mau.message import BaseMessageHandler, MauException
 from mau.nodes.document import DocumentNode
 from mau.nodes.include import TocNode
 from mau.nodes.node import Node, NodeInfo
@@ -30,8 +32,15 @@ from mau.parsers.document_processors.variable_definition import (
 from mau.parsers.managers.blockgroup_manager import BlockGroupManager
 from mau.parsers.managers.footnotes_manager import FootnotesManager
 from mau.parsers.managers.header_links_manager import HeaderLinksManager
+from mau.parsers.managers.inline_cache_manager import (
+    DEFAULT_INLINE_CACHE_SIZE,
+    InlineCacheManager,
+)
 from mau.parsers.managers.toc_manager import TocManager
-from mau.parsers.preprocess_variables_parser import PreprocessVariablesParser
+from mau.parsers.preprocess_variables_parser import (
+    PreprocessVariablesParser,
+    replace_variables,
+)
 from mau.parsers.text_parser import TextParser
 from mau.text_buffer import Context
 from mau.token import Token, TokenType
@@ -51,6 +60,24 @@ DEFAULT_ARGUMENT_ALIASES = {
 }
 
 
+# The type of the first token that each
+# processor accepts. This is used to run
+# only the processors that can parse
+# the next token.
+PROCESSOR_TOKEN_TYPES = {
+    horizontal_rule_processor: TokenType.HORIZONTAL_RULE,
+    variable_definition_processor: TokenType.VARIABLE,
+    label_processor: TokenType.LABEL,
+    control_processor: TokenType.CONTROL,
+    arguments_processor: TokenType.ARGUMENTS,
+    header_processor: TokenType.HEADER,
+    block_processor: TokenType.BLOCK,
+    include_processor: TokenType.INCLUDE,
+    list_processor: TokenType.LIST,
+    paragraph_processor: TokenType.TEXT,
+}
+
+
 @dataclass
 class DocumentParserOutput:
     document: Node | None = None
@@ -69,11 +96,12 @@ class DocumentParser(BaseParser):
 
     def __init__(
         self,
-        tokens: list[Token],
+        tokens: Iterable[Token],
         message_handler: BaseMessageHandler,
         environment: Environment | None = None,
         parent_node=None,
         forbidden_includes: list[str] | None = None,
+        inline_cache: InlineCacheManager | None = None,
     ):
         super().__init__(tokens, message_handler, environment, parent_node)
 
@@ -105,6 +133,15 @@ class DocumentParser(BaseParser):
         self.footnotes_manager = FootnotesManager(self.footnote_unique_id_function)
         self.toc_manager: TocManager = TocManager(self.header_internal_id_function)
 
+        # The cache of parsed pieces of text.
+        # Parsers of nested content share
+        # the cache of the main parser.
+        self.inline_cache: InlineCacheManager = inline_cache or InlineCacheManager(
+            self.environment.get(
+                "mau.parser.inline_cache_size", DEFAULT_INLINE_CACHE_SIZE
+            )
+        )
+
         self.arguments_buffer: ArgumentsBuffer = ArgumentsBuffer()
         self.label_buffer: LabelBuffer = LabelBuffer()
         self.control_buffer: ControlBuffer = ControlBuffer()
@@ -149,47 +186,63 @@ class DocumentParser(BaseParser):
             partial(paragraph_processor, self),
         ]
 
-    def _parse_text(self, text: str, context: Context, parent: Node) -> list[Node]:
-        # This parses a piece of text.
-        # It runs the text through the preprocessor to
-        # replace variables, then parses it storing
-        # footnotes and internal links, and finally
-        # returns the nodes.
+    def _dispatch_table(self, process_functions) -> dict[TokenType, list]:
+        # Group the processing functions according
+        # to the type of the first token they accept.
+        dispatch_table: dict[TokenType, list] = {}
+        token_type: TokenType | None
+
+        for process_function in process_functions:
+            if process_function == self._process_eol:
+                token_type = TokenType.EOL
+            elif isinstance(process_function, partial):
+                token_type = PROCESSOR_TOKEN_TYPES.get(process_function.func)
+            else:
+                token_type = None
+
+            # If the function is unknown we cannot
+            # predict which tokens it accepts, so
+            # all functions are tried for each token.
+            if token_type is None:
+                return {}
+
+            dispatch_table.setdefault(token_type, []).append(process_function)
+
+        return dispatch_table
+
+    def _preprocess_text(self, text: str, context: Context) -> str | None:
+        # This runs a piece of text through the
+        # preprocessor to replace variables.
+        # Returns None if the preprocessor
+        # doesn't return any node.
+
+        # Most pieces of text can be processed
+        # with a single scan, and only the
+        # remaining ones need the preprocessor.
+        processed_text = replace_variables(text, self.environment)
+
+        if processed_text is not None:
+            return processed_text
 
         # Unpack the token initial position.
         start_line, start_column = context.start_position
 
-        # Get the token source.
-        source_filename = context.source
-
-        # Replace variables
         preprocess_parser = PreprocessVariablesParser.lex_and_parse(
             text,
             self.message_handler,
             self.environment,
             start_line=start_line,
             start_column=start_column,
-            source_filename=source_filename,
+            source_filename=context.source,
         )
 
-        # If the preprocessor doesn't return any
-        # node we can stop here.
         if not preprocess_parser.nodes:  # pragma: no cover
-            return []
+            return None
 
         # The preprocess parser outputs a single node.
-        text = preprocess_parser.get_processed_text().value
-
-        # Parse the text
-        text_parser = TextParser.lex_and_parse(
-            text,
-            self.message_handler,
-            self.environment,
-            start_line=start_line,
-            start_column=start_column,
-            source_filename=source_filename,
-        )
+        return preprocess_parser.get_processed_text().value
 
+    def _store_text_parser_results(self, text_parser: TextParser):
         # Extract the footnote mentions
         # found in this piece of text.
         self.footnotes_manager.add_footnote_macros(text_parser.footnote_macros)
@@ -197,11 +250,149 @@ class DocumentParser(BaseParser):
         # Extract the header links found in this piece of text.
         self.header_links_manager.add_macros(text_parser.header_links)
 
+    def _parse_text(self, text: str, context: Context, parent: Node) -> list[Node]:
+        # This parses a piece of text.
+        # It runs the text through the preprocessor to
+        # replace variables, then parses it storing
+        # footnotes and internal links, and finally
+        # returns the nodes.
+
+        # Unpack the token initial position.
+        start_line, start_column = context.start_position
+
+        # Replace variables.
+        processed_text = self._preprocess_text(text, context)
+
+        # If the preprocessor doesn't return any
+        # node we can stop here.
+        if processed_text is None:  # pragma: no cover
+            return []
+
+        # Text repeated in the document
+        # might have been parsed already.
+        nodes = self.inline_cache.get(processed_text, context)
+
+        if nodes is None:
+            # Parse the text
+            text_parser = TextParser.lex_and_parse(
+                processed_text,
+                self.message_handler,
+                self.environment,
+                start_line=start_line,
+                start_column=start_column,
+                source_filename=context.source,
+            )
+
+            self._store_text_parser_results(text_parser)
+
+            nodes = text_parser.nodes
+
+            self.inline_cache.add(processed_text, context, nodes)
+
         # Assign the given parent to each node.
-        for i in text_parser.nodes:
+        for i in nodes:
             i.parent = parent
 
-        return text_parser.nodes
+        return nodes
+
+    def _parse_lines(self, lines: list[Token], parent: Node) -> list[list[Node]]:
+        # This parses multiple lines of text, like
+        # the ones of a paragraph, and returns the
+        # nodes of each line. The result is the same
+        # that _parse_text gives for each line, but
+        # lines are parsed by a single TextParser.
+        first_context = lines[0].context
+
+        # Lines can be parsed together only if they come
+        # one after the other in the same source.
+        # Any line skipped in between (e.g. a comment)
+        # is fine, but all lines but the first have
+        # to start at the beginning.
+        can_parse_together = all(
+            line.context.source == first_context.source
+            and line.context.start_column == 0
+            and line.context.start_line > previous.context.start_line
+            for previous, line in pairwise(lines)
+        )
+
+        processed_lines: list[tuple[int, str]] = []
+
+        if can_parse_together:
+            try:
+                for line in lines:
+                    processed_text = self._preprocess_text(line.value, line.context)
+
+                    # Text containing multiple lines
+                    # cannot be parsed together.
+                    if processed_text is None or "\n" in processed_text:
+                        break
+
+                    processed_lines.append((line.context.start_line, processed_text))
+            except MauException:
+                # Let _parse_text raise the error
+                # in the right order.
+                pass
+
+        if len(processed_lines) < len(lines):
+            return [
+                self._parse_text(line.value, context=line.context, parent=parent)
+                for line in lines
+            ]
+
+        # Lines repeated in the document
+        # might have been parsed already.
+        lines_nodes: list[list[Node] | None] = [
+            self.inline_cache.get(processed_text, line.context)
+            for line, (_, processed_text) in zip(lines, processed_lines)
+        ]
+
+        missing_lines = [
+            processed_line
+            for processed_line, line_nodes in zip(processed_lines, lines_nodes)
+            if line_nodes is None
+        ]
+
+        if missing_lines:
+            # The initial column applies only
+            # to the first line of the paragraph.
+            start_column = (
+                first_context.start_column
+                if missing_lines[0] is processed_lines[0]
+                else 0
+            )
+
+            text_parser = TextParser.lex_and_parse_lines(
+                missing_lines,
+                self.message_handler,
+                self.environment,
+                start_column=start_column,
+                source_filename=first_context.source,
+            )
+
+            self._store_text_parser_results(text_parser)
+
+            parsed_lines = iter(text_parser.lines)
+
+            for index, line in enumerate(lines):
+                if lines_nodes[index] is None:
+                    parsed_nodes = next(parsed_lines)
+                    lines_nodes[index] = parsed_nodes
+
+                    self.inline_cache.add(
+                        processed_lines[index][1], line.context, parsed_nodes
+                    )
+
+        # All lines have been parsed at this point.
+        parsed_lines_nodes = [
+            line_nodes for line_nodes in lines_nodes if line_nodes is not None
+        ]
+
+        # Assign the given parent to each node.
+        for line_nodes in parsed_lines_nodes:
+            for i in line_nodes:
+                i.parent = parent
+
+        return parsed_lines_nodes
 
     def pop_labels(self, node: Node):
         # Extract labels from the buffer and
@@ -9,7 +9,7 @@ if TYPE_CHECKING:
 from mau.nodes.block import BlockNode
 from mau.nodes.node import Node
 from mau.nodes.node_arguments import NodeArguments
-from mau.token import Token
+from mau.token import TextViewToken, Token
 
 
 def parse_block_content(
@@ -27,13 +27,28 @@ def parse_block_content(
     # Get the token source.
     source_filename = content.context.source
 
+    # If the content is a view on the text
+    # of the document it is parsed in place,
+    # otherwise the value of the token is used.
+    if isinstance(content, TextViewToken):
+        text = content.text
+        start_offset = content.start_offset
+        end_offset: int | None = content.end_offset
+    else:
+        text = content.value
+        start_offset = 0
+        end_offset = None
+
     content_parser = parser.lex_and_parse(
-        text=content.value,
+        text=text,
         message_handler=parser.message_handler,
         environment=environment,
         start_line=start_line,
         start_column=start_column,
         source_filename=source_filename,
+        start_offset=start_offset,
+        end_offset=end_offset,
+        inline_cache=parser.inline_cache,
     )
 
     if update:
@@ -252,6 +252,7 @@ def _parse_mau(
         start_column=0,
         source_filename=source_filename,
         forbidden_includes=parser.forbidden_includes,
+        inline_cache=parser.inline_cache,
     )
 
     # Add the include call to the parser output.
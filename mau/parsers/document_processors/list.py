@@ -13,6 +13,12 @@ from mau.parsers.base_parser import create_parser_exception
 from mau.text_buffer import Context
 from mau.token import Token, TokenType
 
+# The tokens that end a list.
+LIST_END_TOKENS = [
+    Token.generate(TokenType.EOF),
+    Token.generate(TokenType.EOL),
+]
+
 
 def _process_list_nodes(parser: DocumentParser, parent: Node):
     # This parses all items of a list
@@ -39,10 +45,7 @@ def _process_list_nodes(parser: DocumentParser, parent: Node):
         )
     )
 
-    while parser.tm.peek_token() not in [
-        Token.generate(TokenType.EOF),
-        Token.generate(TokenType.EOL),
-    ]:
+    while parser.tm.peek_token() not in LIST_END_TOKENS:
         if not parser.tm.peek_token_is(TokenType.LIST):
             # Something fishy happened in the source text.
             # The next token is not the EOL or EOF,
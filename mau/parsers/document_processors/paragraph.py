@@ -28,18 +28,17 @@ def paragraph_processor(parser: DocumentParser):
 
     node = ParagraphNode()
 
-    for line_token in line_tokens:
+    # Process the text of the paragraph.
+    # All lines are parsed together.
+    lines_nodes = parser._parse_lines(line_tokens, parent=node)
+
+    for line_token, text_nodes in zip(line_tokens, lines_nodes):
         # Create the paragraph line node.
         line_node = ParagraphLineNode(
             parent=node,
             info=NodeInfo(context=line_token.context),
         )
 
-        # Process the text of the paragraph.
-        text_nodes = parser._parse_text(
-            line_token.value, context=line_token.context, parent=node
-        )
-
         # Add the text nodes to the
         # paragraph line.
         line_node.content = text_nodes
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from mau.nodes.node import Node, NodeContentMixin, NodeInfo
+from mau.text_buffer import Context
+
+# The default number of pieces of text
+# the cache keeps.
+DEFAULT_INLINE_CACHE_SIZE = 1024
+
+
+def _move_nodes(nodes: Sequence[Node], lines: int, source: str | None):
+    # Move the context of the given nodes
+    # and of their children by the given
+    # number of lines.
+    for node in nodes:
+        context = node.info.context
+
+        node.info = NodeInfo(
+            context=Context(
+                context.start_line + lines,
+                context.start_column,
+                context.end_line + lines,
+                context.end_column,
+                source,
+            )
+        )
+
+        if isinstance(node, NodeContentMixin):
+            _move_nodes(node.content, lines, source)
+
+
+class InlineCacheManager:
+    """
+    This manager keeps the nodes created by the
+    TextParser for a piece of text, so that text
+    repeated in a document is parsed only once.
+
+    The key is the text after variables have been
+    replaced, so it already depends on their values,
+    together with the initial column. Texts that
+    contain macros are not cached, as macros can
+    depend on the environment and register footnotes
+    and links in the parser.
+
+    The cache keeps at most `size` texts, discarding
+    the least recently used ones. A size of 0
+    disables the cache.
+    """
+
+    def __init__(self, size: int = DEFAULT_INLINE_CACHE_SIZE):
+        self.size = size
+
+        # The number of successful and
+        # failed searches in the cache.
+        self.hits = 0
+        self.misses = 0
+
+        # The cached nodes and the initial line
+        # of the text they have been parsed from.
+        self._cache: OrderedDict[tuple[str, int], tuple[int, list[Node]]] = (
+            OrderedDict()
+        )
+
+    def cacheable(self, text: str) -> bool:
+        """Check if the nodes of the text can be cached."""
+        return self.size > 0 and "[" not in text
+
+    def get(self, text: str, context: Context) -> list[Node] | None:
+        """
+        Return a copy of the nodes cached for the given
+        text, moved to the position of the context.
+        Returns None if the text is not in the cache.
+        """
+
+        if not self.cacheable(text):
+            return None
+
+        start_line, start_column = context.start_position
+
+        cached = self._cache.get((text, start_column))
+
+        if cached is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._cache.move_to_end((text, start_column))
+
+        cached_line, cached_nodes = cached
+
+        nodes = [node.deepcopy() for node in cached_nodes]
+        _move_nodes(nodes, start_line - cached_line, context.source)
+
+        return nodes
+
+    def add(self, text: str, context: Context, nodes: list[Node]):
+        """
+        Store the nodes of the given text. Nodes are
+        never changed after parsing, so they are
+        stored and copied only when they are used.
+        """
+
+        if not self.cacheable(text):
+            return
+
+        start_line, start_column = context.start_position
+
+        self._cache[(text, start_column)] = (start_line, nodes)
+        self._cache.move_to_end((text, start_column))
+
+        if len(self._cache) > self.size:
+            self._cache.popitem(last=False)
@@ -1,11 +1,40 @@
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Sequence
+from itertools import islice
 
 from mau.text_buffer import Context
-from mau.token import Token, TokenType
+from mau.token import Token, TokenArray, TokenType
 
 logger = logging.getLogger(__name__)
 
+# The number of tokens loaded at once
+# when the manager consumes an iterator.
+TOKENS_CHUNK_SIZE = 256
+
+# Tokens are compared by type and value,
+# so this tuple identifies them in sets.
+TokenKey = tuple[TokenType, str]
+
+ESCAPE_KEY: TokenKey = (TokenType.LITERAL, "\\")
+EOF_KEY: TokenKey = (TokenType.EOF, "")
+
+
+class StopSet(frozenset):
+    """
+    A set of keys of the tokens that stop
+    a collection. See TokensManager.collect.
+    """
+
+
+def stop_set(*tokens: Token) -> StopSet:
+    """
+    Build the set of stop tokens used by
+    TokensManager.collect. The set always
+    contains EOF. As the set is immutable,
+    it can be built once and reused.
+    """
+    return StopSet([(token.type, token.value) for token in tokens] + [EOF_KEY])
+
 
 class TokenError(ValueError):
     """
@@ -24,23 +53,108 @@ class TokenError(ValueError):
 class TokensManager:
     """This manager collects tokens and provides
     several methods to interact with them.
+
+    The tokens can be given as a list (or a
+    TokenArray) or as any other iterable (e.g.
+    the generator returned by BaseLexer.tokenize).
+    In the second case
+    the manager loads tokens only when they are
+    needed, and discards those that the parser
+    cannot reach any more, that is the ones
+    before the current token and before any
+    state saved in the stack. The attribute
+    `tokens` then contains only that window.
     """
 
     def __init__(
         self,
-        tokens: list[Token],
+        tokens: Iterable[Token],
     ):
         # This is the index of the current token.
         self.index: int = -1
 
+        # The iterator the tokens come from, if
+        # they are not given as a list. This is
+        # None when all tokens have been loaded.
+        self._source: Iterable[Token] | None = None
+
+        # The list that stores the tokens
+        # loaded from the iterator.
+        self._loaded_tokens: list[Token] = []
+
+        if not isinstance(tokens, Sequence):
+            self._source = iter(tokens)
+            tokens = self._loaded_tokens
+
         # These are the tokens parsed by the parser.
-        self.tokens: list[Token] = tokens
+        self.tokens: Sequence[Token] = tokens
+
+        # A TokenArray can check tokens
+        # without creating them.
+        self._token_array: TokenArray | None = None
+
+        if isinstance(tokens, TokenArray):
+            self._token_array = tokens
+
+        # The index of the first token in
+        # the list. This is always 0 unless
+        # tokens come from an iterator.
+        self._offset: int = 0
 
         # A stack for the parser's state.
         # Currently the state is represented only
         # by the current index in the input tokens.
         self._stack: list[int] = []
 
+    def _load(self) -> bool:
+        # Load the next chunk of tokens from the
+        # source. Returns False if the source
+        # has been exhausted.
+        if self._source is None:
+            return False
+
+        chunk = list(islice(self._source, TOKENS_CHUNK_SIZE))
+
+        if not chunk:
+            self._source = None
+            return False
+
+        # Discard the tokens that cannot be reached
+        # any more. The current token is kept.
+        # This is done only when enough tokens
+        # can be removed, as it requires to
+        # shift the whole list.
+        first_needed = min(self._stack, default=self.index)
+        discard = min(first_needed, self.index) - self._offset
+
+        if discard >= TOKENS_CHUNK_SIZE:
+            del self._loaded_tokens[:discard]
+            self._offset += discard
+
+        self._loaded_tokens.extend(chunk)
+
+        return True
+
+    def _get_token_at(self, index: int) -> Token:
+        # Return the token at the given index,
+        # loading tokens from the source if needed.
+        # If the index is beyond the last token
+        # return the last one.
+        while index - self._offset >= len(self.tokens) and self._load():
+            pass
+
+        try:
+            return self.tokens[index - self._offset]
+        except IndexError:
+            return self.tokens[-1]
+
+    def _next_token(self) -> Token:
+        # Return the next token without any check.
+        try:
+            return self.tokens[self.index + 1 - self._offset]
+        except IndexError:
+            return self._get_token_at(self.index + 1)
+
     @property
     def current_token(self) -> Token:
         """
@@ -51,6 +165,12 @@ class TokensManager:
         possible index error.
         """
 
+        if self.index < 0 or not self.tokens:
+            # The last token is known only when
+            # all tokens have been loaded.
+            while self._load():
+                pass
+
         if not self.tokens:
             raise TokenError
 
@@ -58,14 +178,22 @@ class TokensManager:
             return self.tokens[-1]
 
         try:
-            return self.tokens[self.index]
+            return self.tokens[self.index - self._offset]
         except IndexError:
             return self.tokens[-1]
 
     def _advance(self):
-        if self.index < len(self.tokens):
+        if self.index < self._offset + len(self.tokens):
             self.index += 1
 
+    def _take(self) -> Token:
+        # Return the next token without
+        # any check and advance the index.
+        token = self._next_token()
+        self._advance()
+
+        return token
+
     def __enter__(self):
         # The parser can be used as a context manager.
         # When we enter a new context we just need to
@@ -156,10 +284,7 @@ class TokensManager:
         use the next one.
         """
 
-        try:
-            token = self.tokens[self.index + 1]
-        except IndexError:
-            token = self.tokens[-1]
+        token = self._next_token()
 
         return self._check_token(token, ttype, tvalue, value_check_function)
 
@@ -194,20 +319,106 @@ class TokensManager:
         instead of raising an exception.
         """
 
-        try:
-            self.peek_token(ttype, tvalue, value_check_function)
-            return True
-        except TokenError:
+        if self._token_array is not None:
+            return self._token_array_peek_is(
+                self._token_array, ttype, tvalue, value_check_function
+            )
+
+        return self.match(ttype, tvalue, value_check_function) is not None
+
+    def match(
+        self,
+        ttype: TokenType | None = None,
+        tvalue: str | None = None,
+        value_check_function: Callable[[str], bool] | None = None,
+    ) -> Token | None:
+        """
+        Return the next token without advancing the index.
+
+        This works like peek_token, but if the next token
+        doesn't match the given type or value the function
+        returns None instead of raising an exception.
+        Tokens with an empty value (like EOF) are false
+        in a boolean context, so the result has to be
+        compared with None.
+        """
+
+        token = self._next_token()
+
+        if ttype is not None and token.type is not ttype:
+            return None
+
+        if tvalue is not None and token.value != tvalue:
+            return None
+
+        if (
+            value_check_function is not None
+            and value_check_function(token.value) is False
+        ):
+            return None
+
+        return token
+
+    def try_get(
+        self,
+        ttype: TokenType | None = None,
+        tvalue: str | None = None,
+        value_check_function: Callable[[str], bool] | None = None,
+    ) -> Token | None:
+        """
+        Return the next token and advance the index.
+
+        This works like get_token, but if the next token
+        doesn't match the given type or value the function
+        returns None instead of raising an exception.
+        In that case the index is not advanced.
+        """
+
+        token = self.match(ttype, tvalue, value_check_function)
+
+        if token is not None:
+            self._advance()
+
+        return token
+
+    def _token_array_peek_is(
+        self,
+        tokens: TokenArray,
+        ttype: TokenType,
+        tvalue: str | None = None,
+        value_check_function: Callable[[str], bool] | None = None,
+    ) -> bool:
+        # This works like peek_token_is, but
+        # reads type and value directly from
+        # the TokenArray.
+
+        # Beyond the last token we
+        # check the last one.
+        index = min(self.index + 1, len(tokens) - 1)
+
+        if ttype is not None and tokens.type_at(index) is not ttype:
+            return False
+
+        if tvalue is not None and not tokens.value_is(index, tvalue):
             return False
 
+        return (
+            value_check_function is None
+            or value_check_function(tokens.value_at(index)) is not False
+        )
+
     def collect(
-        self, stop_tokens: list[Token], preserve_escaped_stop_tokens: bool = False
+        self,
+        stop_tokens: Iterable[Token] | StopSet,
+        preserve_escaped_stop_tokens: bool = False,
     ):
         """
         Collect all tokens until one of the stop_tokens pops up.
 
-        The stop token that terminates the collection is added to
-        the joined list.
+        The stop tokens can be given as a StopSet (see stop_set),
+        which is the preferred form as it can be built once.
+        Any other iterable of tokens is converted into a StopSet.
+        EOF is always a stop token.
 
         An escape token (a literal "\\") is processed according
         to the following rules:
@@ -216,36 +427,42 @@ class TokensManager:
         * In front of an escape token it is removed.
         * In front of an escape token with preserve_escaped_stop_tokens on it is kept.
         """
-        tokens = []
+        if not isinstance(stop_tokens, StopSet):
+            stop_tokens = stop_set(*stop_tokens)
 
-        # After all, at EOF the world ends.
-        stop_tokens.append(Token(TokenType.EOF, "", Context.empty()))
+        tokens = []
 
         # This keeps looking at the next token and
         # stops when it is one of the stop ones.
-        while self.peek_token() not in stop_tokens:
+        next_token = self._next_token()
+        while (next_token.type, next_token.value) not in stop_tokens:
             # Stop tokens might be escaped, but we
             # consider the escape only if
             # preserve_escaped_stop_tokens is True.
-            if self.peek_token() == Token(TokenType.LITERAL, "\\", Context.empty()):
+            if (next_token.type, next_token.value) == ESCAPE_KEY:
                 # Store the literal escape.
-                escape = self.get_token()
+                escape = self._take()
+                next_token = self._next_token()
 
                 # We keep the escaped token if it is not
                 # a stop one, or if the preserve flag is on.
-                if self.peek_token() not in stop_tokens or preserve_escaped_stop_tokens:
+                if (
+                    next_token.type,
+                    next_token.value,
+                ) not in stop_tokens or preserve_escaped_stop_tokens:
                     tokens.append(escape)
 
             # Append the next token.
             # This might be a normal token or the escaped
             # one if the logic above added the escape.
-            tokens.append(self.get_token())
+            tokens.append(self._take())
+            next_token = self._next_token()
 
         return tokens
 
     def collect_join(
         self,
-        stop_tokens: list[Token],
+        stop_tokens: Iterable[Token] | StopSet,
         join_with: str = "",
         preserve_escaped_stop_tokens: bool = False,
     ) -> Token:
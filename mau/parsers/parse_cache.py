@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+
+from mau.environment.environment import Environment
+from mau.nodes.include import IncludeRawNode
+from mau.parsers.document_parser import DocumentParserOutput
+from mau.parsers.serialization import (
+    FORMAT_VERSION,
+    SerializationError,
+    _collect_nodes,
+    deserialize_output,
+    serialize_output,
+)
+
+logger = logging.getLogger(__name__)
+
+# The version of the cache entries.
+# Entries with a different version
+# are ignored.
+CACHE_VERSION = 2
+
+# The size of the metadata at
+# the beginning of an entry.
+_METADATA_SIZE = struct.Struct("<I")
+
+
+def hash_file(path: str) -> str | None:
+    """
+    Return the hash of the content of a file,
+    or None if the file cannot be read.
+    """
+
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def included_files(output: DocumentParserOutput) -> list[str]:
+    """
+    Return the files read to create the output:
+    the included Mau files and the included
+    raw files, in order and without repetitions.
+    """
+
+    files = [include_call.callee_uri for include_call in output.include_calls]
+
+    # Raw files are not recorded in the
+    # include calls, so they are found
+    # among all the nodes of the output
+    # (e.g. in footnotes and groups).
+    files.extend(
+        node.uri
+        for node in _collect_nodes([output.document, output.toc])
+        if isinstance(node, IncludeRawNode)
+    )
+
+    return list(dict.fromkeys(files))
+
+
+class ParseCache:
+    """
+    An on-disk cache for the output of the
+    DocumentParser.
+
+    Each entry is found through a key made of
+    the name of the source file and a fingerprint
+    of the environment. The entry contains the hash
+    of the text and the hash of each included file,
+    which are checked before the entry is used,
+    the variables that the parser added to the
+    environment, and the serialised output.
+
+    As the text is not part of the key, a new
+    version of a file replaces the entry of the
+    previous one, and the cache doesn't grow
+    when the same files are parsed again.
+    """
+
+    def __init__(self, cache_dir: str, key: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # The key identifies the version of Mau,
+        # as different versions can create
+        # different documents.
+        self.key = key
+
+    def entry_key(self, source_filename: str, environment: Environment) -> str | None:
+        """
+        Return the key of the entry of the given file,
+        or None if the environment contains values
+        that cannot be described.
+        """
+
+        try:
+            fingerprint = json.dumps(
+                environment.asflatdict(), sort_keys=True, default=repr
+            )
+        except (TypeError, ValueError):
+            return None
+
+        key = json.dumps(
+            [
+                CACHE_VERSION,
+                FORMAT_VERSION,
+                self.key,
+                source_filename,
+                hashlib.sha256(fingerprint.encode()).hexdigest(),
+            ]
+        )
+
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _entry_path(self, entry_key: str) -> Path:
+        return self.cache_dir / f"parse-{entry_key}.bin"
+
+    def load(
+        self, entry_key: str, text: str, environment: Environment
+    ) -> DocumentParserOutput | None:
+        """
+        Return the output of the given text stored
+        with the key, or None if there is no valid
+        entry. The variables that the parser added
+        to the environment are added to the given one.
+        """
+
+        try:
+            data = self._entry_path(entry_key).read_bytes()
+        except OSError:
+            return None
+
+        try:
+            (metadata_size,) = _METADATA_SIZE.unpack_from(data)
+            metadata_end = _METADATA_SIZE.size + metadata_size
+            metadata = json.loads(data[_METADATA_SIZE.size : metadata_end])
+        except (struct.error, ValueError):
+            return None
+
+        if not isinstance(metadata, dict) or metadata.get("version") != CACHE_VERSION:
+            return None
+
+        # The entry has been created
+        # from a different text.
+        if metadata.get("text") != self._text_hash(text):
+            return None
+
+        files = metadata.get("files")
+        variables = metadata.get("variables")
+
+        if not isinstance(files, dict) or not isinstance(variables, dict):
+            return None
+
+        # The entry is valid only if none
+        # of the included files changed.
+        for path, digest in files.items():
+            if hash_file(path) != digest:
+                return None
+
+        try:
+            output = deserialize_output(data[metadata_end:])
+        except SerializationError as exception:
+            logger.warning(f"Cannot load the parse cache: {exception}")
+            return None
+
+        environment.dupdate(variables)
+
+        return output
+
+    def store(
+        self,
+        entry_key: str,
+        text: str,
+        output: DocumentParserOutput,
+        initial_variables: dict,
+        environment: Environment,
+    ):
+        """
+        Store the output of the given text with the
+        key, replacing any previous entry. The initial
+        variables are the flat variables of the
+        environment before the parser was run.
+        """
+
+        # The variables that the parser
+        # added or changed.
+        variables = {
+            key: value
+            for key, value in environment.asflatdict().items()
+            if key not in initial_variables or initial_variables[key] != value
+        }
+
+        try:
+            metadata = json.dumps(
+                {
+                    "version": CACHE_VERSION,
+                    "text": self._text_hash(text),
+                    "files": {path: hash_file(path) for path in included_files(output)},
+                    "variables": variables,
+                }
+            ).encode()
+            data = serialize_output(output)
+        except (TypeError, ValueError) as exception:
+            # SerializationError is a ValueError.
+            logger.warning(f"Cannot store the parse cache: {exception}")
+            return
+
+        # Write the entry in a temporary
+        # file and move it, so that other
+        # processes never read a partial file.
+        entry_path = self._entry_path(entry_key)
+        temp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            temp_path.write_bytes(_METADATA_SIZE.pack(len(metadata)) + metadata + data)
+            os.replace(temp_path, entry_path)
+        except OSError as exception:  # pragma: no cover
+            logger.warning(f"Cannot write the parse cache: {exception}")
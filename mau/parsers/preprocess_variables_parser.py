@@ -1,10 +1,93 @@
+import re
+
+from mau.environment.environment import Environment
 from mau.lexers.preprocess_variables_lexer import PreprocessVariablesLexer
 from mau.nodes.inline import TextNode
 from mau.nodes.node import NodeInfo
 from mau.parsers.base_parser import BaseParser, create_parser_exception
+from mau.parsers.managers.tokens_manager import stop_set
 from mau.text_buffer import Context
 from mau.token import Token, TokenType
 
+# Verbatim text stops at the closing backtick,
+# variable names at the closing curly brace.
+VERBATIM_STOP = stop_set(Token.generate(TokenType.LITERAL, "`"))
+VARIABLE_NAME_STOP = stop_set(Token.generate(TokenType.LITERAL, "}"))
+
+# This regular expression recognises in a single
+# pass the constructs handled by the parser.
+#
+# * An escape and the escaped character.
+# * Verbatim text between backticks, where
+#   escapes are kept as they are.
+# * A variable name between curly braces.
+# * Text without special characters.
+#   A closing curly brace is plain text.
+# * Any other special character. The scan
+#   cannot process it (see replace_variables).
+SUBSTITUTION_PATTERN = re.compile(
+    r"\\(?P<escaped>.)"
+    r"|(?P<verbatim>`(?:\\.|[^\\`])*`)"
+    r"|\{(?P<variable>[^\\{}]+)\}"
+    r"|(?P<text>[^\\`{]+)"
+    r"|(?P<other>.)"
+)
+
+
+def replace_variables(text: str, environment: Environment) -> str | None:
+    """
+    Replace variables in a single line of text
+    without running the PreprocessVariablesParser.
+
+    The result is the same text the parser would
+    output. If the text contains something the
+    scan doesn't handle, like an undefined variable
+    or an unclosed verbatim, the function returns
+    None and the parser has to be used instead.
+    """
+
+    # Empty lines and multiple lines are
+    # left to the parser.
+    line = text.rstrip(" ")
+
+    if not line or "\n" in line:
+        return None
+
+    # The lexer includes trailing spaces in text
+    # tokens, and skips them only after a special
+    # character.
+    if line[-1] not in "\\`{}":
+        line = text
+
+    # Most pieces of text do not contain any
+    # variable or escape, so they are not changed.
+    if "{" not in line and "\\" not in line:
+        return line
+
+    chunks = []
+
+    for match in SUBSTITUTION_PATTERN.finditer(line):
+        group = match.lastgroup
+
+        if group == "escaped":
+            # Escaped curly braces lose the escape.
+            char = match.group("escaped")
+            chunks.append(char if char in "{}" else f"\\{char}")
+
+        elif group == "variable":
+            try:
+                chunks.append(str(environment[match.group("variable")]))
+            except KeyError:
+                return None
+
+        elif group == "other":
+            return None
+
+        else:
+            chunks.append(match.group())
+
+    return "".join(chunks)
+
 
 # The PreprocessVariablesParser processes tokens,
 # scans for variables in the form `{name}`,
@@ -57,7 +140,7 @@ class PreprocessVariablesParser(BaseParser):
 
         # Get everything before the closing backtick.
         text = self.tm.collect_join(
-            [Token.generate(TokenType.LITERAL, "`")],
+            VERBATIM_STOP,
             preserve_escaped_stop_tokens=True,
         )
 
@@ -90,9 +173,7 @@ class PreprocessVariablesParser(BaseParser):
         opening_bracket = self.tm.get_token(TokenType.LITERAL, "{")
 
         # Get everything before the closing brace.
-        variable_name = self.tm.collect_join(
-            stop_tokens=[Token.generate(TokenType.LITERAL, "}")]
-        )
+        variable_name = self.tm.collect_join(stop_tokens=VARIABLE_NAME_STOP)
 
         # Check if the token is the closing curly brace.
         closing_bracket = self.tm.get_token(TokenType.LITERAL, "}")
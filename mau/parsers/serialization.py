@@ -0,0 +1,476 @@
+from __future__ import annotations
+
+import struct
+
+from mau.nodes.node import Node, NodeInfo
+from mau.nodes.node_arguments import NodeArguments
+from mau.parsers.document_parser import DocumentParserOutput
+from mau.parsers.document_processors.include import IncludeCall
+from mau.text_buffer import Context
+
+# The first bytes of serialised data.
+MAGIC = b"MAU\x00"
+
+# The version of the format. Data
+# with a different version is rejected.
+FORMAT_VERSION = 1
+
+# The attributes of a node that are
+# stored in a specific way.
+NODE_ATTRIBUTES = {"parent", "arguments", "info"}
+
+# The tags of the values.
+TAG_NONE = 0
+TAG_TRUE = 1
+TAG_FALSE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STR = 5
+TAG_LIST = 6
+TAG_TUPLE = 7
+TAG_DICT = 8
+TAG_NODE = 9
+
+_FLOAT = struct.Struct("<d")
+
+
+class SerializationError(ValueError):
+    """
+    This is an exception that signals that
+    a parser output cannot be serialised,
+    or that the data cannot be loaded.
+    """
+
+
+def _node_classes() -> dict[str, type[Node]]:
+    # Return all the classes of nodes that have
+    # been defined, keyed by their full name.
+    # Classes are never imported while data is
+    # loaded, so plugins have to be loaded first.
+    classes: dict[str, type[Node]] = {}
+
+    stack: list[type[Node]] = [Node]
+    while stack:
+        cls = stack.pop()
+        classes[f"{cls.__module__}.{cls.__qualname__}"] = cls
+        stack.extend(cls.__subclasses__())
+
+    return classes
+
+
+class _Writer:
+    # Write values in a buffer. Strings are stored
+    # once in a table and referenced by index,
+    # nodes are referenced by their index in
+    # the list of nodes.
+
+    def __init__(self, node_indices: dict[int, int]):
+        self.buffer = bytearray()
+        self.strings: dict[str, int] = {}
+        self.node_indices = node_indices
+
+    def write_uint(self, value: int):
+        # Unsigned integers are stored
+        # in 7-bit groups (varint).
+        buffer = self.buffer
+
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+
+        buffer.append(value)
+
+    def write_int(self, value: int):
+        # Signed integers are mapped to unsigned
+        # ones (zigzag), so that small negative
+        # numbers are short.
+        self.write_uint(value * 2 if value >= 0 else -value * 2 - 1)
+
+    def write_str(self, value: str):
+        index = self.strings.get(value)
+
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+
+        self.write_uint(index)
+
+    def write_optional_str(self, value: str | None):
+        # 0 is None, the other numbers
+        # are the index of the string + 1.
+        if value is None:
+            self.write_uint(0)
+            return
+
+        index = self.strings.get(value)
+
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+
+        self.write_uint(index + 1)
+
+    def write_optional_node(self, node: Node | None):
+        # 0 is None, the other numbers
+        # are the index of the node + 1.
+        self.write_uint(0 if node is None else self.node_indices[id(node)] + 1)
+
+    def write_value(self, value):
+        buffer = self.buffer
+
+        # Check bool before int,
+        # as bool is a subclass.
+        if value is None:
+            buffer.append(TAG_NONE)
+        elif value is True:
+            buffer.append(TAG_TRUE)
+        elif value is False:
+            buffer.append(TAG_FALSE)
+        elif isinstance(value, str):
+            buffer.append(TAG_STR)
+            self.write_str(value)
+        elif isinstance(value, int):
+            buffer.append(TAG_INT)
+            self.write_int(value)
+        elif isinstance(value, float):
+            buffer.append(TAG_FLOAT)
+            buffer.extend(_FLOAT.pack(value))
+        elif isinstance(value, Node):
+            buffer.append(TAG_NODE)
+            self.write_uint(self.node_indices[id(value)])
+        elif isinstance(value, (list, tuple)):
+            buffer.append(TAG_LIST if isinstance(value, list) else TAG_TUPLE)
+            self.write_uint(len(value))
+            for item in value:
+                self.write_value(item)
+        elif isinstance(value, dict):
+            buffer.append(TAG_DICT)
+            self.write_uint(len(value))
+            for key, item in value.items():
+                self.write_value(key)
+                self.write_value(item)
+        else:
+            raise SerializationError(
+                f"Values of type {type(value).__name__} cannot be serialised"
+            )
+
+    def write_info(self, info: NodeInfo):
+        context = info.context
+        self.write_int(context.start_line)
+        self.write_int(context.start_column)
+        self.write_int(context.end_line)
+        self.write_int(context.end_column)
+        self.write_optional_str(context.source)
+
+    def write_node(self, node: Node):
+        self.write_optional_node(node.parent)
+
+        arguments = node.arguments
+        self.write_value(arguments.unnamed_args)
+        self.write_value(arguments.named_args)
+        self.write_value(arguments.tags)
+        self.write_value(arguments.internal_tags)
+        self.write_optional_str(arguments.subtype)
+
+        self.write_info(node.info)
+
+        attributes = [
+            (name, value)
+            for name, value in vars(node).items()
+            if name not in NODE_ATTRIBUTES
+        ]
+
+        self.write_uint(len(attributes))
+        for name, value in attributes:
+            self.write_str(name)
+            self.write_value(value)
+
+
+class _Reader:
+    # Read the values written by a _Writer.
+
+    def __init__(self, data: bytes, position: int):
+        self.data = data
+        self.position = position
+        self.strings: list[str] = []
+        self.nodes: list[Node] = []
+
+    def read_uint(self) -> int:
+        data = self.data
+        result = 0
+        shift = 0
+
+        while True:
+            byte = data[self.position]
+            self.position += 1
+
+            result |= (byte & 0x7F) << shift
+
+            if byte < 0x80:
+                return result
+
+            shift += 7
+
+    def read_int(self) -> int:
+        value = self.read_uint()
+
+        return value >> 1 if value % 2 == 0 else -(value >> 1) - 1
+
+    def read_str(self) -> str:
+        return self.strings[self.read_uint()]
+
+    def read_optional_str(self) -> str | None:
+        index = self.read_uint()
+
+        return None if index == 0 else self.strings[index - 1]
+
+    def read_optional_node(self) -> Node | None:
+        index = self.read_uint()
+
+        return None if index == 0 else self.nodes[index - 1]
+
+    def read_value(self):
+        tag = self.data[self.position]
+        self.position += 1
+
+        if tag == TAG_STR:
+            return self.read_str()
+
+        if tag == TAG_NODE:
+            return self.nodes[self.read_uint()]
+
+        if tag == TAG_NONE:
+            return None
+
+        if tag == TAG_TRUE:
+            return True
+
+        if tag == TAG_FALSE:
+            return False
+
+        if tag == TAG_INT:
+            return self.read_int()
+
+        if tag == TAG_FLOAT:
+            (value,) = _FLOAT.unpack_from(self.data, self.position)
+            self.position += _FLOAT.size
+            return value
+
+        if tag == TAG_LIST:
+            return [self.read_value() for _ in range(self.read_uint())]
+
+        if tag == TAG_TUPLE:
+            return tuple(self.read_value() for _ in range(self.read_uint()))
+
+        if tag == TAG_DICT:
+            result = {}
+            for _ in range(self.read_uint()):
+                key = self.read_value()
+                result[key] = self.read_value()
+            return result
+
+        raise SerializationError(f"Unknown value tag {tag}")
+
+    def read_info(self) -> NodeInfo:
+        return NodeInfo(
+            context=Context(
+                self.read_int(),
+                self.read_int(),
+                self.read_int(),
+                self.read_int(),
+                self.read_optional_str(),
+            )
+        )
+
+    def read_node(self, node: Node):
+        node.parent = self.read_optional_node()
+
+        node.arguments = NodeArguments(
+            unnamed_args=self.read_value(),
+            named_args=self.read_value(),
+            tags=self.read_value(),
+            internal_tags=self.read_value(),
+            subtype=self.read_optional_str(),
+        )
+
+        node.info = self.read_info()
+
+        for _ in range(self.read_uint()):
+            name = self.read_str()
+            setattr(node, name, self.read_value())
+
+
+def _collect_nodes(roots: list[Node | None]) -> list[Node]:
+    # Find all the nodes reachable from the given
+    # ones, following the attributes that contain
+    # nodes and the parents. This uses a stack,
+    # so that deep trees don't cause recursion.
+    nodes: list[Node] = []
+    seen: set[int] = set()
+
+    stack: list = [root for root in reversed(roots) if root is not None]
+
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, Node):
+            if id(value) in seen:
+                continue
+
+            seen.add(id(value))
+            nodes.append(value)
+
+            children = [value.parent]
+            children.extend(
+                item for name, item in vars(value).items() if name != "parent"
+            )
+            stack.extend(reversed(children))
+        elif isinstance(value, (list, tuple)):
+            stack.extend(reversed(value))
+        elif isinstance(value, dict):
+            stack.extend(reversed(value.values()))
+
+    return nodes
+
+
+def serialize_output(output: DocumentParserOutput) -> bytes:
+    """
+    Serialise the output of a DocumentParser (the
+    document, the ToC, and the include calls).
+
+    Nodes are stored in a flat list and all
+    references between them, parents included,
+    are stored as indices in that list.
+    Strings are stored once. The data starts
+    with a magic number and the version of
+    the format.
+    """
+
+    nodes = _collect_nodes([output.document, output.toc])
+    node_indices = {id(node): index for index, node in enumerate(nodes)}
+
+    class_indices: dict[type, int] = {}
+    for node in nodes:
+        class_indices.setdefault(type(node), len(class_indices))
+
+    writer = _Writer(node_indices)
+
+    for node in nodes:
+        writer.write_node(node)
+
+    writer.write_optional_node(output.document)
+    writer.write_optional_node(output.toc)
+
+    writer.write_uint(len(output.include_calls))
+    for include_call in output.include_calls:
+        writer.write_optional_str(include_call.caller_uri)
+        writer.write_optional_str(include_call.callee_uri)
+        writer.write_value(include_call.call_arguments)
+
+        if include_call.info is None:
+            writer.write_uint(0)
+        else:
+            writer.write_uint(1)
+            writer.write_info(include_call.info)
+
+    # The header contains the tables that
+    # are needed to read the nodes.
+    header = _Writer(node_indices)
+    header.buffer.extend(MAGIC)
+    header.write_uint(FORMAT_VERSION)
+
+    header.write_uint(len(writer.strings))
+    for string in writer.strings:
+        encoded = string.encode("utf-8", "surrogatepass")
+        header.write_uint(len(encoded))
+        header.buffer.extend(encoded)
+
+    header.write_uint(len(class_indices))
+    for cls in class_indices:
+        name = f"{cls.__module__}.{cls.__qualname__}".encode()
+        header.write_uint(len(name))
+        header.buffer.extend(name)
+
+    header.write_uint(len(nodes))
+    for node in nodes:
+        header.write_uint(class_indices[type(node)])
+
+    return bytes(header.buffer + writer.buffer)
+
+
+def deserialize_output(data: bytes) -> DocumentParserOutput:
+    """
+    Load the output of a DocumentParser
+    serialised by serialize_output.
+    """
+
+    if data[: len(MAGIC)] != MAGIC:
+        raise SerializationError("The data is not a serialised Mau document")
+
+    reader = _Reader(data, len(MAGIC))
+
+    try:
+        version = reader.read_uint()
+
+        if version != FORMAT_VERSION:
+            raise SerializationError(
+                f"Unsupported format version {version} (expected {FORMAT_VERSION})"
+            )
+
+        def read_bytes() -> bytes:
+            size = reader.read_uint()
+            start = reader.position
+            reader.position += size
+
+            if reader.position > len(data):
+                raise SerializationError("The data is truncated")
+
+            return data[start : reader.position]
+
+        reader.strings = [
+            read_bytes().decode("utf-8", "surrogatepass")
+            for _ in range(reader.read_uint())
+        ]
+
+        known_classes = _node_classes()
+        classes = []
+        for _ in range(reader.read_uint()):
+            name = read_bytes().decode()
+
+            if name not in known_classes:
+                raise SerializationError(f"Unknown node class {name}")
+
+            classes.append(known_classes[name])
+
+        # Create all the nodes first, so that
+        # they can be referenced before
+        # their attributes are loaded.
+        reader.nodes = []
+        for _ in range(reader.read_uint()):
+            cls = classes[reader.read_uint()]
+            reader.nodes.append(cls.__new__(cls))
+
+        for node in reader.nodes:
+            reader.read_node(node)
+
+        document = reader.read_optional_node()
+        toc = reader.read_optional_node()
+
+        include_calls = []
+        for _ in range(reader.read_uint()):
+            include_call = IncludeCall(
+                caller_uri=reader.read_optional_str(),  # type: ignore[arg-type]
+                callee_uri=reader.read_optional_str(),  # type: ignore[arg-type]
+                call_arguments=reader.read_value(),
+            )
+
+            if reader.read_uint() == 1:
+                include_call.info = reader.read_info()
+
+            include_calls.append(include_call)
+    except (IndexError, TypeError, UnicodeDecodeError, struct.error) as exception:
+        raise SerializationError("The data is truncated or corrupted") from exception
+
+    return DocumentParserOutput(
+        document=document,
+        toc=toc,  # type: ignore[arg-type]
+        include_calls=include_calls,
+    )
@@ -28,6 +28,7 @@ from mau.parsers.arguments_parser import (
 from mau.parsers.base_parser import BaseParser, create_parser_exception
 from mau.parsers.buffers.control_buffer import Control
 from mau.parsers.condition_parser import ConditionParser
+from mau.parsers.managers.tokens_manager import TokensManager, stop_set
 from mau.text_buffer import Context
 from mau.token import EOF, EOL, Token, TokenType
 
@@ -37,6 +38,36 @@ logger = logging.getLogger(__name__)
 # name of styles introduced by special characters.
 MAP_STYLES = {"_": "underscore", "*": "star", "^": "caret", "~": "tilde"}
 
+# These are the stop tokens used by the parser.
+# They are built only once as they never change.
+
+# EOF and EOL always stop a sentence.
+SENTENCE_STOP_TOKENS = frozenset({EOF, EOL})
+
+# A styled sentence stops also at the closing marker.
+STYLE_STOP_TOKENS = {
+    marker: SENTENCE_STOP_TOKENS.union({Token.generate(TokenType.LITERAL, marker)})
+    for marker in MAP_STYLES
+}
+
+# Quoted macro arguments stop at the closing quotes.
+MACRO_QUOTED_ARGUMENT_STOP = stop_set(Token.generate(TokenType.LITERAL, '"'))
+
+# Macro arguments stop at the comma or at the closing bracket.
+MACRO_ARGUMENT_STOP = stop_set(
+    Token.generate(TokenType.LITERAL, ","),
+    Token.generate(TokenType.LITERAL, ")"),
+)
+
+# Verbatim text stops at the closing backtick or EOL.
+VERBATIM_STOP = stop_set(Token.generate(TokenType.LITERAL, "`"), EOL)
+
+# Escaped text stops at the closing marker or EOL.
+ESCAPED_STOP = {
+    marker: stop_set(Token.generate(TokenType.LITERAL, marker), EOL)
+    for marker in ("$", "%")
+}
+
 
 # The TextParser is a recursive parser.
 # The parsing always starts with parse_sentence
@@ -58,7 +89,106 @@ class TextParser(BaseParser):
 
         # These are the internal links found
         # in this piece of text.
-        self.header_links: list[Node] = []
+        self.header_links: list[MacroHeaderNode] = []
+
+        # These are the nodes of each line
+        # parsed by lex_and_parse_lines.
+        self.lines: list[list[Node]] = []
+
+    @classmethod
+    def lex_and_parse_lines(
+        cls,
+        lines: list[tuple[int, str]],
+        message_handler: BaseMessageHandler,
+        environment: Environment | None,
+        start_column: int = 0,
+        source_filename: str | None = None,
+        **kwds,
+    ):
+        # This works like lex_and_parse, but parses
+        # multiple lines, each one given with its
+        # line number. Every line is parsed separately
+        # and gives the same nodes that lex_and_parse
+        # would give, but all lines are lexed together
+        # and parsed by the same parser.
+        # The start column applies to the first line,
+        # while the others start at column 0.
+        # The nodes of each line are stored in
+        # `lines`, and `nodes` contains all of them.
+
+        start_line = lines[0][0]
+
+        # Build the text putting each line at
+        # its position. Any missing line (e.g.
+        # a comment) is replaced by an empty one.
+        text_lines = [""] * (lines[-1][0] - start_line + 1)
+        for line_number, line in lines:
+            text_lines[line_number - start_line] = line
+
+        text_buffer = cls.text_buffer_class(
+            "\n".join(text_lines),
+            start_line,
+            start_column,
+            source_filename,
+        )
+
+        lexer = cls.lexer_class(
+            text_buffer,
+            message_handler,
+            environment,
+        )
+
+        lexer.process()
+
+        # Split the tokens according to their line.
+        # Lines are parsed one at a time, so they
+        # get an EOF token where lexing that line
+        # alone would put it: at the end of the line
+        # or, after trailing spaces, at the
+        # beginning of the next one.
+        lines_tokens: dict[int, list[Token]] = {
+            line_number: [] for line_number, _ in lines
+        }
+
+        for token in lexer.tokens:
+            line_tokens = lines_tokens.get(token.context.start_line)
+
+            if line_tokens is not None and token.type is not TokenType.EOF:
+                line_tokens.append(token)
+
+        parser = cls(
+            [],
+            message_handler,
+            environment,
+            **kwds,
+        )
+
+        for line_number, line in lines:
+            if line != line.rstrip(" "):
+                eof_position = (line_number + 1, 0)
+            elif line_number == start_line:
+                eof_position = (line_number, start_column + len(line))
+            else:
+                eof_position = (line_number, len(line))
+
+            # An empty line contains only EOF.
+            line_tokens = lines_tokens[line_number] if line else []
+            line_tokens.append(
+                Token(
+                    TokenType.EOF,
+                    "",
+                    Context(*eof_position, *eof_position, source_filename),
+                )
+            )
+
+            first_node = len(parser.nodes)
+
+            parser.tm = TokensManager(line_tokens)
+            parser.parse()
+
+            parser.lines.append(parser.nodes[first_node:])
+
+        return parser
 
     def _collect_macro_args(self) -> Token:
         # A helper that reads macro arguments.
@@ -73,24 +203,20 @@ class TextParser(BaseParser):
         all_args: list[Token] = []
 
         # Continue until you find a closing round bracket or EOF.
-        while not (
-            self.tm.peek_token_is(TokenType.LITERAL, ")")
-            or self.tm.peek_token_is(TokenType.EOF)
+        while (
+            self.tm.match(TokenType.LITERAL, ")") is None
+            and self.tm.match(TokenType.EOF) is None
         ):
             # If we find double quotes we need to blindly
             # collect everything until we meet the closing
             # double quotes or EOL.
-            if self.tm.peek_token_is(TokenType.LITERAL, '"'):
-                # Consume the double quotes.
-                opening_quotes = self.tm.get_token(TokenType.LITERAL, '"')
+            opening_quotes = self.tm.try_get(TokenType.LITERAL, '"')
 
+            if opening_quotes is not None:
                 # Collect and join everything.
                 # Stop at quotes or EOL.
                 text_token = self.tm.collect_join(
-                    stop_tokens=[
-                        Token.generate(TokenType.LITERAL, '"'),
-                        EOF,
-                    ],
+                    stop_tokens=MACRO_QUOTED_ARGUMENT_STOP
                 )
 
                 # As we stopped, the next token should be
@@ -109,13 +235,7 @@ class TextParser(BaseParser):
                 # No double quotes, we can proceed,
                 # until we find the closing round bracket
                 # or a comma, which is the arguments separator.
-                token = self.tm.collect_join(
-                    stop_tokens=[
-                        Token.generate(TokenType.LITERAL, ","),
-                        Token.generate(TokenType.LITERAL, ")"),
-                        EOF,
-                    ],
-                )
+                token = self.tm.collect_join(stop_tokens=MACRO_ARGUMENT_STOP)
 
             # We can add the arguments we found to the
             # global list.
@@ -157,11 +277,11 @@ class TextParser(BaseParser):
         content = []
 
         # The set of tokens that trigger the end of
-        # the process.
-        stop_tokens = stop_tokens or set()
+        # the process. EOF and EOL always act as stoppers.
+        stop_tokens = stop_tokens or SENTENCE_STOP_TOKENS
 
-        # EOF and EOL always act as stoppers.
-        stop_tokens = stop_tokens.union({EOF, EOL})
+        if not SENTENCE_STOP_TOKENS.issubset(stop_tokens):
+            stop_tokens = SENTENCE_STOP_TOKENS.union(stop_tokens)
 
         # Try to parse some text.
         nodes = self._parse_text(stop_tokens)
@@ -228,25 +348,38 @@ class TextParser(BaseParser):
         # make sure the index is restored to the original
         # value when a function raises an exception.
 
+        # Each function is tried only if the next
+        # token is the one it starts with, so that
+        # plain words do not raise exceptions.
         stop_tokens = stop_tokens or set()
 
-        if self.tm.peek_token() in stop_tokens:
+        next_token = self.tm.peek_token()
+
+        if next_token in stop_tokens:
             return []
 
-        with self.tm:
-            return self._parse_backslash_escaped()
+        if next_token.type is TokenType.LITERAL:
+            value = next_token.value
 
-        with self.tm:
-            return self._parse_macro()
+            if value == "\\":
+                with self.tm:
+                    return self._parse_backslash_escaped()
 
-        with self.tm:
-            return self._parse_verbatim()
+            if value == "[":
+                with self.tm:
+                    return self._parse_macro()
 
-        with self.tm:
-            return self._parse_escaped()
+            if value == "`":
+                with self.tm:
+                    return self._parse_verbatim()
 
-        with self.tm:
-            return self._parse_style()
+            if value in ("$", "%"):
+                with self.tm:
+                    return self._parse_escaped()
+
+            if value in MAP_STYLES:
+                with self.tm:
+                    return self._parse_style()
 
         return self._parse_word()
 
@@ -370,9 +503,7 @@ class TextParser(BaseParser):
 
         # Get all tokens from here to the next
         # verbatim marker or EOL.
-        content = self.tm.collect_join(
-            [Token.generate(TokenType.LITERAL, "`"), EOL],
-        )
+        content = self.tm.collect_join(VERBATIM_STOP)
 
         # Remove the closing marker.
         closing_marker = self.tm.get_token(TokenType.LITERAL, "`")
@@ -397,14 +528,12 @@ class TextParser(BaseParser):
 
         # Get the escaped marker.
         opening_marker = self.tm.get_token(
-            TokenType.LITERAL, value_check_function=lambda x: x in "$%"
+            TokenType.LITERAL, value_check_function=lambda x: x in ("$", "%")
         )
 
         # Get the content tokens before the
         # next escaped marker or EOL.
-        content = self.tm.collect_join(
-            [Token.generate(TokenType.LITERAL, opening_marker.value), EOL],
-        )
+        content = self.tm.collect_join(ESCAPED_STOP[opening_marker.value])
 
         # Remove the closing marker
         closing_marker = self.tm.get_token(TokenType.LITERAL, opening_marker.value)
@@ -431,7 +560,7 @@ class TextParser(BaseParser):
 
         # Get everything before the next marker
         content = self._parse_sentence(
-            stop_tokens={Token.generate(TokenType.LITERAL, opening_marker.value)}
+            stop_tokens=STYLE_STOP_TOKENS[opening_marker.value]
         )
 
         # Get the closing marker
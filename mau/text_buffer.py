@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from array import array
+from bisect import bisect_right
 
 Position = tuple[int, int]
 
@@ -41,18 +42,157 @@ def adjust_position(position: Position):
     return (position[0] + 1, position[1])
 
 
-@dataclass
+def build_line_index(text: str, start: int = 0, end: int | None = None) -> array:
+    """Return the offsets of the beginning of
+    each line of the given text.
+
+    Lines are separated by `\n`, so the first
+    line always starts at offset 0. If start and
+    end are given only that part of the text is
+    indexed, and the first line starts at start.
+    """
+    if end is None:
+        end = len(text)
+
+    line_index = array("l", [start])
+
+    newline = text.find("\n", start, end)
+    while newline != -1:
+        line_index.append(newline + 1)
+        newline = text.find("\n", newline + 1, end)
+
+    return line_index
+
+
+class LineIndex:
+    """Convert offsets in a text into lines and columns.
+
+    The index stores the offset of the beginning of each
+    line, and the position of the text in its source, so
+    that the first line can start at any column.
+    """
+
+    __slots__ = ("line_starts", "source", "start_column", "start_line")
+
+    def __init__(
+        self,
+        text: str,
+        start_line: int = 0,
+        start_column: int = 0,
+        source: str | None = None,
+        start_offset: int = 0,
+        end_offset: int | None = None,
+    ):
+        self.line_starts = build_line_index(text, start_offset, end_offset)
+        self.start_line = start_line
+        self.start_column = start_column
+        self.source = source
+
+    def position(self, offset: int) -> Position:
+        """Return the (line, column) position of the given offset."""
+        line = bisect_right(self.line_starts, offset) - 1
+        column = offset - self.line_starts[line]
+
+        # The start column applies
+        # only to the first line.
+        if line == 0:
+            column += self.start_column
+
+        return (line + self.start_line, column)
+
+
+def _context_field(name: str) -> property:
+    # Build a property that reads and writes
+    # the given attribute of a Context, resolving
+    # the offsets first if the context is lazy.
+    attribute = f"_{name}"
+
+    def getter(self):
+        if self._line_index is not None:
+            self._resolve()
+
+        return getattr(self, attribute)
+
+    def setter(self, value):
+        if self._line_index is not None:
+            self._resolve()
+
+        setattr(self, attribute, value)
+
+    return property(getter, setter)
+
+
 class Context:
     # Context objects represent the place where a token was found
     # in the source code. They contain start and end line and
     # column of the text block, and the name of the source file
     # (if provided).
+    #
+    # A context can also be created lazily from two offsets and
+    # the LineIndex of the text (see `from_offsets`). In that case
+    # lines and columns are computed only when one of them is
+    # read or changed for the first time.
+
+    __slots__ = (
+        "_end_column",
+        "_end_line",
+        "_end_offset",
+        "_line_index",
+        "_start_column",
+        "_start_line",
+        "_start_offset",
+        "source",
+    )
+
+    # The offsets of a lazy context.
+    _start_offset: int
+    _end_offset: int
+
+    start_line = _context_field("start_line")
+    start_column = _context_field("start_column")
+    end_line = _context_field("end_line")
+    end_column = _context_field("end_column")
 
-    start_line: int
-    start_column: int
-    end_line: int
-    end_column: int
-    source: str | None = None
+    def __init__(
+        self,
+        start_line: int,
+        start_column: int,
+        end_line: int,
+        end_column: int,
+        source: str | None = None,
+    ):
+        self._start_line = start_line
+        self._start_column = start_column
+        self._end_line = end_line
+        self._end_column = end_column
+        self.source = source
+        self._line_index: LineIndex | None = None
+
+    @classmethod
+    def from_offsets(
+        cls, line_index: LineIndex, start_offset: int, end_offset: int
+    ) -> Context:
+        """Create a context from two offsets of a text.
+        Lines and columns are computed only when needed.
+        """
+        context = cls.__new__(cls)
+        context.source = line_index.source
+        context._line_index = line_index
+        context._start_offset = start_offset
+        context._end_offset = end_offset
+
+        return context
+
+    def _resolve(self):
+        # Compute lines and columns from the offsets.
+        line_index = self._line_index
+
+        if line_index is None:
+            return
+
+        self._start_line, self._start_column = line_index.position(self._start_offset)
+        self._end_line, self._end_column = line_index.position(self._end_offset)
+        self._line_index = None
 
     @classmethod
     def empty(cls) -> Context:
@@ -101,7 +241,45 @@ class Context:
         }
 
     def clone(self):
-        return self.__class__(**self.asdict())
+        # A lazy context can be cloned
+        # without computing its position.
+        if self._line_index is not None:
+            context = self.from_offsets(
+                self._line_index, self._start_offset, self._end_offset
+            )
+            context.source = self.source
+
+            return context
+
+        return self.__class__(
+            self._start_line,
+            self._start_column,
+            self._end_line,
+            self._end_column,
+            self.source,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Context):
+            return NotImplemented
+
+        return (
+            self.start_line,
+            self.start_column,
+            self.end_line,
+            self.end_column,
+            self.source,
+        ) == (
+            other.start_line,
+            other.start_column,
+            other.end_line,
+            other.end_column,
+            other.source,
+        )
+
+    # Contexts are mutable, so they
+    # cannot be used as keys.
+    __hash__ = None  # type: ignore[assignment]
 
     def __repr__(self):
         source_prefix = ""
@@ -121,12 +299,20 @@ class Context:
 #
 # The object itself doesn't interact with files, the text content
 # has to be loaded externally. The `text` parameter is a single
-# string containing newlines, the object will split it internally.
-# When a piece of text is loaded it is split into lines using `\n`.
+# string containing newlines, and the object keeps it as it is.
+# Instead of splitting the text into a list of lines, the buffer
+# tracks the absolute offset of the current character and the
+# boundaries of the current line inside the string. Lines are
+# separated by `\n`.
+#
+# The parameters `start_offset` and `end_offset` restrict the
+# buffer to a part of the text. The buffer behaves as if the
+# text contained only that part, but offsets are still absolute.
+# This is used to read nested content in place.
 #
-# The attribute `initial_context` allows to nest pieces of text that
-# come from different sources. The property `context` takes the
-# initial context into account and adjusts the line and column.
+# Line and column are derived from the offsets, so they are
+# computed only when a position is requested. Both can still be
+# set directly, which moves the offsets accordingly.
 #
 # The object has several properties:
 # * `eof` - True if the current line is beyond the last line.
@@ -140,14 +326,17 @@ class Context:
 #   or an empty string in case of EOL/EOF.
 # * `tail` - The remaining part of the line starting with the next
 #   character.
-# * `position` - (getter/setter) A tuple (line, column) with the
-#   current position.
-# * `context` - A instance of Context relative to `initial_context`.
+# * `position` - A tuple (line, column) with the current position.
+# * `offset` - The absolute offset of the current character.
+# * `line_start`/`line_end` - The absolute offsets of the boundaries
+#   of the current line.
+# * `line_index` - A LineIndex that converts offsets into positions,
+#   used to create contexts lazily.
 #
-# The class also exposes three main methods:
-# * `load` - Loads a string into the internal buffer. The string is
-#   split using newlines `\n`.
+# The class also exposes two main methods:
 # * `nextline` - Moves to the beginning of the next line.
+# * `nextline_at` - Moves to the beginning of a following line
+#   given its offset.
 # * `skip` - Skips the given number of characters.
 #
 # The class has been designed to minimise the number of exceptions it
@@ -163,15 +352,127 @@ class TextBuffer:
         start_line: int = 0,
         start_column: int = 0,
         source_filename: str | None = None,
+        start_offset: int = 0,
+        end_offset: int | None = None,
     ):
-        self.line = 0
-        self.column = 0
+        self.text = text
         self.start_line = start_line
         self.start_column = start_column
         self.source_filename = source_filename
 
-        # Split the input text into lines.
-        self.lines = text.split("\n") if text != "" else []
+        # The buffer can contain only a part
+        # of the text, between the two offsets.
+        # This allows to read a part of a larger
+        # text without copying it.
+        self.start_offset = start_offset
+        self.end_offset = len(text) if end_offset is None else end_offset
+
+        # The number of lines contained in the text.
+        # An empty text contains no lines at all.
+        self._lines_count = (
+            text.count("\n", start_offset, self.end_offset) + 1
+            if self.end_offset > start_offset
+            else 0
+        )
+
+        # The index used to create lazy contexts.
+        # It is built only when needed. The start
+        # column is stored as nextline resets it.
+        self._line_index: LineIndex | None = None
+        self._initial_start_column = start_column
+
+        # Move to the beginning of the text.
+        self.line = 0
+
+    def _find_line(self, line: int) -> tuple[int, int]:
+        # Find the offsets of the boundaries
+        # of the given line. Lines beyond the
+        # end of the text are empty and
+        # placed at the end of it.
+        text = self.text
+        text_end = self.end_offset
+        start = self.start_offset
+
+        for _ in range(line):
+            newline = text.find("\n", start, text_end)
+
+            if newline == -1:
+                return (text_end, text_end)
+
+            start = newline + 1
+
+        end = text.find("\n", start, text_end)
+
+        if end == -1:
+            end = text_end
+
+        return (start, end)
+
+    @property
+    def line(self) -> int:
+        """
+        The index of the current line.
+        """
+        return self._line
+
+    @line.setter
+    def line(self, value: int):
+        self._line = value
+        self._line_start, self._line_end = self._find_line(value)
+        self._current_line = self.text[self._line_start : self._line_end]
+        self._offset = self._line_start
+
+    @property
+    def column(self) -> int:
+        """
+        The index of the current character
+        in the current line.
+        """
+        return self._offset - self._line_start
+
+    @column.setter
+    def column(self, value: int):
+        self._offset = self._line_start + value
+
+    @property
+    def offset(self) -> int:
+        """
+        The absolute offset of the current character.
+        """
+        return self._offset
+
+    @property
+    def line_start(self) -> int:
+        """
+        The absolute offset of the beginning of the current line.
+        """
+        return self._line_start
+
+    @property
+    def line_end(self) -> int:
+        """
+        The absolute offset of the end of the current line
+        (the newline character or the end of the text).
+        """
+        return self._line_end
+
+    @property
+    def line_index(self) -> LineIndex:
+        """
+        The LineIndex of the text, that converts
+        offsets into positions.
+        """
+        if self._line_index is None:
+            self._line_index = LineIndex(
+                self.text,
+                self.start_line,
+                self._initial_start_column,
+                self.source_filename,
+                self.start_offset,
+                self.end_offset,
+            )
+
+        return self._line_index
 
     @property
     def eof(self) -> bool:
@@ -181,26 +482,26 @@ class TextBuffer:
 
         # If there are no lines in the buffer
         # we are at the end of file for sure.
-        if not self.lines:
+        if self._lines_count == 0:
             return True
 
         # There might be empty lines, and those
         # should never be mistaken for the EOF.
         # If we are at the last line, and beyond
         # its length we are at the EOF.
-        if self.line == len(self.lines) - 1 and self.column >= len(self.current_line):
+        if self._line == self._lines_count - 1 and self._offset >= self._line_end:
             return True
 
         # If we are past the last line
         # we are at the EOF.
-        return self.line >= len(self.lines)
+        return self._line >= self._lines_count
 
     @property
     def eol(self) -> bool:
         """
         True if the position is beyond EOL.
         """
-        return self.column >= len(self.current_line)
+        return self._offset >= self._line_end
 
     @property
     def current_line(self) -> str:
@@ -210,10 +511,7 @@ class TextBuffer:
         This property returns the current line without advancing the index.
         If the buffer is reading after the last line it returns an empty string.
         """
-        try:
-            return self.lines[self.line]
-        except IndexError:
-            return ""
+        return self._current_line
 
     @property
     def current_char(self) -> str:
@@ -224,11 +522,11 @@ class TextBuffer:
         If the buffer is reading after the last character of the line
         or after the last line it returns an empty string.
         """
-        try:
-            return self.current_line[self.column]
-        except IndexError:
+        if self._offset >= self._line_end:
             return ""
 
+        return self.text[self._offset]
+
     @property
     def peek_char(self) -> str:
         """
@@ -238,12 +536,11 @@ class TextBuffer:
         If the buffer is reading after the last character of the line
         or after the last line it returns an empty string.
         """
-
-        try:
-            return self.current_line[self.column + 1]
-        except IndexError:
+        if self._offset + 1 >= self._line_end:
             return ""
 
+        return self.text[self._offset + 1]
+
     @property
     def tail(self) -> str:
         """
@@ -252,32 +549,69 @@ class TextBuffer:
         This property returns a string with the last part of the current
         line from the current character to the end.
         """
-        return self.current_line[self.column :]
+        return self.text[self._offset : self._line_end]
 
     @property
     def position(self) -> tuple[int, int]:
         """
         Returns a tuple with the current position.
         """
-        return (self.line + self.start_line, self.column + self.start_column)
+        return (
+            self._line + self.start_line,
+            self._offset - self._line_start + self.start_column,
+        )
 
     def nextline(self):
         """
         Moves the index to the beginning of the next line
         """
-        if self.line <= len(self.lines):
-            self.line += 1
+        if self._line <= self._lines_count:
+            self._line += 1
+
+            # The next line starts after the newline
+            # that ends the current one, if there is one.
+            # Otherwise the buffer moves beyond the
+            # end of the text.
+            if self._line_end < self.end_offset:
+                self._line_start = self._line_end + 1
+                self._line_end = self.text.find("\n", self._line_start, self.end_offset)
+
+                if self._line_end == -1:
+                    self._line_end = self.end_offset
+            else:
+                self._line_start = self._line_end = self.end_offset
+
+            self._current_line = self.text[self._line_start : self._line_end]
 
         # If we go to a new line, the
         # start column should be reset
         # as well. The buffer is not a
         # text box floating in the page.
         self.start_column = 0
-        self.column = 0
+        self._offset = self._line_start
+
+    def nextline_at(self, offset: int):
+        """
+        Moves the index to the beginning of the line
+        that starts at the given offset, which has to
+        be after the current line. This works like
+        calling nextline until that line is reached.
+        """
+        self._line += self.text.count("\n", self._line_start, offset)
+        self._line_start = offset
+        self._line_end = self.text.find("\n", offset, self.end_offset)
+
+        if self._line_end == -1:
+            self._line_end = self.end_offset
+
+        self._current_line = self.text[self._line_start : self._line_end]
+
+        self.start_column = 0
+        self._offset = self._line_start
 
     def skip(self, chars=1):
         """
         Skips the given number of characters (default 1). Can silently
         go over the end of the line.
         """
-        self.column = self.column + chars
+        self._offset += chars
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from array import array
+from collections.abc import Iterable, Sequence
 from enum import Enum
 
-from mau.text_buffer import Context
+from mau.text_buffer import Context, TextBuffer
 
 
 class TokenType(Enum):
@@ -138,5 +140,202 @@ class Token:
         return 0
 
 
+class TextViewToken(Token):
+    """A TEXT token whose value is a part of a larger text.
+
+    The token keeps the text and the offsets of the part,
+    so that the part can be lexed in place. The value is
+    extracted only when it is read for the first time.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        start_offset: int,
+        end_offset: int,
+        context: Context,
+    ):
+        self.type = TokenType.TEXT
+        self.text = text
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.context = context
+        self._value: str | None = None
+
+    @property  # type: ignore[override]
+    def value(self) -> str:
+        if self._value is None:
+            self._value = self.text[self.start_offset : self.end_offset]
+
+        return self._value
+
+    @value.setter
+    def value(self, value: str):
+        self._value = value
+
+    def __len__(self):
+        if self._value is not None:
+            return len(self._value)
+
+        return self.end_offset - self.start_offset
+
+
+# Token types are stored in a TokenArray
+# as their index in this list.
+TOKEN_TYPES: list[TokenType] = list(TokenType)
+TOKEN_TYPE_CODES: dict[TokenType, int] = {
+    ttype: code for code, ttype in enumerate(TOKEN_TYPES)
+}
+
+
+class TokenArray(Sequence):
+    """A compact list of tokens extracted from a text buffer.
+
+    Instead of Token objects, the array stores the type
+    and the line of each token and the offsets of its
+    boundaries in the source text. The value of a token
+    is the slice of the source between the two offsets.
+
+    Token objects are created only when an item of the
+    array is requested. Tokens whose value or context
+    cannot be represented in this way are stored as they
+    are.
+    """
+
+    def __init__(self, text_buffer: TextBuffer, tokens: Iterable[Token] = ()):
+        self.text = text_buffer.text
+        self.start_line = text_buffer.start_line
+        self.start_column = text_buffer.start_column
+        self.source = text_buffer.source_filename
+        self.end_offset = text_buffer.end_offset
+
+        # The index of the lines of the source,
+        # shared with the lazy contexts.
+        self._line_index = text_buffer.line_index
+
+        self._types = array("B")
+        self._lines = array("l")
+        self._starts = array("l")
+        self._ends = array("l")
+
+        # Tokens that are stored as they are,
+        # indexed by their position.
+        self._tokens: dict[int, Token] = {}
+
+        self.extend(tokens)
+
+    def _line_start(self, line: int) -> int:
+        # Return the offset of the beginning of
+        # the given line. Lines beyond the end of
+        # the text are placed at the end of it.
+        line_starts = self._line_index.line_starts
+
+        if 0 <= line < len(line_starts):
+            return line_starts[line]
+
+        return self.end_offset
+
+    def _column_shift(self, line: int) -> int:
+        # The start column of the text buffer
+        # applies only to the first line.
+        return self.start_column if line == 0 else 0
+
+    def append(self, token: Token):
+        context = token.context
+        line = context.start_line - self.start_line
+        start = self._line_start(line) + context.start_column - self._column_shift(line)
+        end = start + len(token)
+
+        self._types.append(TOKEN_TYPE_CODES[token.type])
+        self._lines.append(line)
+        self._starts.append(start)
+        self._ends.append(end)
+
+        # Check that the token can be rebuilt from
+        # the source, otherwise store it as it is.
+        # Views are stored as they are, so that
+        # their text can still be lexed in place.
+        if (
+            isinstance(token, TextViewToken)
+            or context.source != self.source
+            or context.end_line != context.start_line
+            or context.end_column - context.start_column != len(token.value)
+            or not self.text.startswith(token.value, start)
+            or end > self._line_start(line + 1)
+        ):
+            self._tokens[len(self._types) - 1] = token
+
+    def extend(self, tokens: Iterable[Token]):
+        for token in tokens:
+            self.append(token)
+
+    def _check_index(self, index: int) -> int:
+        # Convert negative indices and
+        # check the index is valid.
+        if index < 0:
+            index += len(self._types)
+
+        if not 0 <= index < len(self._types):
+            raise IndexError("TokenArray index out of range")
+
+        return index
+
+    def type_at(self, index: int) -> TokenType:
+        """Return the type of the token at the given index."""
+        return TOKEN_TYPES[self._types[index]]
+
+    def value_at(self, index: int) -> str:
+        """Return the value of the token at the given index."""
+        index = self._check_index(index)
+
+        if index in self._tokens:
+            return self._tokens[index].value
+
+        return self.text[self._starts[index] : self._ends[index]]
+
+    def value_is(self, index: int, value: str) -> bool:
+        """Check the value of the token at the given
+        index without extracting it from the source."""
+        index = self._check_index(index)
+
+        if index in self._tokens:
+            return self._tokens[index].value == value
+
+        start = self._starts[index]
+
+        return self._ends[index] - start == len(value) and self.text.startswith(
+            value, start
+        )
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = self._check_index(index)
+
+        if index in self._tokens:
+            return self._tokens[index]
+
+        line = self._lines[index]
+        start = self._starts[index]
+        end = self._ends[index]
+        column = self._column_shift(line) - self._line_start(line)
+
+        return Token(
+            TOKEN_TYPES[self._types[index]],
+            self.text[start:end],
+            Context(
+                line + self.start_line,
+                start + column,
+                line + self.start_line,
+                end + column,
+                self.source,
+            ),
+        )
+
+
 EOF = Token.generate(TokenType.EOF)
 EOL = Token.generate(TokenType.EOL)
@@ -1,5 +1,5 @@
-from collections.abc import Mapping, Sequence
-from typing import Type
+from collections.abc import Callable, Mapping, Sequence
+from typing import ClassVar, TextIO, Type
 
 from mau.environment.environment import Environment
 from mau.message import (
@@ -9,7 +9,7 @@ from mau.message import (
     MauVisitorDebugMessage,
     MauVisitorErrorMessage,
 )
-from mau.nodes.node import Node
+from mau.nodes.node import Node, NodeContentMixin
 from mau.text_buffer import adjust_context, adjust_context_dict
 
 
@@ -73,11 +73,110 @@ def create_visitor_exception(
     return MauException(message)
 
 
+class LazyMapping(Mapping):
+    """
+    A read-only mapping whose values are created
+    by a function the first time any of them is read.
+
+    Visitors use it, if `mau.visitor.lazy_node_data`
+    is true, for node data that templates rarely
+    need, like the context, the data of the parent,
+    and the labels, so that it is computed only
+    if used.
+    """
+
+    __slots__ = ("_function", "_values")
+
+    def __init__(self, function: Callable[[], Mapping]):
+        # The function is discarded once
+        # the values have been created.
+        self._function: Callable[[], Mapping] | None = function
+        self._values: Mapping = {}
+
+    def _get_values(self) -> Mapping:
+        if self._function is not None:
+            self._values = self._function()
+            self._function = None
+
+        return self._values
+
+    def __getitem__(self, key):
+        return self._get_values()[key]
+
+    def __iter__(self):
+        return iter(self._get_values())
+
+    def __len__(self) -> int:
+        return len(self._get_values())
+
+    def __repr__(self) -> str:
+        return repr(dict(self._get_values()))
+
+    def __reduce__(self):
+        # Copies and pickles are dictionaries.
+        return (dict, (dict(self._get_values()),))
+
+
 class BaseVisitor:
     # The output format that identifies this visitor.
     format_code = "python"
     extension = ""
 
+    # The functions that visit each node type,
+    # found the first time they are needed.
+    # Each visitor class has its own table.
+    _visit_functions: ClassVar[dict[str, Callable]] = {}
+
+    # Visitors that set this to True visit the
+    # content of nodes with an explicit stack
+    # instead of recursion. See _visit_descendants.
+    # The _visit_* functions of the content run
+    # in advance, children first, and also for
+    # nodes the parent never visits, so only
+    # visitors whose functions don't depend on
+    # the order of the visit and have no side
+    # effects can use it.
+    iterative_visit = False
+
+    # The results of the nodes visited in advance
+    # by _visit_descendants, indexed by node id.
+    _visited: dict[int, tuple] | None = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visit_functions = {}
+
+    @classmethod
+    def visit_function(cls, node_type: str) -> Callable:
+        """
+        Return the function that visits nodes of the
+        given type, that is the method `_visit_TYPE`
+        (with dashes replaced by underscores) or
+        `_visit_default` if it doesn't exist.
+        The function has to be called with the
+        visitor and the node.
+
+        Functions are looked up on the class and
+        stored per class, so a `_visit_TYPE`
+        method has to be defined in the class
+        (or a subclass). Methods assigned to an
+        instance, or added to a class after it
+        has been used, are not seen.
+        """
+        try:
+            return cls._visit_functions[node_type]
+        except KeyError:
+            pass
+
+        # Some node types contain a dash, which
+        # is not allowed in function names.
+        method_name = f"_visit_{node_type.replace('-', '_')}"
+
+        function = getattr(cls, method_name, None) or cls._visit_default
+        cls._visit_functions[node_type] = function
+
+        return function
+
     def __init__(
         self,
         message_handler: BaseMessageHandler,
@@ -92,6 +191,11 @@ class BaseVisitor:
         # The configuration environment
         self.environment: Environment = environment or Environment()
 
+        # If this is True the node data that is
+        # rarely needed is computed only if used.
+        # See LazyMapping.
+        self.lazy_node_data = self.environment.get("mau.visitor.lazy_node_data", False)
+
     def process(self, node: Node | None, **kwargs):
         # This function is the entry point of the visitor.
         # It visits a node, and the subnodes
@@ -110,6 +214,13 @@ class BaseVisitor:
 
         return result
 
+    def stream(self, node: Node | None, output: TextIO, **kwargs):
+        # Process the node and write the result
+        # to the given output. Visitors that
+        # render text can override this to write
+        # the result while it is created.
+        output.write(self.process(node, **kwargs))
+
     def _preprocess(self, node: Node | None, **kwargs):
         # The base visitor has no
         # preprocess code.
@@ -157,7 +268,27 @@ class BaseVisitor:
         if node is None:
             return {}
 
-        result = node.accept(self, **kwargs)
+        if self.iterative_visit and self._visited is None:
+            # Visit all the content of the node
+            # in advance, then the node itself.
+            visited_results: dict[int, tuple] = {}
+            self._visited = visited_results
+
+            try:
+                self._visit_descendants(node, visited_results, **kwargs)
+                result = self._accept(node, **kwargs)
+            finally:
+                self._visited = None
+        elif self._visited and (visited := self._visited.pop(id(node), None)):
+            # The node has been visited in advance.
+            visited_node, visited_kwargs, result, exception = visited
+
+            if visited_node is not node or visited_kwargs != kwargs:
+                result = self._accept(node, **kwargs)
+            elif exception is not None:
+                raise exception
+        else:
+            result = self._accept(node, **kwargs)
 
         # Get the internal tags from
         # the output. Check if they activate
@@ -170,6 +301,64 @@ class BaseVisitor:
 
         return result
 
+    def _accept(self, node: Node, **kwargs):
+        # Nodes that don't change the way they
+        # accept a visitor are visited directly.
+        if getattr(type(node), "accept", None) is Node.accept:
+            return self.visit_function(node.type)(self, node, **kwargs)
+
+        return node.accept(self, **kwargs)
+
+    def _visit_descendants(
+        self, node: Node, visited_results: dict[int, tuple], /, **kwargs
+    ):
+        # Run the visit functions of all the nodes
+        # in the content of the given one (and their
+        # content) children first, using a stack
+        # instead of recursion. The results are
+        # stored, and when the visit function of a
+        # node visits its content the results are
+        # already there, so visiting a tree never
+        # requires more than a few nested calls.
+        #
+        # Errors (MauException) are stored as well,
+        # and raised only if the parent visits the
+        # node. Other exceptions are bugs, and
+        # are raised immediately.
+        stack = [(node, iter(self._content_of(node)))]
+
+        while stack:
+            parent, children = stack[-1]
+
+            child = next(children, None)
+
+            if child is not None:
+                stack.append((child, iter(self._content_of(child))))
+                continue
+
+            # All the children of the parent
+            # have been visited.
+            stack.pop()
+
+            # The initial node is visited by the caller.
+            if not stack:
+                break
+
+            try:
+                result, exception = self._accept(parent, **kwargs), None
+            except MauException as raised:
+                result, exception = None, raised
+
+            visited_results[id(parent)] = (parent, kwargs, result, exception)
+
+    def _content_of(self, node: Node) -> Sequence[Node]:
+        # The nodes visited in advance by
+        # _visit_descendants.
+        if isinstance(node, NodeContentMixin):
+            return node.content
+
+        return []
+
     def visit_data(self, node: Node | None, **kwargs):
         # Visit a node and return its data dict,
         # skipping template rendering in subclass visitors.
@@ -207,10 +396,22 @@ class BaseVisitor:
             }
         )
 
+    def _lazy(self, function: Callable[[], Mapping]) -> Mapping:
+        # Return a LazyMapping that calls the
+        # function when needed, or the result
+        # of the function if node data is
+        # not lazy.
+        if self.lazy_node_data:
+            return LazyMapping(function)
+
+        return function()
+
     def _add_visit_labels(self, result: dict, node: Node, **kwargs):
         result.update(
             {
-                "labels": self.visitdict(node, node.labels, **kwargs),
+                "labels": self._lazy(
+                    lambda: self.visitdict(node, node.labels, **kwargs)
+                ),
             }
         )
 
@@ -218,7 +419,7 @@ class BaseVisitor:
         if not node:
             return {}
 
-        result = {
+        result: dict = {
             "_type": node.type,
             "args": node.arguments.unnamed_args,
             "kwargs": node.arguments.named_args,
@@ -228,7 +429,7 @@ class BaseVisitor:
         }
 
         if kwargs.get("add_context", True):
-            result["_context"] = node.info.context.asdict()
+            result["_context"] = self._lazy(node.info.context.asdict)
 
         return result
 
@@ -238,7 +439,9 @@ class BaseVisitor:
         data = self._get_node_data(node, **kwargs)
 
         if kwargs.get("add_parent", True):
-            data["parent"] = self._get_node_data(node.parent, **kwargs)
+            data["parent"] = self._lazy(
+                lambda: self._get_node_data(node.parent, **kwargs)
+            )
 
         return data
 
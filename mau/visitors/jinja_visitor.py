@@ -1,29 +1,91 @@
 from __future__ import annotations
 
+import copy
 import logging
 from collections import defaultdict
 from collections.abc import Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable
+from typing import Callable, TextIO
 
 import jinja2
 
 from mau.environment.environment import Environment
 from mau.message import BaseMessageHandler
-from mau.nodes.node import Node
+from mau.nodes.node import Node, NodeContentMixin
 from mau.visitors.base_visitor import (
     BaseVisitor,
     create_visitor_exception,
 )
+from mau.visitors.render_cache import RenderCache
+from mau.visitors.templates_cache import TemplatesCache
 
 logger = logging.getLogger(__name__)
 
+# The value given to the content of a node
+# when it is streamed. See JinjaVisitor.stream.
+STREAM_CONTENT_MARKER = "\x00\nMau streamed content\n\x00"
+
+# The methods that change how a node and its
+# content are processed. If a subclass overrides
+# one of them the node is not streamed.
+STREAM_UNSAFE_METHODS = (
+    "process",
+    "_preprocess",
+    "_postprocess",
+    "visit",
+    "visitlist",
+    "_visit_document",
+    "_visit_default",
+    "_get_node_data",
+    "_add_visit_content",
+)
+
 
 class TemplateNotFound(ValueError):
     pass
 
 
+@dataclass(frozen=True)
+class NodeSignature:
+    # This object contains the parts of a node
+    # that templates can claim, so nodes with
+    # the same signature match the same templates.
+    #
+    # The parent fields are None (or empty)
+    # if the node has no parent.
+
+    type: str
+    subtype: str | None = None
+    tags: frozenset[str] = frozenset()
+    custom: frozenset[tuple[str, str]] = frozenset()
+    parent_type: str | None = None
+    parent_subtype: str | None = None
+    parent_custom: frozenset[tuple[str, str]] = frozenset()
+
+    @classmethod
+    def from_node(cls, node: Node) -> NodeSignature:
+        signature = cls(
+            type=node.type,
+            subtype=node.arguments.subtype,
+            tags=frozenset(node.arguments.tags),
+            custom=frozenset(node.custom_template_fields.items()),
+        )
+
+        if not node.parent:
+            return signature
+
+        return cls(
+            type=signature.type,
+            subtype=signature.subtype,
+            tags=signature.tags,
+            custom=signature.custom,
+            parent_type=node.parent.type,
+            parent_subtype=node.parent.arguments.subtype,
+            parent_custom=frozenset(node.parent.custom_template_fields.items()),
+        )
+
+
 @dataclass
 class Template:
     # This object represents a template and its claims.
@@ -123,64 +185,126 @@ class Template:
     def match(self, node: Node, prefix: str | None = None) -> bool:
         # Check if the given node matches the
         # template claims.
-        if self.type and self.type != node.type:
+        return self.match_signature(NodeSignature.from_node(node), prefix)
+
+    def match_signature(
+        self, signature: NodeSignature, prefix: str | None = None
+    ) -> bool:
+        # Check if a node with the given
+        # signature matches the template claims.
+        if self.type and self.type != signature.type:
             return False
 
-        # Check all custom fields claimed
-        # by the template.
-        for key, value in self.custom.items():
-            # If the template has a custom field
-            # and the node doesn't we cannot match.
-            if key not in node.custom_template_fields:
-                return False
+        # All custom fields claimed by the
+        # template must be in the node
+        # with the same value.
+        if self.custom and not self.custom.items() <= signature.custom:
+            return False
 
-            # The node has the custom field,
-            # let's check the value.
-            node_value = node.custom_template_fields[key]
+        if self.prefix != prefix:
+            return False
 
-            if value != node_value:
-                return False
+        if self.subtype and self.subtype != signature.subtype:
+            return False
 
-        if self.prefix != prefix:
+        # Claims on the parent cannot
+        # match a node without parent.
+        if (
+            self.parent_custom or self.parent_type or self.parent_subtype
+        ) and signature.parent_type is None:
             return False
 
-        if self.subtype and self.subtype != node.arguments.subtype:
+        if self.parent_custom and not self.parent_custom.items() <= (
+            signature.parent_custom
+        ):
             return False
 
-        if self.parent_custom and not node.parent:
+        if self.parent_type and self.parent_type != signature.parent_type:
             return False
 
-        if self.parent_type and not node.parent:
+        if self.parent_subtype and self.parent_subtype != signature.parent_subtype:
             return False
 
-        if self.parent_subtype and not node.parent:
+        if self.tags and not signature.tags.issuperset(self.tags):
             return False
 
-        # Check all parent custom fields claimed
-        # by the template.
-        for key, value in self.parent_custom.items():
-            # If the template has a parent_custom field
-            # and the node parent doesn't we cannot match.
-            if key not in node.parent.custom_template_fields:
-                return False
+        return True
 
-            # The node has the custom field,
-            # let's check the value.
-            node_value = node.parent.custom_template_fields[key]
 
-            if value != node_value:
-                return False
+class NativeRenderer:
+    """
+    A renderer for templates that contain only
+    text and plain variables, like `{{ value }}`
+    or `<p>{{ content }}</p>`. These templates
+    are rendered joining strings, which gives
+    the same output as Jinja without the cost
+    of a full render.
+    """
 
-        if self.parent_type and self.parent_type != node.parent.type:
-            return False
+    def __init__(self, parts: list[tuple[str, bool]]):
+        # The parts of the template in the form
+        # (text, is_variable). For variables
+        # the text is the name of the variable.
+        self.parts = parts
 
-        if self.parent_subtype and self.parent_subtype != node.parent.arguments.subtype:
-            return False
+    @classmethod
+    def from_source(
+        cls, jinja_environment: jinja2.Environment, source: str
+    ) -> NativeRenderer | None:
+        # Create a renderer if the template
+        # has a simple shape, otherwise return None.
+
+        # Escaping and finalisation change
+        # the way Jinja prints variables.
+        if (
+            jinja_environment.autoescape is not False
+            or jinja_environment.finalize is not None
+        ):
+            return None
+
+        # Jinja parses the template with its
+        # own settings (delimiters, whitespace
+        # control, trailing newlines), so the
+        # text of the template is already the
+        # one Jinja would print.
+        try:
+            parsed = jinja_environment.parse(source)
+        except jinja2.exceptions.TemplateSyntaxError:
+            return None
+
+        parts = []
+        for output in parsed.body:
+            if not isinstance(output, jinja2.nodes.Output):
+                return None
+
+            for item in output.nodes:
+                if isinstance(item, jinja2.nodes.TemplateData):
+                    parts.append((item.data, False))
+                elif isinstance(item, jinja2.nodes.Name):
+                    parts.append((item.name, True))
+                else:
+                    return None
+
+        return cls(parts)
+
+    def render(self, variables: dict) -> str | None:
+        # Render the template with the given
+        # variables. If a variable is missing
+        # return None, as Jinja might
+        # find it somewhere else.
+        rendered = []
+
+        for text, is_variable in self.parts:
+            if not is_variable:
+                rendered.append(text)
+                continue
 
-        if self.tags and not set(self.tags).issubset(set(node.arguments.tags)):
-            return False
+            if text not in variables:
+                return None
 
-        return True
+            rendered.append(str(variables[text]))
+
+        return "".join(rendered)
 
 
 def _load_available_template_providers():  # pragma: no cover
@@ -288,6 +412,7 @@ def load_templates_from_filesystem(
     environment: Environment,
     extension: str,
     preprocess: Callable[[str], str] | None = None,
+    cache: TemplatesCache | None = None,
 ) -> Environment:
     # Scan a configured list of paths
     # for templates.
@@ -310,6 +435,24 @@ def load_templates_from_filesystem(
     # the loaded templates.
     templates = Environment()
 
+    # If there is a cache, the templates
+    # are loaded from the files only
+    # if they changed. The cache stores
+    # the content of the files, and the
+    # templates are preprocessed after
+    # they are loaded, so that changes to
+    # the preprocess function never give
+    # stale templates.
+    if cache is not None:
+        for path_templates in cache.load_templates(
+            templates_path_str_list,
+            extension,
+            lambda path_str: _load_templates_from_path(path_str, extension=extension),
+        ):
+            templates.dupdate(_preprocess_templates(path_templates, preprocess))
+
+        return templates
+
     # Loop through all paths and try
     # to load templates from there.
     for templates_path_str in templates_path_str_list:
@@ -324,6 +467,22 @@ def load_templates_from_filesystem(
     return templates
 
 
+def _preprocess_templates(
+    templates: dict, preprocess: Callable[[str], str] | None
+) -> dict:
+    # Apply the preprocess function to all
+    # the templates of a nested dictionary.
+    if preprocess is None:
+        return templates
+
+    return {
+        name: _preprocess_templates(value, preprocess)
+        if isinstance(value, dict)
+        else preprocess(value)
+        for name, value in templates.items()
+    }
+
+
 class JinjaVisitor(BaseVisitor):
     format_code = "jinja"
     extension = ".j2"
@@ -347,6 +506,16 @@ class JinjaVisitor(BaseVisitor):
     ):
         super().__init__(message_handler, environment)
 
+        # The configuration as a nested dictionary
+        # and the version of the environment
+        # it has been created from.
+        self._config_cache: tuple[int, dict] | None = None
+
+        # The optional cache of rendered nodes.
+        self.render_cache: RenderCache | None = None
+        if self.environment.get("mau.visitor.render_cache", False):
+            self.render_cache = RenderCache()
+
         # Load the template prefixes from the configuration.
         self.template_prefixes = environment.get("mau.visitor.templates.prefixes", [])
 
@@ -359,11 +528,22 @@ class JinjaVisitor(BaseVisitor):
         # Load the requested template providers from the configuration.
         templates_env.update(load_templates_from_providers(self.environment))
 
+        # The optional on-disk cache for
+        # templates and their bytecode.
+        templates_cache = None
+        if cache_dir := self.environment.get("mau.visitor.templates.cache_dir"):
+            templates_cache = TemplatesCache(
+                cache_dir,
+                key=f"{self.__class__.__module__}.{self.__class__.__qualname__}",
+                environment_options=self.jinja_environment_options,
+            )
+
         # Load user-defined templates from files.
         templates_from_filesystem = load_templates_from_filesystem(
             self.environment,
             extension=self.extension,
             preprocess=self.__class__.templates_preprocess,
+            cache=templates_cache,
         )
         templates_env.update(templates_from_filesystem)
 
@@ -417,24 +597,94 @@ class JinjaVisitor(BaseVisitor):
         for template in templates:
             self.templates[template.type].append(template)
 
+        # The same templates grouped by node
+        # type and prefix, as a template
+        # matches only its own prefix.
+        self._templates_index: dict[tuple[str, str | None], list[Template]] = (
+            defaultdict(list)
+        )
+        for template in templates:
+            self._templates_index[(template.type, template.prefix)].append(template)
+
+        # The template selected for each node
+        # signature, or None if there is none.
+        self._selected_templates: dict[NodeSignature, Template | None] = {}
+
         # A dictionary in the form {'name': 'source'}
         # that Jinja will use to host templates.
         jinja_templates = {t.name: t.content for t in templates}
 
+        # The context of the nodes is not part
+        # of the key of the render cache, so
+        # the cache is not used if any template
+        # reads it.
+        if self.render_cache is not None and any(
+            "_context" in content for content in jinja_templates.values()
+        ):
+            self.render_cache = None
+
+        # The options of the Jinja environment.
+        # With a cache, compiled templates
+        # are stored on disk.
+        jinja_environment_options = dict(self.jinja_environment_options)
+        if templates_cache is not None:
+            jinja_environment_options.setdefault(
+                "bytecode_cache", templates_cache.bytecode_cache
+            )
+
         # This is the Jinja environment.
         # We prepare it with all the templates we loaded
         # in the previous section of the function.
         self._dict_env = jinja2.Environment(
             loader=jinja2.DictLoader(jinja_templates),
-            **self.jinja_environment_options,
+            **jinja_environment_options,
         )
 
+        # The native renderers of simple templates,
+        # created the first time a template is used.
+        # The value is None if the template
+        # needs to be rendered by Jinja.
+        self._jinja_templates = jinja_templates
+        self._native_renderers: dict[str, NativeRenderer | None] = {}
+
+    def _config(self) -> dict:
+        # Return the configuration as a nested
+        # dictionary. Nesting all variables is
+        # expensive, so the dictionary is created
+        # again only when the environment changes.
+        version = self.environment.version
+
+        if self._config_cache is None or self._config_cache[0] != version:
+            self._config_cache = (version, self.environment.asdict())
+
+        return self._config_cache[1]
+
     def _render(
         self, node: Node, environment: Environment, template_full_name, **kwargs
     ) -> str:
         # This renders a template using the current
         # environment and the given parameters.
 
+        # Simple templates are rendered
+        # without going through Jinja.
+        try:
+            native_renderer = self._native_renderers[template_full_name]
+        except KeyError:
+            native_renderer = None
+
+            if template_full_name in self._jinja_templates:
+                native_renderer = NativeRenderer.from_source(
+                    self._dict_env, self._jinja_templates[template_full_name]
+                )
+
+            self._native_renderers[template_full_name] = native_renderer
+
+        if native_renderer is not None:
+            rendered_template = native_renderer.render(kwargs)
+
+            if rendered_template is not None:
+                return rendered_template
+
         # Get the template from the Jinja environment.
         try:
             template = self._dict_env.get_template(template_full_name)
@@ -444,9 +694,7 @@ class JinjaVisitor(BaseVisitor):
         # Render the template using the values
         # retrieved visiting the node.
         try:
-            rendered_template = template.render(
-                config=self.environment.asdict(), **kwargs
-            )
+            rendered_template = template.render(config=self._config(), **kwargs)
         except jinja2.exceptions.UndefinedError as exception:  # pragma: no cover
             raise create_visitor_exception(
                 text=f"Error rendering node with template {template_full_name}: {str(exception)}",
@@ -479,40 +727,46 @@ class JinjaVisitor(BaseVisitor):
             "Prefixes": self.template_prefixes,
         }
 
-    def _find_matching_template(self, node: Node, data: dict) -> Template:
-        # Find all templates available for
-        # this type of node in specificity order.
-        templates = self.templates[node.type]
+    def _select_template(self, signature: NodeSignature) -> Template | None:
+        # Find the first template that matches
+        # the signature. The test is performed
+        # on all given prefixes first, then on
+        # templates without prefix. Templates
+        # are in specificity order.
+        for prefix in [*self.template_prefixes, None]:
+            for template in self._templates_index.get((signature.type, prefix), []):
+                if template.match_signature(signature, prefix):
+                    return template
 
-        # The list of all matching templates.
-        matching_templates: list[Template] = []
+        return None
 
-        # Test all templates to find the matching ones.
-        # The test is performed on all given prefixes first.
-        for prefix in self.template_prefixes:
-            matching_templates.extend(
-                [t for t in templates if t.match(node, prefix)],
-            )
+    def _find_matching_template(self, node: Node, data: dict) -> Template:
+        # Nodes with the same signature match
+        # the same templates, so the selection
+        # is performed once for each signature.
+        signature = NodeSignature.from_node(node)
 
-        # Now let's add the matching templates without prefix.
-        matching_templates.extend([t for t in templates if t.match(node)])
+        try:
+            template = self._selected_templates[signature]
+        except KeyError:
+            template = self._select_template(signature)
+            self._selected_templates[signature] = template
 
         # If there are no matching templates
         # we are in trouble. Let's print out
         # a message to help the user to debug.
-        if not matching_templates:
+        if template is None:
             raise create_visitor_exception(
                 text="Cannot find a suitable template.",
                 node=node,
                 data=data,
                 environment=self.environment,
                 additional_info={
-                    "Templates found": templates,
+                    "Templates found": self.templates[node.type],
                 },
             )
 
-        # Select the first template that matches.
-        return matching_templates[0]
+        return template
 
     def visit(self, node: Node | None, **kwargs) -> str:
         # Visit the node and extract a dictionary of
@@ -528,13 +782,33 @@ class JinjaVisitor(BaseVisitor):
         if node is None:
             return ""
 
+        # If the same structure has already been
+        # rendered, reuse the result. Keyword
+        # arguments can change the data of the
+        # node, so they disable the cache.
+        render_cache = self.render_cache
+        cache_key = None
+        if render_cache is not None and not kwargs:
+            cache_key = render_cache.key(node, self.environment.version)
+
+            if cache_key is not None:
+                rendered = render_cache.get(cache_key)
+
+                if rendered is not None:
+                    return rendered
+
         # Visit the node.
         data = super().visit(node, **kwargs)
 
         # Find a matching template.
         template = self._find_matching_template(node, data)
 
-        return self._render(node, self.environment, template.name, **data)
+        rendered = self._render(node, self.environment, template.name, **data)
+
+        if render_cache is not None and cache_key is not None:
+            render_cache.add(cache_key, rendered)
+
+        return rendered
 
     def visitlist(
         self, current_node: Node, nodes_list: Sequence[Node], **kwargs
@@ -548,3 +822,104 @@ class JinjaVisitor(BaseVisitor):
 
         # Join the results.
         return join_with.join(visited_nodes)
+
+    def _prints_content_once(self, template_full_name: str) -> bool:
+        # Check if the template prints the
+        # variable content exactly once and
+        # without any change, so that the
+        # output of the children can be
+        # written in its place.
+        source = self._jinja_templates.get(template_full_name)
+
+        if source is None:
+            return False
+
+        try:
+            parsed = self._dict_env.parse(source)
+        except jinja2.exceptions.TemplateSyntaxError:
+            return False
+
+        # Other templates might use the content.
+        if any(
+            parsed.find_all(
+                (jinja2.nodes.Extends, jinja2.nodes.Include, jinja2.nodes.Import)
+            )
+        ):
+            return False
+
+        def is_content(item: jinja2.nodes.Node) -> bool:
+            return isinstance(item, jinja2.nodes.Name) and item.name == "content"
+
+        # All uses of the variable, and those
+        # that print it directly.
+        used = [item for item in parsed.find_all(jinja2.nodes.Name) if is_content(item)]
+        printed = [
+            item
+            for output in parsed.find_all(jinja2.nodes.Output)
+            for item in output.nodes
+            if is_content(item)
+        ]
+
+        return len(used) == 1 and len(printed) == 1
+
+    def stream(self, node: Node | None, output: TextIO, **kwargs):
+        # Render the node and write the result to
+        # the output, writing each child as soon
+        # as it has been rendered, so that the
+        # whole output is never in memory.
+        #
+        # The node is rendered with a marker in
+        # place of its content, and the children
+        # are written where the marker is.
+        # If this is not possible (e.g. the
+        # template changes the content or the
+        # visitor overrides the way nodes are
+        # visited or processed) the node is
+        # rendered in the usual way, with
+        # the method process.
+        def write_rendered():
+            output.write(self.process(node, **kwargs))
+
+        if (
+            not isinstance(node, NodeContentMixin)
+            or "transformer" in kwargs
+            or any(
+                getattr(type(self), name) is not getattr(JinjaVisitor, name)
+                for name in STREAM_UNSAFE_METHODS
+            )
+        ):
+            write_rendered()
+            return
+
+        # Visit a copy of the node without children.
+        shell = copy.copy(node)
+        shell.content = []
+
+        data = BaseVisitor.visit(self, shell, **kwargs)
+        data["content"] = STREAM_CONTENT_MARKER
+
+        template = self._find_matching_template(shell, data)
+
+        if not self._prints_content_once(template.name):
+            write_rendered()
+            return
+
+        rendered = self._render(shell, self.environment, template.name, **data)
+
+        if rendered.count(STREAM_CONTENT_MARKER) != 1:
+            write_rendered()
+            return
+
+        before, after = rendered.split(STREAM_CONTENT_MARKER)
+
+        join_with = self.join_with.get(node.type, self.join_with_default)
+
+        output.write(before)
+
+        for index, child in enumerate(node.content):
+            if index:
+                output.write(join_with)
+
+            output.write(self.visit(child, **kwargs))
+
+        output.write(after)
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator, Mapping
+from weakref import WeakKeyDictionary
+
+from mau.nodes.node import Node
+from mau.nodes.node_arguments import NodeArguments
+
+# The attributes of a node that are not part
+# of its fields. The arguments are described
+# separately, and the context is ignored.
+NON_FIELD_ATTRIBUTES = {"parent", "info", "arguments"}
+
+# The attributes whose nodes are always
+# children of the node, described by
+# their structure.
+CHILD_ATTRIBUTES = {"content", "labels"}
+
+
+class _Reference:
+    # An object compared by identity, used for the
+    # values that cannot be described by their
+    # structure (e.g. nodes outside the subtree).
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, _Reference) and other.value is self.value
+
+    def __hash__(self):
+        return id(self.value)
+
+
+def _freeze(value, describe_node: Callable[[Node], object] | None = None):
+    # Convert a value into a hashable one
+    # that is equal for equal values. Nodes
+    # are described by the given function,
+    # or referenced by identity.
+    if type(value) is str:
+        return value
+
+    if value is None or isinstance(value, (bool, int, float)):
+        # Types are kept, as True == 1.
+        return (type(value).__name__, value)
+
+    if isinstance(value, Node) and describe_node is not None:
+        return describe_node(value)
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item, describe_node) for item in value)
+
+    if isinstance(value, Mapping):
+        return ("mapping",) + tuple(
+            (_freeze(key), _freeze(item, describe_node)) for key, item in value.items()
+        )
+
+    return _Reference(value)
+
+
+def _freeze_arguments(arguments: NodeArguments):
+    return (
+        _freeze(arguments.unnamed_args),
+        _freeze(arguments.named_args),
+        _freeze(arguments.tags),
+        _freeze(arguments.internal_tags),
+        arguments.subtype,
+    )
+
+
+def _nodes_in(value) -> Iterator[Node]:
+    # The nodes contained in a value,
+    # directly or in lists and mappings.
+    if isinstance(value, Node):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _nodes_in(item)
+    elif isinstance(value, Mapping):
+        for item in value.values():
+            yield from _nodes_in(item)
+
+
+def _is_child(node: Node, name: str, value: Node) -> bool:
+    # Nodes in the content and in the labels are
+    # children, as are the nodes in the other
+    # attributes whose parent is the given node
+    # (e.g. the lines of a source block). Other
+    # nodes (e.g. the headers in the ToC) are
+    # outside the subtree.
+    return name in CHILD_ATTRIBUTES or value.parent is node
+
+
+def _children(node: Node) -> list[Node]:
+    # The nodes whose structure is part
+    # of the structure of the given one.
+    return [
+        child
+        for name, value in vars(node).items()
+        if name not in NON_FIELD_ATTRIBUTES
+        for child in _nodes_in(value)
+        if _is_child(node, name, child)
+    ]
+
+
+class RenderCache:
+    """
+    A cache of rendered nodes, so that subtrees
+    with the same structure are rendered once.
+
+    The structure of a node is described by its
+    class, type, arguments, and fields, where
+    the nodes of its subtree (content, labels,
+    and the other nodes it is the parent of)
+    are described by their structures.
+    Each different structure gets a number,
+    so describing a node requires only the
+    numbers of its children, and each node
+    is described once, children first.
+
+    The key of a rendered node contains its
+    structure and the parts of the parent that
+    templates can use (type, arguments, and
+    custom template fields). The context of
+    the nodes is not part of the key, so
+    templates that read it must not use
+    the cache.
+    """
+
+    def __init__(self):
+        # The number of successful and
+        # failed searches in the cache.
+        self.hits = 0
+        self.misses = 0
+
+        # The number of each structure.
+        self._structures: dict[tuple, int] = {}
+
+        # The structures that contain nodes with
+        # the internal tag "debug". They are not
+        # cached, as debug messages are created
+        # when nodes are visited.
+        self._debug_structures: set[int] = set()
+
+        # The structure of each described node.
+        self._node_structures: WeakKeyDictionary[Node, int] = WeakKeyDictionary()
+
+        # The rendered text of each key.
+        self._rendered: dict[tuple, str] = {}
+
+    def _describe(self, node: Node) -> int:
+        # Describe a node whose children
+        # have already been described.
+        children = _children(node)
+        node_structures = self._node_structures
+
+        fields = []
+        for name, value in vars(node).items():
+            if name in NON_FIELD_ATTRIBUTES:
+                continue
+
+            def describe_node(child: Node, name=name):
+                if _is_child(node, name, child):
+                    return ("node", node_structures[child])
+
+                return _Reference(child)
+
+            fields.append((name, _freeze(value, describe_node)))
+
+        structure = (
+            type(node),
+            node.type,
+            _freeze_arguments(node.arguments),
+            tuple(fields),
+        )
+
+        structure_id = self._structures.setdefault(structure, len(self._structures))
+
+        if "debug" in node.arguments.internal_tags or any(
+            self._node_structures[child] in self._debug_structures for child in children
+        ):
+            self._debug_structures.add(structure_id)
+
+        self._node_structures[node] = structure_id
+
+        return structure_id
+
+    def structure(self, node: Node) -> int:
+        """
+        Return the number of the structure of
+        the node, describing the node and all
+        the nodes below it that have not been
+        described yet, children first.
+        """
+
+        if (structure_id := self._node_structures.get(node)) is not None:
+            return structure_id
+
+        # Describe the subtree with a stack,
+        # so that deep trees don't cause
+        # deep recursion.
+        stack = [(node, iter(_children(node)))]
+
+        while stack:
+            parent, children = stack[-1]
+
+            child = next(children, None)
+
+            if child is not None:
+                if child not in self._node_structures:
+                    stack.append((child, iter(_children(child))))
+
+                continue
+
+            stack.pop()
+            self._describe(parent)
+
+        return self._node_structures[node]
+
+    def key(self, node: Node, *extra) -> tuple | None:
+        """
+        Return the key of the rendered node, or None
+        if the node cannot be cached. Any other
+        value the rendered text depends on can be
+        added to the key.
+        """
+
+        structure_id = self.structure(node)
+
+        if structure_id in self._debug_structures:
+            return None
+
+        parent = node.parent
+        parent_claims = None
+
+        if parent is not None:
+            parent_claims = (
+                parent.type,
+                _freeze_arguments(parent.arguments),
+                _freeze(parent.custom_template_fields),
+            )
+
+        return (structure_id, parent_claims, *extra)
+
+    def get(self, key: tuple) -> str | None:
+        """
+        Return the text rendered for the key,
+        or None if it is not in the cache.
+        """
+
+        rendered = self._rendered.get(key)
+
+        if rendered is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return rendered
+
+    def add(self, key: tuple, rendered: str):
+        """Store the text rendered for the key."""
+        self._rendered[key] = rendered
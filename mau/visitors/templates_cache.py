@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import jinja2
+
+logger = logging.getLogger(__name__)
+
+# The version of the manifest format.
+# Manifests with a different version
+# are ignored.
+MANIFEST_VERSION = 1
+
+
+def snapshot_templates_paths(paths: list[str], extension: str) -> dict[str, list[int]]:
+    """
+    Return the modification time and the size
+    of all files with the given extension in
+    the given paths and their subpaths,
+    keyed by absolute path.
+    """
+
+    snapshot: dict[str, list[int]] = {}
+
+    for path_str in paths:
+        if not path_str:
+            continue
+
+        for root, _, files in os.walk(Path(path_str).resolve(), followlinks=True):
+            for name in sorted(files):
+                if not name.endswith(extension):
+                    continue
+
+                file_path = os.path.join(root, name)
+                stat = os.stat(file_path)
+                snapshot[file_path] = [stat.st_mtime_ns, stat.st_size]
+
+    return snapshot
+
+
+def _describe_option(value) -> str:
+    # Describe the options of the Jinja environment
+    # that cannot be converted to JSON. Classes and
+    # functions are described by their name, as
+    # their representation changes at each run.
+    module = getattr(value, "__module__", None)
+    qualname = getattr(value, "__qualname__", None)
+
+    if module is not None and qualname is not None:
+        return f"{module}.{qualname}"
+
+    return repr(value)
+
+
+class TemplatesCache:
+    """
+    An on-disk cache for the templates of a
+    JinjaVisitor.
+
+    The cache stores a manifest with the content
+    of the template paths and a snapshot of their
+    files (modification time and size). If the
+    files didn't change the templates are loaded
+    from the manifest without reading them.
+
+    The cache also provides a Jinja bytecode cache,
+    so that templates are compiled only once.
+    Jinja checks the source of each template
+    before using the bytecode, but not the options
+    of the Jinja environment (e.g. the delimiters),
+    so each visitor and set of options has its
+    own bytecode directory.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        key: str,
+        environment_options: dict | None = None,
+    ):
+        self.cache_dir = Path(cache_dir)
+
+        # The key identifies the visitor.
+        self.key = key
+
+        options = json.dumps(
+            [key, environment_options or {}], sort_keys=True, default=_describe_option
+        )
+        options_digest = hashlib.sha1(options.encode()).hexdigest()
+
+        self.bytecode_dir = self.cache_dir / "bytecode" / options_digest
+        self.bytecode_dir.mkdir(parents=True, exist_ok=True)
+
+        self.bytecode_cache = jinja2.FileSystemBytecodeCache(
+            self.bytecode_dir.as_posix()
+        )
+
+    def _manifest_path(self, paths: list[str], extension: str) -> Path:
+        # Each visitor, set of paths, and
+        # extension has its own manifest.
+        key = json.dumps(
+            [self.key, extension, [Path(p).resolve().as_posix() for p in paths if p]]
+        )
+        digest = hashlib.sha1(key.encode()).hexdigest()
+
+        return self.cache_dir / f"templates-{digest}.json"
+
+    def _read_manifest(self, manifest_path: Path) -> dict | None:
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(manifest, dict):
+            return None
+
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+
+        return manifest
+
+    def _write_manifest(self, manifest_path: Path, manifest: dict):
+        # Write the manifest in a temporary
+        # file and move it, so that other
+        # processes never read a partial file.
+        temp_path = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            temp_path.write_text(json.dumps(manifest))
+            os.replace(temp_path, manifest_path)
+        except OSError as exception:  # pragma: no cover
+            logger.warning(f"Cannot write the templates cache: {exception}")
+
+    def load_templates(
+        self,
+        paths: list[str],
+        extension: str,
+        load_path: Callable[[str], dict],
+    ) -> list[dict]:
+        """
+        Return the templates loaded from each path
+        with the function load_path, using the
+        manifest if the files didn't change.
+        """
+
+        manifest_path = self._manifest_path(paths, extension)
+        snapshot = snapshot_templates_paths(paths, extension)
+
+        manifest = self._read_manifest(manifest_path)
+
+        if manifest is not None and manifest.get("files") == snapshot:
+            return manifest["templates"]
+
+        templates = [load_path(path_str) for path_str in paths]
+
+        self._write_manifest(
+            manifest_path,
+            {
+                "version": MANIFEST_VERSION,
+                "files": snapshot,
+                "templates": templates,
+            },
+        )
+
+        return templates
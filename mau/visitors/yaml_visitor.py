@@ -1,6 +1,6 @@
 import yaml
 
-from mau.visitors.base_visitor import BaseVisitor
+from mau.visitors.base_visitor import BaseVisitor, LazyMapping
 
 
 class NoAliasDumper(yaml.SafeDumper):
@@ -8,6 +8,12 @@ class NoAliasDumper(yaml.SafeDumper):
         return True
 
 
+# Lazy node data is dumped as a dictionary.
+NoAliasDumper.add_representer(
+    LazyMapping, lambda dumper, data: dumper.represent_dict(dict(data))
+)
+
+
 class YamlVisitor(BaseVisitor):
     format_code = "yaml"
     extension = "yaml"
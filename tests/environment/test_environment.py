@@ -1,6 +1,10 @@
 import pytest
 
-from mau.environment.environment import Environment
+from mau.environment.environment import (
+    MAX_SHARED_LAYERS,
+    Environment,
+    EnvironmentView,
+)
 
 
 def test_init():
@@ -371,3 +375,123 @@ def test_update_no_overwrite_with_namespace():
     environment.update(other, namespace, overwrite=False)
 
     assert environment.asdict() == {"somespace": {"var1": "valueX", "var2": "value2"}}
+
+
+def test_create_from_other_environment_is_independent():
+    # Test that an Environment created from
+    # another one doesn't see later changes
+    # and doesn't change the original one.
+
+    environment_src = Environment.from_dict({"var1": "value1"})
+    environment_dst = Environment.from_environment(environment_src)
+
+    environment_src["var2"] = "value2"
+    environment_dst["var1"] = "valueX"
+    environment_dst["var3"] = "value3"
+
+    assert environment_src.asdict() == {"var1": "value1", "var2": "value2"}
+    assert environment_dst.asdict() == {"var1": "valueX", "var3": "value3"}
+
+
+def test_create_from_other_environment_shares_variables():
+    # Test that an Environment created from
+    # another one stores only its own variables.
+
+    environment_src = Environment.from_dict({"var1": "value1"})
+    environment_dst = Environment.from_environment(environment_src)
+
+    environment_dst["var2"] = "value2"
+
+    assert environment_dst._variables.maps[0] == {"var2": "value2"}
+    assert environment_dst._variables.maps[1] is environment_src._variables.maps[1]
+
+
+def test_create_from_other_environment_merges_layers():
+    environment = Environment()
+
+    for i in range(MAX_SHARED_LAYERS + 5):
+        environment[f"var{i}"] = str(i)
+        environment = Environment.from_environment(environment)
+
+    assert len(environment._variables.maps) <= MAX_SHARED_LAYERS + 1
+    assert environment.get("var0") == "0"
+    assert environment.get(f"var{MAX_SHARED_LAYERS + 4}") == str(MAX_SHARED_LAYERS + 4)
+
+
+def test_as_flat_dict_merges_layers():
+    environment_src = Environment.from_dict({"var1": "value1"})
+    environment_dst = Environment.from_environment(environment_src)
+    environment_dst["var2"] = "value2"
+
+    assert environment_dst.asflatdict() == {"var1": "value1", "var2": "value2"}
+    assert len(environment_dst._variables.maps) == 1
+
+
+def test_get_namespace_returns_a_view():
+    environment = Environment.from_dict({"top": {"var1": "value1"}})
+
+    view = environment.get("top")
+
+    assert isinstance(view, EnvironmentView)
+    assert view["var1"] == "value1"
+
+    # The view reflects changes of the environment.
+    environment["top.var2"] = "value2"
+
+    assert view.asflatdict() == {"var1": "value1", "var2": "value2"}
+
+
+def test_get_namespace_view_is_read_only():
+    environment = Environment.from_dict({"top": {"var1": "value1"}})
+
+    view = environment.get("top")
+
+    with pytest.raises(TypeError):
+        view["var2"] = "value2"
+
+    with pytest.raises(TypeError):
+        view.update(Environment.from_dict({"var2": "value2"}))
+
+    # A copy of the view can be changed.
+    environment_copy = Environment.from_environment(view)
+    environment_copy["var2"] = "value2"
+
+    assert environment_copy.asdict() == {"var1": "value1", "var2": "value2"}
+    assert environment.asdict() == {"top": {"var1": "value1"}}
+
+
+def test_get_namespace_keeps_the_order_of_variables():
+    environment = Environment.from_dict({"top": {"b": "1", "c": "2", "a": "3"}})
+    environment.get("top")
+
+    environment_dst = Environment.from_environment(environment)
+    environment_dst["top.aa"] = "4"
+
+    assert list(environment_dst.get("top").asflatdict()) == ["b", "c", "a", "aa"]
+
+    # The index of the original environment is not changed.
+    assert environment.get("top.aa") is None
+
+
+def test_get_namespace_does_not_match_similar_keys():
+    environment = Environment.from_dict(
+        {"top": {"var": "1"}, "top-level": "2", "top/level": "3", "topmost.var": "4"}
+    )
+
+    assert environment.get("top").asflatdict() == {"var": "1"}
+
+
+def test_version_changes_when_variables_are_stored():
+    environment = Environment()
+    version = environment.version
+
+    environment["var1"] = "value1"
+    assert environment.version != version
+
+    version = environment.version
+    environment.update(Environment.from_dict({"var2": "value2"}))
+    assert environment.version != version
+
+    # Views follow the environment.
+    environment["top.var3"] = "value3"
+    assert environment.get("top").version == environment.version
@@ -1,3 +1,4 @@
+import re
 import textwrap
 from unittest.mock import Mock, patch
 
@@ -62,6 +63,21 @@ def test_text_buffer_properties():
     mock_text_buffer.skip.assert_called_with(8)
 
 
+def test_match_tail():
+    text_buffer = TextBuffer("abc def\nghi", source_filename=TEST_CONTEXT_SOURCE)
+    text_buffer.skip(4)
+
+    lex = BaseLexer(
+        text_buffer,
+        NullMessageHandler(),
+    )
+
+    match = lex._match_tail(re.compile(r"[a-z]+$"))
+
+    assert match.group() == "def"
+    assert lex._match_tail(re.compile(r"abc")) is None
+
+
 def test_create_token_and_skip():
     text_buffer = TextBuffer("somevalue", source_filename=TEST_CONTEXT_SOURCE)
 
@@ -381,3 +397,28 @@ def test_text_buffer_offset():
             Token(TokenType.EOF, "", generate_context(12, 0, 12, 0)),
         ],
     )
+
+
+def test_tokenize():
+    text_buffer = TextBuffer(
+        "Just simple text\n\nMore text", source_filename=TEST_CONTEXT_SOURCE
+    )
+
+    lex = init_lexer(text_buffer)
+    tokens = lex.tokenize()
+
+    assert next(tokens) == Token(
+        TokenType.TEXT, "Just simple text", generate_context(0, 0, 0, 16)
+    )
+
+    compare_asdict_list(
+        list(tokens),
+        [
+            Token(TokenType.EOL, "", generate_context(1, 0, 1, 0)),
+            Token(TokenType.TEXT, "More text", generate_context(2, 0, 2, 9)),
+            Token(TokenType.EOF, "", generate_context(3, 0, 3, 0)),
+        ],
+    )
+
+    # The tokens are not stored in the lexer.
+    assert lex.tokens == []
@@ -5,6 +5,7 @@ from mau.lexers.document_lexer import DocumentLexer
 from mau.message import MauException, MauMessageType
 from mau.test_helpers import (
     TEST_CONTEXT_SOURCE,
+    NullMessageHandler,
     compare_asdict_list,
     dedent,
     generate_context,
@@ -12,7 +13,7 @@ from mau.test_helpers import (
     lexer_runner_factory,
 )
 from mau.text_buffer import TextBuffer
-from mau.token import Token
+from mau.token import TextViewToken, Token
 
 init_lexer = init_lexer_factory(DocumentLexer)
 
@@ -577,6 +578,84 @@ def test_block_inside_block():
     )
 
 
+def test_block_content_is_lexed_in_place():
+    text = dedent(
+        """
+        ----
+        ++++
+        Some text
+        ++++
+        ----
+        """
+    )
+
+    lex = runner(text)
+
+    content = lex.tokens[1]
+
+    assert isinstance(content, TextViewToken)
+    assert content.text == text
+    assert content.value == "++++\nSome text\n++++"
+
+    # The content can be lexed in place
+    # and gives the same tokens as its value.
+    text_buffer = TextBuffer(
+        content.text,
+        1,
+        0,
+        TEST_CONTEXT_SOURCE,
+        content.start_offset,
+        content.end_offset,
+    )
+    lexer = DocumentLexer(text_buffer, NullMessageHandler())
+    lexer.process()
+
+    compare_asdict_list(
+        lexer.tokens,
+        [
+            Token(TokenType.BLOCK, "++++", generate_context(1, 0, 1, 4)),
+            Token(TokenType.TEXT, "Some text", generate_context(2, 0, 2, 9)),
+            Token(TokenType.BLOCK, "++++", generate_context(3, 0, 3, 4)),
+            Token(TokenType.EOF, "", generate_context(4, 0, 4, 0)),
+        ],
+    )
+
+
+def test_block_closing_delimiter_is_a_whole_line():
+    lex = runner(
+        dedent(
+            """
+            ----
+            -----
+            ---- text
+            ----
+            """
+        )
+    )
+
+    compare_asdict_list(
+        lex.tokens,
+        [
+            Token(TokenType.BLOCK, "----", generate_context(0, 0, 0, 4)),
+            Token(
+                TokenType.TEXT,
+                "-----\n---- text",
+                generate_context(1, 0, 2, 9),
+            ),
+            Token(TokenType.BLOCK, "----", generate_context(3, 0, 3, 4)),
+            Token(TokenType.EOF, "", generate_context(4, 0, 4, 0)),
+        ],
+    )
+
+
+def test_block_unclosed_with_content():
+    with pytest.raises(MauException) as exc:
+        runner("----\ntext\n----- ")
+
+    assert exc.value.message.type == MauMessageType.ERROR_LEXER
+    assert exc.value.message.text == "Unclosed block."
+
+
 def test_block_unclosed():
     with pytest.raises(MauException) as exc:
         runner("----")
@@ -704,3 +783,46 @@ def test_control_with_space():
             Token(TokenType.EOF, "", generate_context(1, 0, 1, 0)),
         ],
     )
+
+
+def test_line_classifier_candidates():
+    text_buffer = TextBuffer("= Header")
+    lex = init_lexer(text_buffer)
+
+    assert lex._process_functions() == [
+        lex._process_block,
+        lex._process_header,
+        lex._process_text,
+    ]
+
+
+def test_line_classifier_candidates_for_text():
+    text_buffer = TextBuffer("Just some text")
+    lex = init_lexer(text_buffer)
+
+    assert lex._process_functions() == [
+        lex._process_block,
+        lex._process_text,
+    ]
+
+
+def test_block_with_syntax_characters():
+    lex = runner(
+        dedent(
+            """
+            ====
+            Some text
+            ====
+            """
+        )
+    )
+
+    compare_asdict_list(
+        lex.tokens,
+        [
+            Token(TokenType.BLOCK, "====", generate_context(0, 0, 0, 4)),
+            Token(TokenType.TEXT, "Some text", generate_context(1, 0, 1, 9)),
+            Token(TokenType.BLOCK, "====", generate_context(2, 0, 2, 4)),
+            Token(TokenType.EOF, "", generate_context(3, 0, 3, 0)),
+        ],
+    )
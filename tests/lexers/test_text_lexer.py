@@ -331,3 +331,41 @@ def test_escaped_percent():
             Token(TokenType.EOF, "", generate_context(0, 11, 0, 11)),
         ],
     )
+
+
+def test_multiple_spaces_and_trailing_spaces():
+    lex = runner("Some   *text*  ")
+
+    compare_asdict_list(
+        lex.tokens,
+        [
+            Token(TokenType.TEXT, "Some", generate_context(0, 0, 0, 4)),
+            Token(TokenType.TEXT, " ", generate_context(0, 4, 0, 5)),
+            Token(TokenType.TEXT, " ", generate_context(0, 5, 0, 6)),
+            Token(TokenType.TEXT, " ", generate_context(0, 6, 0, 7)),
+            Token(TokenType.LITERAL, "*", generate_context(0, 7, 0, 8)),
+            Token(TokenType.TEXT, "text", generate_context(0, 8, 0, 12)),
+            Token(TokenType.LITERAL, "*", generate_context(0, 12, 0, 13)),
+            Token(TokenType.EOF, "", generate_context(1, 0, 1, 0)),
+        ],
+    )
+
+
+def test_multiple_lines():
+    lex = runner("Line _one_\n\nline two")
+
+    compare_asdict_list(
+        lex.tokens,
+        [
+            Token(TokenType.TEXT, "Line", generate_context(0, 0, 0, 4)),
+            Token(TokenType.TEXT, " ", generate_context(0, 4, 0, 5)),
+            Token(TokenType.LITERAL, "_", generate_context(0, 5, 0, 6)),
+            Token(TokenType.TEXT, "one", generate_context(0, 6, 0, 9)),
+            Token(TokenType.LITERAL, "_", generate_context(0, 9, 0, 10)),
+            Token(TokenType.EOL, "", generate_context(1, 0, 1, 0)),
+            Token(TokenType.TEXT, "line", generate_context(2, 0, 2, 4)),
+            Token(TokenType.TEXT, " ", generate_context(2, 4, 2, 5)),
+            Token(TokenType.TEXT, "two", generate_context(2, 5, 2, 8)),
+            Token(TokenType.EOF, "", generate_context(2, 8, 2, 8)),
+        ],
+    )
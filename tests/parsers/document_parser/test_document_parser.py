@@ -12,6 +12,7 @@ from mau.test_helpers import (
     init_parser_factory,
     parser_runner_factory,
 )
+from mau.token import TokenType
 
 init_parser = init_parser_factory(DocumentLexer, DocumentParser)
 
@@ -107,3 +108,21 @@ def test_parenthood_document():
             ),
         ],
     )
+
+
+def test_dispatch_table():
+    parser = init_parser("")
+    process_functions = parser._process_functions()
+
+    dispatch_table = parser._dispatch_table(process_functions)
+
+    assert dispatch_table[TokenType.EOL] == [process_functions[0]]
+    assert dispatch_table[TokenType.TEXT] == [process_functions[-1]]
+    assert sum(len(i) for i in dispatch_table.values()) == len(process_functions)
+
+
+def test_dispatch_table_unknown_function():
+    parser = init_parser("")
+    process_functions = parser._process_functions() + [lambda: True]
+
+    assert parser._dispatch_table(process_functions) == {}
@@ -0,0 +1,152 @@
+from mau.environment.environment import Environment
+from mau.lexers.document_lexer import DocumentLexer
+from mau.nodes.inline import StyleNode, TextNode
+from mau.nodes.node import NodeInfo
+from mau.parsers.document_parser import DocumentParser
+from mau.parsers.managers.inline_cache_manager import InlineCacheManager
+from mau.test_helpers import (
+    compare_nodes_sequence,
+    generate_context,
+    parser_runner_factory,
+)
+from mau.text_buffer import Context
+
+runner = parser_runner_factory(DocumentLexer, DocumentParser)
+
+
+def test_inline_cache_manager_init():
+    icm = InlineCacheManager(16)
+
+    assert icm.size == 16
+    assert icm.hits == 0
+    assert icm.misses == 0
+
+
+def test_inline_cache_manager_miss():
+    icm = InlineCacheManager()
+
+    assert icm.get("Some text", generate_context(0, 0, 0, 9)) is None
+    assert icm.misses == 1
+
+
+def test_inline_cache_manager_hit_moves_nodes():
+    icm = InlineCacheManager()
+
+    nodes = [
+        StyleNode(
+            "star",
+            content=[
+                TextNode("text", info=NodeInfo(context=generate_context(1, 3, 1, 7)))
+            ],
+            info=NodeInfo(context=generate_context(1, 2, 1, 8)),
+        )
+    ]
+
+    icm.add("*text*", generate_context(1, 2, 1, 8), nodes)
+
+    cached_nodes = icm.get("*text*", Context(5, 2, 5, 8, "other.py"))
+
+    assert icm.hits == 1
+
+    compare_nodes_sequence(
+        cached_nodes,
+        [
+            StyleNode(
+                "star",
+                content=[
+                    TextNode(
+                        "text",
+                        info=NodeInfo(context=Context(5, 3, 5, 7, "other.py")),
+                    )
+                ],
+                info=NodeInfo(context=Context(5, 2, 5, 8, "other.py")),
+            )
+        ],
+    )
+
+    # The cached nodes are copies.
+    assert cached_nodes[0] is not nodes[0]
+    assert cached_nodes[0].content[0].parent is cached_nodes[0]
+
+
+def test_inline_cache_manager_key_contains_column():
+    icm = InlineCacheManager()
+
+    icm.add("Some text", generate_context(0, 0, 0, 9), [])
+
+    assert icm.get("Some text", generate_context(1, 2, 1, 11)) is None
+
+
+def test_inline_cache_manager_does_not_cache_macros():
+    icm = InlineCacheManager()
+
+    icm.add("[link](https://example.org)", generate_context(0, 0, 0, 27), [])
+
+    assert icm.get("[link](https://example.org)", generate_context(0, 0, 0, 27)) is None
+    assert icm.misses == 0
+
+
+def test_inline_cache_manager_discards_least_recently_used():
+    icm = InlineCacheManager(2)
+
+    icm.add("one", generate_context(0, 0, 0, 3), [])
+    icm.add("two", generate_context(0, 0, 0, 3), [])
+    icm.get("one", generate_context(0, 0, 0, 3))
+    icm.add("three", generate_context(0, 0, 0, 5), [])
+
+    assert icm.get("one", generate_context(0, 0, 0, 3)) == []
+    assert icm.get("two", generate_context(0, 0, 0, 3)) is None
+    assert icm.get("three", generate_context(0, 0, 0, 5)) == []
+
+
+def test_inline_cache_manager_size_zero_disables_cache():
+    icm = InlineCacheManager(0)
+
+    icm.add("Some text", generate_context(0, 0, 0, 9), [])
+
+    assert icm.get("Some text", generate_context(0, 0, 0, 9)) is None
+
+
+def test_document_parser_uses_inline_cache():
+    source = """
+    Some *text*.
+
+    Some *text*.
+    """
+
+    parser = runner(source)
+
+    assert parser.inline_cache.hits == 1
+
+    compare_nodes_sequence(
+        parser.nodes[1].content[0].content,
+        [
+            TextNode(
+                "Some ",
+                info=NodeInfo(context=generate_context(3, 0, 3, 5)),
+            ),
+            StyleNode(
+                "star",
+                content=[
+                    TextNode(
+                        "text",
+                        info=NodeInfo(context=generate_context(3, 6, 3, 10)),
+                    )
+                ],
+                info=NodeInfo(context=generate_context(3, 5, 3, 11)),
+            ),
+            TextNode(
+                ".",
+                info=NodeInfo(context=generate_context(3, 11, 3, 12)),
+            ),
+        ],
+    )
+
+
+def test_document_parser_inline_cache_size():
+    environment = Environment.from_dict({"mau.parser.inline_cache_size": 0})
+
+    parser = runner("Some text\n\nSome text", environment)
+
+    assert parser.inline_cache.size == 0
+    assert parser.inline_cache.hits == 0
@@ -4,13 +4,18 @@ import pytest
 
 from mau.environment.environment import Environment
 from mau.lexers.base_lexer import BaseLexer
-from mau.parsers.managers.tokens_manager import TokenError, TokensManager
+from mau.parsers.managers.tokens_manager import (
+    TokenError,
+    TokensManager,
+    stop_set,
+)
 from mau.test_helpers import (
+    NullMessageHandler,
     generate_context,
     init_tokens_manager_factory,
 )
-from mau.text_buffer import Context
-from mau.token import EOF, Token, TokenType
+from mau.text_buffer import Context, TextBuffer
+from mau.token import EOF, Token, TokenArray, TokenType
 
 init_tokens_manager = init_tokens_manager_factory(BaseLexer, TokensManager)
 
@@ -282,6 +287,49 @@ def test_peek_token_is():
     assert tm.peek_token_is(TokenType.TEXT) is True
 
 
+def test_match():
+    tm = init_tokens_manager("Some text", Environment())
+
+    assert tm.match(TokenType.EOL) is None
+    assert tm.match(TokenType.TEXT, "Other text") is None
+    assert tm.match(TokenType.TEXT, "Some text") == Token(
+        TokenType.TEXT, "Some text", generate_context(0, 0, 0, 9)
+    )
+
+    # Matching doesn't advance the index.
+    assert tm.index == -1
+
+
+def test_match_accepts_check_function():
+    tm = init_tokens_manager("Some text", Environment())
+
+    assert tm.match(value_check_function=lambda x: x.startswith("Other")) is None
+    assert tm.match(value_check_function=lambda x: x.startswith("Some")) is not None
+
+
+def test_try_get():
+    tm = init_tokens_manager("Some text", Environment())
+
+    # A failed match doesn't advance the index.
+    assert tm.try_get(TokenType.EOL) is None
+    assert tm.index == -1
+
+    assert tm.try_get(TokenType.TEXT) == Token(
+        TokenType.TEXT, "Some text", generate_context(0, 0, 0, 9)
+    )
+    assert tm.index == 0
+
+    # EOF has an empty value, so it is false
+    # in a boolean context, but it is not None.
+    assert tm.try_get(TokenType.EOF) is not None
+
+
+def test_stop_set_contains_eof():
+    stop_tokens = stop_set(Token.generate(TokenType.LITERAL, "]"))
+
+    assert stop_tokens == {(TokenType.LITERAL, "]"), (TokenType.EOF, "")}
+
+
 def test_collect():
     tm = init_tokens_manager("Some text\nSome other text", Environment())
 
@@ -298,6 +346,25 @@ def test_collect():
     assert tokens == []
 
 
+def test_collect_with_stop_set():
+    tm = init_tokens_manager("", Environment())
+    tm.tokens = [
+        Token.generate(TokenType.TEXT, "Some text"),
+        Token.generate(TokenType.LITERAL, "]"),
+        Token.generate(TokenType.TEXT, "Some other text"),
+        EOF,
+    ]
+
+    stop_tokens = stop_set(Token.generate(TokenType.LITERAL, "]"))
+
+    assert tm.collect(stop_tokens) == [
+        Token.generate(TokenType.TEXT, "Some text"),
+    ]
+
+    # The stop token is not collected.
+    assert tm.peek_token() == Token.generate(TokenType.LITERAL, "]")
+
+
 def test_collect_join():
     tm = init_tokens_manager("Some te\nxt that will be joined\n!", Environment())
 
@@ -385,3 +452,93 @@ def test_collect_escape_stop_tokens_are_removed2():
         Token.generate(TokenType.LITERAL, "\\"),
         Token.generate(TokenType.LITERAL, "["),
     ]
+
+
+def test_iterator_tokens_are_loaded_when_needed():
+    tokens = iter(
+        [
+            Token(TokenType.TEXT, "Some text", generate_context(0, 0, 0, 9)),
+            Token(TokenType.EOF, "", generate_context(1, 0, 1, 0)),
+        ]
+    )
+    tm = TokensManager(tokens)
+
+    assert tm.tokens == []
+    assert tm.peek_token() == Token(TokenType.TEXT, "Some text", Context.empty())
+    assert tm.get_token(TokenType.TEXT) == Token(
+        TokenType.TEXT, "Some text", Context.empty()
+    )
+    assert tm.get_token(TokenType.EOF) == Token(TokenType.EOF, "", Context.empty())
+
+    # Beyond the last token the manager
+    # keeps returning it.
+    assert tm.peek_token() == Token(TokenType.EOF, "", Context.empty())
+
+
+def test_iterator_initial_state():
+    tm = TokensManager(
+        iter(
+            [
+                Token(TokenType.TEXT, "Some text", Context.empty()),
+                Token(TokenType.EOF, "", Context.empty()),
+            ]
+        )
+    )
+
+    assert tm.index == -1
+    assert tm.current_token == Token(TokenType.EOF, "", Context.empty())
+
+
+def test_iterator_tokens_are_discarded():
+    tm = TokensManager(
+        Token(TokenType.TEXT, str(i), Context.empty()) for i in range(1000)
+    )
+
+    for i in range(600):
+        tm.get_token(TokenType.TEXT, str(i))
+
+    # Tokens before the current one have
+    # been discarded, but the index is
+    # still absolute.
+    assert len(tm.tokens) < 1000
+    assert tm.index == 599
+    assert tm.current_token == Token(TokenType.TEXT, "599", Context.empty())
+
+
+def test_iterator_tokens_are_kept_for_backtracking():
+    tm = TokensManager(
+        Token(TokenType.TEXT, str(i), Context.empty()) for i in range(1000)
+    )
+
+    with tm:
+        for i in range(600):
+            tm.get_token(TokenType.TEXT, str(i))
+
+        # This is an error, so the context
+        # manager restores the status.
+        tm.get_token(TokenType.EOF)
+
+    assert tm.index == -1
+    assert tm.get_token() == Token(TokenType.TEXT, "0", Context.empty())
+
+
+def test_token_array():
+    text_buffer = TextBuffer("Some text\nSome other text")
+    lex = BaseLexer(text_buffer, NullMessageHandler(), Environment())
+    tm = TokensManager(TokenArray(text_buffer, lex.tokenize()))
+
+    assert tm.peek_token_is(TokenType.TEXT, "Some text") is True
+    assert tm.peek_token_is(TokenType.TEXT, "Some") is False
+    assert tm.peek_token_is(TokenType.EOF) is False
+
+    assert tm.get_token(TokenType.TEXT) == Token(
+        TokenType.TEXT, "Some text", generate_context(0, 0, 0, 9)
+    )
+    assert tm.get_token(TokenType.TEXT).context == Context(1, 0, 1, 15)
+
+    assert tm.peek_token_is(TokenType.EOF) is True
+    tm.get_token(TokenType.EOF)
+
+    # Beyond the last token the manager
+    # keeps checking it.
+    assert tm.peek_token_is(TokenType.EOF) is True
@@ -86,3 +86,55 @@ def test_process_functions_success():
         == """Loop detected, cannot parse token: Token(TokenType.EOL, "", test.py:0,0-0,0)."""
     )
     process_test.assert_called()
+
+
+def test_process_functions_dispatch_table():
+    process_other = Mock()
+    process_other.return_value = True
+
+    test_context = generate_context(0, 0, 0, 0)
+    test_tokens = [
+        Token(TokenType.EOL, "", test_context),
+        Token(TokenType.EOF, "", test_context),
+    ]
+
+    parser = BaseParser(test_tokens, Environment())
+
+    def process_eol():
+        parser.tm.get_token(TokenType.EOL)
+        return True
+
+    parser._process_functions = lambda: [process_other, process_eol]
+    parser._dispatch_table = lambda functions: {TokenType.EOL: [process_eol]}
+
+    parser.parse()
+
+    process_other.assert_not_called()
+
+
+def test_process_functions_dispatch_table_fallback():
+    process_eol = Mock()
+    process_eol.side_effect = TokenError
+
+    test_context = generate_context(0, 0, 0, 0)
+    test_tokens = [
+        Token(TokenType.EOL, "", test_context),
+        Token(TokenType.EOF, "", test_context),
+    ]
+
+    parser = BaseParser(test_tokens, Environment())
+    processed = []
+
+    def process_other():
+        processed.append(parser.tm.get_token(TokenType.EOL))
+        return True
+
+    parser._process_functions = lambda: [process_other, process_eol]
+    parser._dispatch_table = lambda functions: {TokenType.EOL: [process_eol]}
+
+    parser.parse()
+
+    # The dispatched function failed,
+    # so the others are tried.
+    process_eol.assert_called_once()
+    assert processed == [test_tokens[0]]
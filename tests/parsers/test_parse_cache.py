@@ -0,0 +1,173 @@
+from mau.environment.environment import Environment
+from mau.lexers.document_lexer import DocumentLexer
+from mau.parsers.document_parser import DocumentParser, DocumentParserOutput
+from mau.parsers.parse_cache import ParseCache, hash_file, included_files
+from mau.test_helpers import compare_nodes, parser_runner_factory
+
+runner = parser_runner_factory(DocumentLexer, DocumentParser)
+
+
+def parse_and_store(cache, text, environment, key="key"):
+    initial_variables = dict(environment.asflatdict())
+
+    output = runner(text, environment).output
+
+    cache.store(key, text, output, initial_variables, environment)
+
+    return output
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / "file.mau"
+    path.write_text("Some text")
+
+    assert hash_file(path.as_posix()) == hash_file(path.as_posix())
+    assert hash_file((tmp_path / "missing.mau").as_posix()) is None
+
+
+def test_included_files(tmp_path):
+    mau_path = tmp_path / "included.mau"
+    mau_path.write_text("Some text")
+    raw_path = tmp_path / "included.txt"
+    raw_path.write_text("Some raw text")
+
+    source = f"""
+    << mau:{mau_path.as_posix()}
+
+    << raw:{raw_path.as_posix()}
+    """
+
+    output = runner(source).output
+
+    assert included_files(output) == [mau_path.as_posix(), raw_path.as_posix()]
+
+
+def test_included_files_in_footnotes_and_groups(tmp_path):
+    footnote_path = tmp_path / "footnote.txt"
+    footnote_path.write_text("Some raw text")
+    group_path = tmp_path / "group.txt"
+    group_path.write_text("Some raw text")
+
+    source = f"""
+    This contains a footnote[footnote](somename).
+
+    [footnote=somename]
+    ----
+    << raw:{footnote_path.as_posix()}
+    ----
+
+    [group=group1, position=position1]
+    ----
+    << raw:{group_path.as_posix()}
+    ----
+
+    << blockgroup:group1
+    """
+
+    output = runner(source).output
+
+    assert sorted(included_files(output)) == [
+        footnote_path.as_posix(),
+        group_path.as_posix(),
+    ]
+
+
+def test_entry_key(tmp_path):
+    cache_environment = Environment.from_dict({"key": "value"})
+
+    cache = ParseCache(tmp_path.as_posix(), key="1.0")
+
+    key = cache.entry_key("main.mau", cache_environment)
+
+    assert key == cache.entry_key("main.mau", cache_environment)
+    assert key != cache.entry_key("other.mau", cache_environment)
+    assert key != cache.entry_key("main.mau", Environment.from_dict({"key": "other"}))
+
+    other_cache = ParseCache(tmp_path.as_posix(), key="2.0")
+    assert key != other_cache.entry_key("main.mau", cache_environment)
+
+
+def test_parse_cache_load_missing_entry(tmp_path):
+    cache = ParseCache(tmp_path.as_posix(), key="1.0")
+
+    assert cache.load("key", "Some text", Environment()) is None
+
+
+def test_parse_cache_store_and_load(tmp_path):
+    cache = ParseCache(tmp_path.as_posix(), key="1.0")
+
+    source = """
+    :answer:42
+
+    = Title {answer}
+
+    Some text.
+    """
+
+    output = parse_and_store(cache, source, Environment.from_dict({"key": "value"}))
+
+    environment = Environment.from_dict({"key": "value"})
+    loaded = cache.load("key", source, environment)
+
+    compare_nodes(loaded.document, output.document)
+
+    # The variables defined by the
+    # document have been restored.
+    assert environment["answer"] == "42"
+    assert environment["key"] == "value"
+
+
+def test_parse_cache_changed_include(tmp_path):
+    cache = ParseCache((tmp_path / "cache").as_posix(), key="1.0")
+
+    included_path = tmp_path / "included.mau"
+    included_path.write_text("Some text")
+
+    source = f"<< mau:{included_path.as_posix()}"
+
+    parse_and_store(cache, source, Environment())
+
+    assert cache.load("key", source, Environment()) is not None
+
+    included_path.write_text("Some other text")
+
+    assert cache.load("key", source, Environment()) is None
+
+
+def test_parse_cache_new_text_replaces_entry(tmp_path):
+    cache = ParseCache(tmp_path.as_posix(), key="1.0")
+
+    parse_and_store(cache, "Some text", Environment())
+    parse_and_store(cache, "Some other text", Environment())
+
+    # The entry of the previous text
+    # has been replaced.
+    assert len(list(tmp_path.iterdir())) == 1
+    assert cache.load("key", "Some text", Environment()) is None
+    assert cache.load("key", "Some other text", Environment()) is not None
+
+
+def test_parse_cache_corrupted_entry(tmp_path):
+    cache = ParseCache(tmp_path.as_posix(), key="1.0")
+
+    parse_and_store(cache, "Some text", Environment())
+
+    entry_path = next(tmp_path.iterdir())
+    entry_path.write_bytes(entry_path.read_bytes()[:-3])
+
+    assert cache.load("key", "Some text", Environment()) is None
+
+    entry_path.write_bytes(b"Not an entry")
+
+    assert cache.load("key", "Some text", Environment()) is None
+
+
+def test_parse_cache_empty_output(tmp_path):
+    cache = ParseCache(tmp_path.as_posix(), key="1.0")
+
+    cache.store("key", "", DocumentParserOutput(), {}, Environment())
+
+    loaded = cache.load("key", "", Environment())
+
+    assert loaded.document is None
+    assert loaded.include_calls == []
@@ -5,7 +5,10 @@ from mau.lexers.preprocess_variables_lexer import PreprocessVariablesLexer
 from mau.message import MauException, MauMessageType
 from mau.nodes.inline import TextNode
 from mau.nodes.node import NodeInfo
-from mau.parsers.preprocess_variables_parser import PreprocessVariablesParser
+from mau.parsers.preprocess_variables_parser import (
+    PreprocessVariablesParser,
+    replace_variables,
+)
 from mau.test_helpers import (
     compare_asdict_object,
     compare_nodes_sequence,
@@ -506,3 +509,44 @@ def test_escape_backtick():
             generate_context(0, 0, 0, 12),
         ),
     )
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "This is text",
+        "This is text   ",
+        "This is {attr}",
+        "This is {attr}   ",
+        r"This is \{attr\}",
+        r"This is \$ text",
+        r"This is `{attr}` and `\``",
+        "This is {attr} and }",
+        "This is {nested.attr}",
+    ],
+)
+def test_replace_variables_matches_parser(source):
+    environment = Environment.from_dict({"attr": "5", "nested": {"attr": "6"}})
+
+    parser = runner(source, environment)
+
+    assert replace_variables(source, environment) == parser.get_processed_text().value
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "",
+        "   ",
+        "This is\nmultiline",
+        "This is {undefined}",
+        "This is {{attr}}",
+        "This is `unclosed {attr}",
+        "This is {unclosed",
+        "This is \\",
+    ],
+)
+def test_replace_variables_leaves_other_cases_to_parser(source):
+    environment = Environment.from_dict({"attr": "5"})
+
+    assert replace_variables(source, environment) is None
@@ -0,0 +1,140 @@
+import pytest
+
+from mau.lexers.document_lexer import DocumentLexer
+from mau.nodes.inline import StyleNode, TextNode
+from mau.nodes.node import NodeInfo
+from mau.parsers.document_parser import DocumentParser, DocumentParserOutput
+from mau.parsers.document_processors.include import IncludeCall
+from mau.parsers.serialization import (
+    FORMAT_VERSION,
+    MAGIC,
+    SerializationError,
+    deserialize_output,
+    serialize_output,
+)
+from mau.test_helpers import (
+    compare_nodes,
+    generate_context,
+    parser_runner_factory,
+)
+
+runner = parser_runner_factory(DocumentLexer, DocumentParser)
+
+
+def test_serialization_round_trip():
+    source = """
+    = Title
+
+    Some *text* with a [link](https://example.org).
+
+    == Subtitle
+
+    * One
+    * Two
+    ** Three
+
+    << toc
+    """
+
+    output = runner(source).output
+
+    loaded = deserialize_output(serialize_output(output))
+
+    compare_nodes(loaded.document, output.document)
+    compare_nodes(loaded.toc, output.toc)
+
+
+def test_serialization_keeps_links_between_nodes():
+    source = """
+    = Title
+
+    Some text.
+
+    << toc
+    """
+
+    loaded = deserialize_output(serialize_output(runner(source).output))
+
+    header, paragraph, toc = loaded.document.content
+
+    assert header.parent is loaded.document
+    assert paragraph.content[0].parent is paragraph
+
+    # The ToC refers to the header of the document.
+    assert loaded.toc.nested_entries[0].header is header
+    assert toc.nested_entries[0].header is header
+
+
+def test_serialization_include_calls():
+    output = DocumentParserOutput(
+        include_calls=[
+            IncludeCall(
+                caller_uri="main.mau",
+                callee_uri="included.mau",
+                call_arguments={"key": "value"},
+                info=NodeInfo(context=generate_context(1, 0, 1, 20)),
+            ),
+            IncludeCall(caller_uri=None, callee_uri="other.mau"),
+        ]
+    )
+
+    loaded = deserialize_output(serialize_output(output))
+
+    assert loaded.document is None
+    assert loaded.toc is None
+    assert loaded.include_calls == output.include_calls
+
+
+def test_serialization_interns_strings():
+    document = StyleNode("star", content=[TextNode("repeated") for _ in range(10)])
+
+    data = serialize_output(DocumentParserOutput(document=document))
+
+    assert data.count(b"repeated") == 1
+
+
+def test_serialization_deep_tree():
+    document = TextNode("text")
+    for _ in range(5000):
+        child = document
+        document = StyleNode("star", content=[child])
+        child.set_parent(document)
+
+    loaded = deserialize_output(
+        serialize_output(DocumentParserOutput(document=document))
+    )
+
+    node = loaded.document
+    while isinstance(node, StyleNode):
+        assert node.content[0].parent is node
+        node = node.content[0]
+
+    assert node.value == "text"
+
+
+def test_serialization_unsupported_value():
+    document = TextNode("text")
+    document.value = object()
+
+    with pytest.raises(SerializationError):
+        serialize_output(DocumentParserOutput(document=document))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"Not Mau",
+        MAGIC + bytes([FORMAT_VERSION + 1]),
+        MAGIC + bytes([FORMAT_VERSION]),
+    ],
+)
+def test_deserialization_rejects_invalid_data(data):
+    with pytest.raises(SerializationError):
+        deserialize_output(data)
+
+
+def test_deserialization_rejects_truncated_data():
+    data = serialize_output(DocumentParserOutput(document=TextNode("text")))
+
+    with pytest.raises(SerializationError):
+        deserialize_output(data[:-3])
@@ -3,6 +3,7 @@ from mau.nodes.inline import TextNode
 from mau.nodes.node import NodeInfo
 from mau.parsers.text_parser import TextParser
 from mau.test_helpers import (
+    NullMessageHandler,
     compare_nodes_sequence,
     generate_context,
     init_parser_factory,
@@ -83,3 +84,59 @@ def test_square_brackets():
     ]
 
     compare_nodes_sequence(runner(source).nodes, expected)
+
+
+def test_lex_and_parse_lines():
+    lines = [(0, "Some *text"), (2, "more* text  ")]
+
+    parser = TextParser.lex_and_parse_lines(
+        lines, NullMessageHandler(), None, source_filename="test.py"
+    )
+
+    # Each line is parsed on its own, so the
+    # style markers do not match across lines.
+    assert len(parser.lines) == 2
+
+    compare_nodes_sequence(
+        parser.lines[0],
+        [
+            TextNode(
+                "Some *text",
+                info=NodeInfo(context=generate_context(0, 0, 0, 10)),
+            ),
+        ],
+    )
+
+    compare_nodes_sequence(
+        parser.lines[1],
+        [
+            TextNode(
+                "more* text",
+                info=NodeInfo(context=generate_context(2, 0, 2, 10)),
+            ),
+        ],
+    )
+
+    assert parser.nodes == parser.lines[0] + parser.lines[1]
+
+
+def test_lex_and_parse_lines_matches_lex_and_parse():
+    lines = [
+        (3, r"A `verbatim\`"),
+        (4, ""),
+        (5, "[link](https://example.org"),
+        (6, "_a_ "),
+    ]
+
+    parser = TextParser.lex_and_parse_lines(
+        lines, NullMessageHandler(), None, start_column=2
+    )
+
+    for (line_number, line), line_nodes in zip(lines, parser.lines):
+        start_column = 2 if line_number == 3 else 0
+
+        expected = TextParser.lex_and_parse(
+            line, NullMessageHandler(), None, line_number, start_column
+        ).nodes
+
+        compare_nodes_sequence(line_nodes, expected)
@@ -0,0 +1,29 @@
+import pytest
+
+from mau.cli import open_output
+
+
+def test_open_output_writes_file(tmp_path):
+    output_file = tmp_path / "output.html"
+
+    with open_output(output_file.as_posix()) as out:
+        out.write("Some text")
+
+        # The file is written
+        # only at the end.
+        assert not output_file.exists()
+
+    assert output_file.read_text() == "Some text"
+    assert [path.name for path in tmp_path.iterdir()] == ["output.html"]
+
+
+def test_open_output_keeps_file_on_error(tmp_path):
+    output_file = tmp_path / "output.html"
+    output_file.write_text("Previous text")
+
+    with pytest.raises(ValueError), open_output(output_file.as_posix()) as out:
+        out.write("Some text")
+        raise ValueError
+
+    assert output_file.read_text() == "Previous text"
+    assert [path.name for path in tmp_path.iterdir()] == ["output.html"]
@@ -1,5 +1,5 @@
 from mau.test_helpers import generate_context
-from mau.text_buffer import Context, adjust_context, adjust_context_dict
+from mau.text_buffer import Context, LineIndex, adjust_context, adjust_context_dict
 
 
 def test_context():
@@ -98,6 +98,52 @@ def test_context_move_to():
     }
 
 
+def test_line_index_position():
+    line_index = LineIndex("abc\ndef\n\nghi", start_line=10, start_column=5)
+
+    assert line_index.position(0) == (10, 5)
+    assert line_index.position(3) == (10, 8)
+    assert line_index.position(4) == (11, 0)
+    assert line_index.position(8) == (12, 0)
+    assert line_index.position(11) == (13, 2)
+
+
+def test_context_from_offsets():
+    line_index = LineIndex("abc\ndef", source="main")
+
+    ctx = Context.from_offsets(line_index, 5, 7)
+
+    assert ctx._line_index is line_index
+    assert ctx.asdict() == {
+        "start_line": 1,
+        "start_column": 1,
+        "end_line": 1,
+        "end_column": 3,
+        "source": "main",
+    }
+    assert ctx._line_index is None
+
+
+def test_context_from_offsets_clone_is_lazy():
+    line_index = LineIndex("abc\ndef", source="main")
+
+    ctx1 = Context.from_offsets(line_index, 5, 7)
+    ctx2 = ctx1.clone()
+
+    assert ctx2._line_index is line_index
+    assert ctx2 == ctx1
+
+
+def test_context_from_offsets_can_be_changed():
+    line_index = LineIndex("abc\ndef", source="main")
+
+    ctx = Context.from_offsets(line_index, 5, 7)
+    ctx.move_to(1, 0)
+
+    assert ctx == Context(2, 1, 2, 3, "main")
+    assert str(ctx) == "main:2,1-2,3"
+
+
 def test_adjust_context():
     context = generate_context(1, 2, 3, 4)
 
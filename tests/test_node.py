@@ -113,3 +113,17 @@ def test_wrapper_node_deepcopy_no_mutation():
 
     copy.content[0].value = "modified"
     assert child.value == "original"
+
+
+def test_node_accept_visitor_without_base_class():
+    class Visitor:
+        def _visit_text(self, node, **kwargs):
+            return {"text": node.value}
+
+        def _visit_default(self, node, **kwargs):
+            return {"default": node.type}
+
+    visitor = Visitor()
+
+    assert TextNode("Some text").accept(visitor) == {"text": "Some text"}
+    assert Node().accept(visitor) == {"default": "none"}
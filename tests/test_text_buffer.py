@@ -3,6 +3,7 @@ from mau.text_buffer import (
     Position,
     TextBuffer,
     adjust_position,
+    build_line_index,
 )
 
 
@@ -213,6 +214,16 @@ def test_text_buffer_nextline_last_line():
     assert text_buffer.column == 0
 
 
+def test_text_buffer_nextline_at():
+    text_buffer = TextBuffer("abc\ndef\nghi")
+    text_buffer.column = 2
+    text_buffer.nextline_at(8)
+
+    assert text_buffer.line == 2
+    assert text_buffer.column == 0
+    assert text_buffer.current_line == "ghi"
+
+
 def test_text_buffer_position():
     text_buffer = TextBuffer()
     text_buffer.line = 1
@@ -257,7 +268,74 @@ def test_text_buffer_skip_can_go_beyond_eol():
     assert text_buffer.column == 25
 
 
+def test_text_buffer_offsets():
+    text_buffer = TextBuffer("abc\ndef\nghi")
+    text_buffer.nextline()
+    text_buffer.skip(2)
+
+    assert text_buffer.offset == 6
+    assert text_buffer.line_start == 4
+    assert text_buffer.line_end == 7
+    assert text_buffer.position == (1, 2)
+
+
+def test_text_buffer_set_line_moves_offsets():
+    text_buffer = TextBuffer("abc\ndef\nghi")
+    text_buffer.line = 2
+    text_buffer.column = 1
+
+    assert text_buffer.offset == 9
+    assert text_buffer.current_line == "ghi"
+    assert text_buffer.current_char == "h"
+    assert text_buffer.tail == "hi"
+
+
+def test_text_buffer_nextline_trailing_newline():
+    text_buffer = TextBuffer("abc\n")
+    text_buffer.nextline()
+
+    assert text_buffer.current_line == ""
+    assert text_buffer.offset == 4
+    assert text_buffer.eof is True
+
+    text_buffer.nextline()
+
+    assert text_buffer.line == 2
+    assert text_buffer.offset == 4
+    assert text_buffer.eof is True
+
+
+def test_text_buffer_view():
+    text_buffer = TextBuffer("abc\ndef\nghi\njkl", 5, 0, None, 4, 11)
+
+    assert text_buffer.current_line == "def"
+    assert text_buffer.offset == 4
+    assert text_buffer.position == (5, 0)
+
+    text_buffer.nextline()
+
+    assert text_buffer.current_line == "ghi"
+    assert text_buffer.position == (6, 0)
+
+    text_buffer.skip(3)
+
+    assert text_buffer.eof is True
+
+    text_buffer.nextline()
+
+    assert text_buffer.current_line == ""
+    assert text_buffer.offset == 11
+    assert text_buffer.line_index.position(9) == (6, 1)
+
+
 def test_adjust_position():
     position: Position = (11, 22)
 
     assert adjust_position(position) == (12, 22)
+
+
+def test_build_line_index():
+    assert list(build_line_index("")) == [0]
+    assert list(build_line_index("abc\ndef\n\nghi")) == [0, 4, 8, 9]
+    assert list(build_line_index("abc\ndef\n\nghi", 4, 7)) == [4]
+    assert list(build_line_index("abc\ndef\n\nghi", 4, 8)) == [4, 8]
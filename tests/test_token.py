@@ -1,6 +1,14 @@
-from mau.test_helpers import TEST_CONTEXT_SOURCE, compare_asdict_list, generate_context
-from mau.text_buffer import Context
-from mau.token import Token, TokenType
+import pytest
+
+from mau import Mau
+from mau.test_helpers import (
+    TEST_CONTEXT_SOURCE,
+    NullMessageHandler,
+    compare_asdict_list,
+    generate_context,
+)
+from mau.text_buffer import Context, TextBuffer
+from mau.token import Token, TokenArray, TokenType
 
 
 def test_token_accepts_type_and_value():
@@ -142,3 +150,67 @@ def test_token_to_list_empty():
             Token(TokenType.TEXT, "", generate_context(0, 0, 0, 0)),
         ],
     )
+
+
+def test_token_array_rebuilds_tokens():
+    text_buffer = TextBuffer(
+        "Some text\nmore text",
+        start_line=10,
+        start_column=5,
+        source_filename=TEST_CONTEXT_SOURCE,
+    )
+    tokens = [
+        Token(TokenType.TEXT, "Some", generate_context(10, 5, 10, 9)),
+        Token(TokenType.TEXT, "text", generate_context(11, 5, 11, 9)),
+        Token(TokenType.EOF, "", generate_context(12, 0, 12, 0)),
+    ]
+
+    token_array = TokenArray(text_buffer, tokens)
+
+    assert len(token_array) == 3
+    compare_asdict_list(list(token_array), tokens)
+    compare_asdict_list(token_array[1:], tokens[1:])
+    assert token_array._tokens == {}
+
+
+def test_token_array_type_and_value():
+    text_buffer = TextBuffer("Some text", source_filename=TEST_CONTEXT_SOURCE)
+    token_array = TokenArray(
+        text_buffer,
+        [Token(TokenType.TEXT, "text", generate_context(0, 5, 0, 9))],
+    )
+
+    assert token_array.type_at(0) == TokenType.TEXT
+    assert token_array.value_at(-1) == "text"
+    assert token_array.value_is(0, "text") is True
+    assert token_array.value_is(0, "tex") is False
+
+    with pytest.raises(IndexError):
+        token_array.value_at(1)
+
+
+def test_token_array_keeps_tokens_not_in_source():
+    text_buffer = TextBuffer("Some text", source_filename=TEST_CONTEXT_SOURCE)
+    token = Token(TokenType.TEXT, "Other", generate_context(0, 0, 0, 5))
+
+    token_array = TokenArray(text_buffer, [token])
+
+    assert token_array._tokens == {0: token}
+    assert token_array[0] is token
+    assert token_array.value_is(0, "Other") is True
+
+
+def test_mau_run_lexer_stores_token_array():
+    mau = Mau(NullMessageHandler())
+    text = "= Title\n\nSome text"
+
+    lexer = mau.run_lexer(mau.init_text_buffer(text, TEST_CONTEXT_SOURCE))
+
+    # The tokens are the same
+    # created by the lexer.
+    expected_tokens = mau.init_lexer(
+        mau.init_text_buffer(text, TEST_CONTEXT_SOURCE)
+    ).tokenize()
+
+    assert isinstance(lexer.tokens, TokenArray)
+    compare_asdict_list(list(lexer.tokens), list(expected_tokens))
@@ -1,11 +1,18 @@
+import copy
+import json
+import pickle
+import sys
 from unittest.mock import Mock, patch
 
+import pytest
+
 from mau.environment.environment import Environment
 from mau.nodes.node import Node, NodeInfo
 from mau.nodes.node_arguments import NodeArguments
 from mau.test_helpers import ATestNode, NullMessageHandler, generate_context
 from mau.visitors.base_visitor import (
     BaseVisitor,
+    LazyMapping,
     MauException,
     MauVisitorDebugMessage,
     MauVisitorErrorMessage,
@@ -35,6 +42,33 @@ def test_visitor_node_accept():
     assert result == node.accept.return_value
 
 
+def test_visitor_visit_function():
+    class CustomVisitor(BaseVisitor):
+        def _visit_custom_type(self, node, **kwargs):
+            return {"custom": True}
+
+    assert CustomVisitor.visit_function("custom-type") is (
+        CustomVisitor._visit_custom_type
+    )
+    assert CustomVisitor.visit_function("unknown") is BaseVisitor._visit_default
+
+    # Each class has its own table.
+    assert "custom-type" in CustomVisitor._visit_functions
+    assert "custom-type" not in BaseVisitor._visit_functions
+
+
+def test_visitor_uses_visit_function():
+    class CustomVisitor(BaseVisitor):
+        def _visit_test(self, node, **kwargs):
+            return {"value": node.value}
+
+    node = ATestNode("Some test content")
+
+    assert CustomVisitor(NullMessageHandler()).visit(node) == {
+        "value": "Some test content"
+    }
+
+
 def test_visitor_no_node():
     bv = BaseVisitor(NullMessageHandler(), Environment())
     result = bv.visit(None, key1="value1")
@@ -72,6 +106,178 @@ def test_generic_node():
     }
 
 
+def test_lazy_mapping():
+    function = Mock(return_value={"key1": "value1"})
+
+    mapping = LazyMapping(function)
+
+    function.assert_not_called()
+
+    assert mapping["key1"] == "value1"
+    assert mapping == {"key1": "value1"}
+    assert repr(mapping) == "{'key1': 'value1'}"
+
+    function.assert_called_once()
+
+
+def test_lazy_mapping_copies_are_dictionaries():
+    mapping = LazyMapping(lambda: {"key1": "value1"})
+
+    assert copy.deepcopy(mapping) == {"key1": "value1"}
+    assert type(pickle.loads(pickle.dumps(mapping))) is dict
+
+
+def test_node_data_is_lazy():
+    parent = ATestNode("Parent")
+    node = ATestNode("Some test content", parent=parent)
+
+    bv = BaseVisitor(
+        NullMessageHandler(),
+        Environment.from_dict({"mau.visitor.lazy_node_data": True}),
+    )
+
+    with patch.object(bv, "_get_node_data", wraps=bv._get_node_data) as get_data:
+        result = bv.visit(node)
+
+        get_data.assert_called_once_with(node)
+
+        assert result["parent"]["_type"] == "test"
+        assert get_data.call_count == 2
+
+
+def test_node_data_is_not_lazy_by_default():
+    parent = ATestNode("Parent")
+    node = ATestNode("Some test content", parent=parent)
+
+    bv = BaseVisitor(NullMessageHandler(), Environment())
+
+    result = bv.visit(node)
+
+    assert type(result["parent"]) is dict
+    assert type(result["_context"]) is dict
+
+    # The result can be changed
+    # and converted to JSON.
+    result["parent"]["key"] = "value"
+    json.dumps(result)
+
+
+class ContentVisitor(BaseVisitor):
+    def _visit_test(self, node, **kwargs):
+        result = self._visit_default(node, **kwargs)
+        result["value"] = node.value
+
+        self._add_visit_content(result, node, **kwargs)
+
+        return result
+
+
+class IterativeVisitor(ContentVisitor):
+    iterative_visit = True
+
+
+def _nested_nodes(depth):
+    node = ATestNode("leaf")
+
+    for _ in range(depth):
+        node = ATestNode("parent", content=[node])
+        node.content[0].parent = node
+
+    return node
+
+
+def test_iterative_visit_gives_the_same_result():
+    node = ATestNode(
+        "root",
+        content=[_nested_nodes(3), ATestNode("sibling", content=[_nested_nodes(2)])],
+    )
+
+    def transformer(data):
+        data["transformed"] = True
+        return data
+
+    assert IterativeVisitor(NullMessageHandler()).visit(
+        node, transformer=transformer
+    ) == ContentVisitor(NullMessageHandler()).visit(node, transformer=transformer)
+
+
+def test_iterative_visit_deep_tree():
+    node = _nested_nodes(3 * sys.getrecursionlimit())
+
+    result = IterativeVisitor(NullMessageHandler()).visit(node)
+
+    assert result["value"] == "parent"
+
+    with pytest.raises(RecursionError):
+        ContentVisitor(NullMessageHandler()).visit(node)
+
+
+def test_iterative_visit_raises_exceptions_of_visited_nodes():
+    class FailingVisitor(IterativeVisitor):
+        def _visit_test(self, node, **kwargs):
+            if node.value == "leaf":
+                raise ValueError("leaf")
+
+            return super()._visit_test(node, **kwargs)
+
+    with pytest.raises(ValueError):
+        FailingVisitor(NullMessageHandler()).visit(_nested_nodes(2))
+
+
+def test_iterative_visit_stores_errors_of_nodes_not_visited():
+    class SkippingVisitor(IterativeVisitor):
+        def _visit_test(self, node, **kwargs):
+            if node.value == "leaf":
+                raise create_visitor_exception("leaf")
+
+            # The content is not visited.
+            return self._visit_default(node, **kwargs)
+
+    result = SkippingVisitor(NullMessageHandler()).visit(_nested_nodes(2))
+
+    assert result["_type"] == "test"
+
+
+def test_iterative_visit_runs_visit_functions_children_first():
+    class NumberingVisitor(ContentVisitor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.count = 0
+
+        def _visit_test(self, node, **kwargs):
+            self.count += 1
+            number = self.count
+
+            result = super()._visit_test(node, **kwargs)
+            result["number"] = number
+
+            return result
+
+    class IterativeNumberingVisitor(NumberingVisitor):
+        iterative_visit = True
+
+    def numbers(result):
+        values = []
+
+        while result:
+            values.append(result["number"])
+            result = result["content"][0] if result["content"] else None
+
+        return values
+
+    node = _nested_nodes(2)
+
+    # The recursive visit numbers the
+    # parents first, the iterative visit
+    # numbers the children first.
+    assert numbers(NumberingVisitor(NullMessageHandler()).visit(node)) == [1, 2, 3]
+    assert numbers(IterativeNumberingVisitor(NullMessageHandler()).visit(node)) == [
+        3,
+        2,
+        1,
+    ]
+
+
 def test_create_visitor_message_context_from_data():
     message_class = Mock()
 
@@ -1,9 +1,15 @@
+import io
+
+import jinja2
 import pytest
 
 from mau.environment.environment import Environment
 from mau.message import MauException, MauMessageType
+from mau.nodes.document import DocumentNode
+from mau.nodes.inline import TextNode
+from mau.nodes.node_arguments import NodeArguments
 from mau.test_helpers import ATestNode, NullMessageHandler
-from mau.visitors.jinja_visitor import JinjaVisitor
+from mau.visitors.jinja_visitor import JinjaVisitor, NativeRenderer
 
 
 def test_no_templates():
@@ -24,3 +30,204 @@ def test_no_node():
     result = visitor.visit(None)
 
     assert result == ""
+
+
+def test_templates_receive_the_configuration():
+    templates = {
+        "text.j2": "{{ value }}{{ config.answer.value }}",
+    }
+
+    environment = Environment.from_dict({"answer": {"value": "42"}})
+    environment.dupdate(templates, "mau.visitor.templates.custom")
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    assert visitor.visit(TextNode("The answer is ")) == "The answer is 42"
+
+    # Changes of the environment are
+    # visible in the templates.
+    environment["answer.value"] = "43"
+
+    assert visitor.visit(TextNode("The answer is ")) == "The answer is 43"
+
+
+def test_template_selection_is_memoised():
+    templates = {
+        "text.j2": "{{ value }}",
+        "text.tg_tag1.j2": "#{{ value }}#",
+    }
+
+    environment = Environment()
+    environment.dupdate(templates, "mau.visitor.templates.custom")
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    assert visitor.visit(TextNode("one")) == "one"
+    assert visitor.visit(TextNode("two")) == "two"
+    assert (
+        visitor.visit(TextNode("three", arguments=NodeArguments(tags=["tag1"])))
+        == "#three#"
+    )
+
+    # Only two different signatures
+    # have been seen.
+    assert len(visitor._selected_templates) == 2
+
+
+def test_native_renderer_simple_template():
+    renderer = NativeRenderer.from_source(
+        jinja2.Environment(), "<p>{{ content }}</p>\n"
+    )
+
+    assert renderer.parts == [("<p>", False), ("content", True), ("</p>", False)]
+    assert renderer.render({"content": "Some text"}) == "<p>Some text</p>"
+
+    # Missing variables are left to Jinja.
+    assert renderer.render({}) is None
+
+
+def test_native_renderer_complex_template():
+    environment = jinja2.Environment()
+
+    assert NativeRenderer.from_source(environment, "{{ value | upper }}") is None
+    assert NativeRenderer.from_source(environment, "{{ config.a }}") is None
+    assert NativeRenderer.from_source(environment, "{% if a %}{% endif %}") is None
+    assert NativeRenderer.from_source(environment, "{{ a ") is None
+
+
+def test_native_renderer_autoescape():
+    environment = jinja2.Environment(autoescape=True)
+
+    assert NativeRenderer.from_source(environment, "{{ value }}") is None
+
+
+def test_native_renderers_give_the_same_output():
+    templates = {
+        "text.j2": "{{ value }}",
+        "text.tg_tag1.j2": "#{{ value | trim }}#",
+    }
+
+    environment = Environment()
+    environment.dupdate(templates, "mau.visitor.templates.custom")
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    assert visitor.visit(TextNode(" Some text ")) == " Some text "
+    assert (
+        visitor.visit(TextNode(" Some text ", arguments=NodeArguments(tags=["tag1"])))
+        == "#Some text#"
+    )
+
+    assert visitor._native_renderers["text.tg_tag1"] is None
+    assert visitor._native_renderers["text"] is not None
+
+
+class RecordingOutput(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(text)
+        return super().write(text)
+
+
+def test_stream_writes_children_separately():
+    templates = {
+        "text.j2": "{{ value }}",
+        "document.j2": "<html>{{ content }}</html>",
+    }
+
+    environment = Environment()
+    environment.dupdate(templates, "mau.visitor.templates.custom")
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    node = DocumentNode(content=[TextNode("one"), TextNode("two")])
+
+    output = RecordingOutput()
+    visitor.stream(node, output)
+
+    assert output.getvalue() == visitor.process(node) == "<html>one\ntwo</html>"
+    assert output.writes == ["<html>", "one", "\n", "two", "</html>"]
+
+
+@pytest.mark.parametrize(
+    "document_template",
+    [
+        "{{ content | upper }}",
+        "{{ content }}{{ content }}",
+        "{% if false %}{{ content }}{% endif %}",
+    ],
+)
+def test_stream_falls_back_to_full_render(document_template):
+    templates = {
+        "text.j2": "{{ value }}",
+        "document.j2": document_template,
+    }
+
+    environment = Environment()
+    environment.dupdate(templates, "mau.visitor.templates.custom")
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    node = DocumentNode(content=[TextNode("one"), TextNode("two")])
+
+    output = RecordingOutput()
+    visitor.stream(node, output)
+
+    assert output.getvalue() == visitor.process(node)
+    assert len(output.writes) == 1
+
+
+class VisitlistVisitor(JinjaVisitor):
+    def visitlist(self, current_node, nodes_list, **kwargs):
+        return " | ".join(self.visit(node, **kwargs) for node in nodes_list)
+
+
+class DocumentVisitor(JinjaVisitor):
+    def _visit_document(self, node, **kwargs):
+        result = super()._visit_document(node, **kwargs)
+        result["content"] = result["content"].upper()
+
+        return result
+
+
+class VisitVisitor(JinjaVisitor):
+    def visit(self, node, **kwargs):
+        return f"[{super().visit(node, **kwargs)}]"
+
+
+class AddContentVisitor(JinjaVisitor):
+    def _add_visit_content(self, result, node, **kwargs):
+        super()._add_visit_content(result, node, **kwargs)
+        result["content"] = result["content"].upper()
+
+
+class ProcessVisitor(JinjaVisitor):
+    def process(self, node, **kwargs):
+        return f"<!-- header -->{super().process(node, **kwargs)}"
+
+
+@pytest.mark.parametrize(
+    "visitor_class",
+    [
+        VisitlistVisitor,
+        DocumentVisitor,
+        VisitVisitor,
+        AddContentVisitor,
+        ProcessVisitor,
+    ],
+)
+def test_stream_falls_back_to_full_render_with_overrides(visitor_class):
+    templates = {
+        "text.j2": "{{ value }}",
+        "document.j2": "<html>{{ content }}</html>",
+    }
+
+    environment = Environment()
+    environment.dupdate(templates, "mau.visitor.templates.custom")
+    visitor = visitor_class(NullMessageHandler(), environment)
+
+    node = DocumentNode(content=[TextNode("one"), TextNode("two")])
+
+    output = RecordingOutput()
+    visitor.stream(node, output)
+
+    assert output.getvalue() == visitor.process(node)
+    assert len(output.writes) == 1
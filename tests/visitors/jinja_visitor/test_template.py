@@ -2,7 +2,7 @@ import pytest
 
 from mau.nodes.node import Node, NodeInfo
 from mau.nodes.node_arguments import NodeArguments
-from mau.visitors.jinja_visitor import Template
+from mau.visitors.jinja_visitor import NodeSignature, Template
 
 
 def test_specificity():
@@ -338,3 +338,40 @@ def test_match_tags():
     assert template.match(node_b)
     assert not template.match(node_a)
     assert not template.match(node_c)
+
+
+def test_node_signature():
+    parent = Node(arguments=NodeArguments(subtype="psubtype"))
+    parent.type = "ptype"
+
+    node = Node(
+        parent=parent, arguments=NodeArguments(tags=["tag1", "tag2"], subtype="subtype")
+    )
+    node.type = "atype"
+
+    assert NodeSignature.from_node(node) == NodeSignature(
+        type="atype",
+        subtype="subtype",
+        tags=frozenset(["tag1", "tag2"]),
+        parent_type="ptype",
+        parent_subtype="psubtype",
+    )
+
+
+def test_match_signature():
+    template = Template.from_name(
+        "atype.subtype.tg_tag1.pt_ptype", content="somecontent"
+    )
+
+    assert template.match_signature(
+        NodeSignature(
+            type="atype",
+            subtype="subtype",
+            tags=frozenset(["tag1", "tag2"]),
+            parent_type="ptype",
+        )
+    )
+
+    assert not template.match_signature(
+        NodeSignature(type="atype", subtype="subtype", tags=frozenset(["tag1"]))
+    )
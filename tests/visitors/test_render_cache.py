@@ -0,0 +1,176 @@
+from mau.environment.environment import Environment
+from mau.lexers.document_lexer import DocumentLexer
+from mau.nodes.document import DocumentNode
+from mau.nodes.inline import StyleNode, TextNode
+from mau.nodes.node import NodeInfo
+from mau.nodes.node_arguments import NodeArguments
+from mau.nodes.paragraph import ParagraphNode
+from mau.parsers.document_parser import DocumentParser
+from mau.test_helpers import (
+    NullMessageHandler,
+    generate_context,
+    parser_runner_factory,
+)
+from mau.visitors.jinja_visitor import JinjaVisitor
+from mau.visitors.render_cache import RenderCache
+
+runner = parser_runner_factory(DocumentLexer, DocumentParser)
+
+
+def test_render_cache_same_structure():
+    cache = RenderCache()
+
+    node1 = StyleNode("star", content=[TextNode("text")])
+    node2 = StyleNode("star", content=[TextNode("text")])
+    node3 = StyleNode("star", content=[TextNode("other text")])
+    node4 = StyleNode("underscore", content=[TextNode("text")])
+
+    assert cache.structure(node1) == cache.structure(node2)
+    assert cache.structure(node1) != cache.structure(node3)
+    assert cache.structure(node1) != cache.structure(node4)
+
+
+def test_render_cache_ignores_context():
+    cache = RenderCache()
+
+    node1 = TextNode("text", info=NodeInfo(context=generate_context(0, 0, 0, 4)))
+    node2 = TextNode("text", info=NodeInfo(context=generate_context(5, 2, 5, 6)))
+
+    assert cache.key(node1) == cache.key(node2)
+
+
+def test_render_cache_key_contains_arguments():
+    cache = RenderCache()
+
+    node1 = TextNode("text", arguments=NodeArguments(tags=["tag1"]))
+    node2 = TextNode("text", arguments=NodeArguments(tags=["tag2"]))
+
+    assert cache.key(node1) != cache.key(node2)
+
+
+def test_render_cache_key_contains_parent_claims():
+    cache = RenderCache()
+
+    node1 = TextNode(
+        "text", parent=StyleNode("star", arguments=NodeArguments(subtype="sub1"))
+    )
+    node2 = TextNode(
+        "text", parent=StyleNode("star", arguments=NodeArguments(subtype="sub2"))
+    )
+    node3 = TextNode(
+        "text", parent=ParagraphNode(arguments=NodeArguments(subtype="sub1"))
+    )
+
+    keys = {cache.key(node1), cache.key(node2), cache.key(node3)}
+
+    assert len(keys) == 3
+
+
+def test_render_cache_does_not_cache_debug():
+    cache = RenderCache()
+
+    node = StyleNode(
+        "star",
+        content=[TextNode("text", arguments=NodeArguments(internal_tags=["debug"]))],
+    )
+
+    assert cache.key(node) is None
+    assert cache.key(node.content[0]) is None
+
+
+def test_render_cache_deep_tree():
+    cache = RenderCache()
+
+    node = TextNode("text")
+    for _ in range(5000):
+        node = StyleNode("star", content=[node])
+
+    assert cache.key(node) is not None
+
+
+def test_jinja_visitor_uses_render_cache():
+    environment = Environment.from_dict(
+        {
+            "mau.visitor.render_cache": True,
+            "mau.visitor.templates.custom": {
+                "document.j2": "{{ content }}",
+                "paragraph.j2": "<p>{{ content }}</p>",
+                "text.j2": "{{ value }}",
+            },
+        }
+    )
+
+    document = DocumentNode(
+        content=[
+            ParagraphNode(content=[TextNode("Some text")]),
+            ParagraphNode(content=[TextNode("Some text")]),
+            ParagraphNode(content=[TextNode("Other text")]),
+        ]
+    )
+
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    assert visitor.process(document) == (
+        "<p>Some text</p>\n<p>Some text</p>\n<p>Other text</p>"
+    )
+    assert visitor.render_cache.hits == 1
+
+
+def test_jinja_visitor_render_cache_is_disabled_by_default():
+    visitor = JinjaVisitor(NullMessageHandler(), Environment())
+
+    assert visitor.render_cache is None
+
+
+def test_render_cache_source_blocks():
+    environment = Environment.from_dict(
+        {
+            "mau.visitor.render_cache": True,
+            "mau.visitor.templates.custom": {
+                "document.j2": "{{ content }}",
+                "source.j2": "<pre>{{ content }}</pre>",
+                "source-line.j2": "{{ line_content }}",
+            },
+        }
+    )
+
+    source = """
+    [@source, python]
+    ----
+    x = 1
+    ----
+
+    [@source, python]
+    ----
+    y = 2
+    ----
+
+    [@source, python]
+    ----
+    x = 1
+    ----
+    """
+
+    document = runner(source).nodes
+
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    assert visitor.process(DocumentNode(content=document)) == (
+        "<pre>x = 1</pre>\n<pre>y = 2</pre>\n<pre>x = 1</pre>"
+    )
+    assert visitor.render_cache.hits == 1
+
+
+def test_render_cache_is_not_used_with_context_templates():
+    environment = Environment.from_dict(
+        {
+            "mau.visitor.render_cache": True,
+            "mau.visitor.templates.custom": {
+                "text.j2": "{{ value }} {{ _context.start_line }}",
+            },
+        }
+    )
+
+    visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+    assert visitor.render_cache is None
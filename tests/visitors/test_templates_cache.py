@@ -0,0 +1,170 @@
+import os
+from unittest.mock import Mock
+
+from mau.environment.environment import Environment
+from mau.nodes.inline import TextNode
+from mau.test_helpers import NullMessageHandler
+from mau.visitors.jinja_visitor import JinjaVisitor
+from mau.visitors.templates_cache import TemplatesCache, snapshot_templates_paths
+
+
+def test_snapshot_templates_paths(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "text.j2").write_text("{{ value }}")
+    (tmp_path / "sub" / "text.j2").write_text("{{ value }}")
+    (tmp_path / "notes.txt").write_text("Not a template")
+
+    snapshot = snapshot_templates_paths([tmp_path.as_posix()], ".j2")
+
+    assert sorted(snapshot) == [
+        (tmp_path / "sub" / "text.j2").resolve().as_posix(),
+        (tmp_path / "text.j2").resolve().as_posix(),
+    ]
+
+
+def test_templates_cache_loads_templates_once(tmp_path):
+    templates_path = tmp_path / "templates"
+    templates_path.mkdir()
+    (templates_path / "text.j2").write_text("{{ value }}")
+
+    load_path = Mock(return_value={"text.j2": "{{ value }}"})
+
+    cache = TemplatesCache((tmp_path / "cache").as_posix(), key="visitor")
+
+    assert cache.load_templates([templates_path.as_posix()], ".j2", load_path) == [
+        {"text.j2": "{{ value }}"}
+    ]
+    assert cache.load_templates([templates_path.as_posix()], ".j2", load_path) == [
+        {"text.j2": "{{ value }}"}
+    ]
+
+    load_path.assert_called_once_with(templates_path.as_posix())
+
+
+def test_templates_cache_reloads_changed_templates(tmp_path):
+    templates_path = tmp_path / "templates"
+    templates_path.mkdir()
+    template = templates_path / "text.j2"
+    template.write_text("{{ value }}")
+
+    load_path = Mock(return_value={"text.j2": "{{ value }}"})
+
+    cache = TemplatesCache((tmp_path / "cache").as_posix(), key="visitor")
+    cache.load_templates([templates_path.as_posix()], ".j2", load_path)
+
+    template.write_text("#{{ value }}#")
+    stat = template.stat()
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    cache.load_templates([templates_path.as_posix()], ".j2", load_path)
+
+    assert load_path.call_count == 2
+
+
+def test_templates_cache_depends_on_key(tmp_path):
+    templates_path = tmp_path / "templates"
+    templates_path.mkdir()
+
+    load_path = Mock(return_value={})
+
+    cache_dir = (tmp_path / "cache").as_posix()
+    TemplatesCache(cache_dir, key="visitor1").load_templates(
+        [templates_path.as_posix()], ".j2", load_path
+    )
+    TemplatesCache(cache_dir, key="visitor2").load_templates(
+        [templates_path.as_posix()], ".j2", load_path
+    )
+
+    assert load_path.call_count == 2
+
+
+def test_jinja_visitor_uses_templates_cache(tmp_path):
+    templates_path = tmp_path / "templates"
+    templates_path.mkdir()
+    (templates_path / "text.j2").write_text("#{{ value | trim }}#")
+
+    cache_path = tmp_path / "cache"
+
+    environment = Environment.from_dict(
+        {
+            "mau.visitor.templates.paths": [templates_path.as_posix()],
+            "mau.visitor.templates.cache_dir": cache_path.as_posix(),
+        }
+    )
+
+    for _ in range(2):
+        visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+        assert visitor.visit(TextNode("Just some text.")) == "#Just some text.#"
+
+    # The compiled template has been stored.
+    bytecode_files = [
+        path for path in (cache_path / "bytecode").rglob("*") if path.is_file()
+    ]
+    assert len(bytecode_files) == 1
+
+
+class SquareBracketsVisitor(JinjaVisitor):
+    jinja_environment_options = {
+        "variable_start_string": "[[",
+        "variable_end_string": "]]",
+    }
+
+
+def test_templates_cache_bytecode_depends_on_environment_options(tmp_path):
+    templates_path = tmp_path / "templates"
+    templates_path.mkdir()
+    (templates_path / "text.j2").write_text(
+        "{{ value }}[[ value ]]|{% if true %}X{% endif %}"
+    )
+
+    environment = Environment.from_dict(
+        {
+            "mau.visitor.templates.paths": [templates_path.as_posix()],
+            "mau.visitor.templates.cache_dir": (tmp_path / "cache").as_posix(),
+        }
+    )
+
+    node = TextNode("V")
+
+    for _ in range(2):
+        square_visitor = SquareBracketsVisitor(NullMessageHandler(), environment)
+        visitor = JinjaVisitor(NullMessageHandler(), environment)
+
+        assert square_visitor.visit(node) == "{{ value }}V|X"
+        assert visitor.visit(node) == "V[[ value ]]|X"
+
+
+class PreprocessVisitor(JinjaVisitor):
+    templates_preprocess = None
+
+
+def test_templates_cache_preprocesses_loaded_templates(tmp_path, monkeypatch):
+    templates_path = tmp_path / "templates"
+    templates_path.mkdir()
+    (templates_path / "text.j2").write_text("text: {{ value }}")
+
+    environment = Environment.from_dict(
+        {
+            "mau.visitor.templates.paths": [templates_path.as_posix()],
+            "mau.visitor.templates.cache_dir": (tmp_path / "cache").as_posix(),
+        }
+    )
+
+    node = TextNode("value")
+
+    visitor = PreprocessVisitor(NullMessageHandler(), environment)
+    assert visitor.visit(node) == "text: value"
+
+    # The preprocess function of the visitor
+    # changes (e.g. with a new version of
+    # the visitor), while the files are
+    # the same.
+    monkeypatch.setattr(
+        PreprocessVisitor,
+        "templates_preprocess",
+        staticmethod(lambda text: text.replace("text", "TEXT")),
+    )
+
+    visitor = PreprocessVisitor(NullMessageHandler(), environment)
+    assert visitor.visit(node) == "TEXT: value"